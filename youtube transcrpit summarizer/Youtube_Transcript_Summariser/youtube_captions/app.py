@@ -1,15 +1,74 @@
-from flask import Flask, send_from_directory, request, jsonify, send_file
+from flask import Flask, Response, send_from_directory, request, jsonify, g
 from flask_cors import CORS
+import json
+from contextlib import closing
 import os
-from get_youtube_captions_combined import get_english_captions, process_captions
-from summarize_transcript import summarize_text
-import re
-from gtts import gTTS
-import tempfile
-from transformers import MBartForConditionalGeneration, MBart50TokenizerFast, MarianMTModel, MarianTokenizer
+import time
+import metrics
+from deadline import Deadline
+from model_registry import registry, warm_models
+import pipeline
+from pipeline import PipelineError
+from result_cache import result_cache
+from search_index import search_index
+from get_youtube_captions_combined import get_english_captions
+from process_captions import iter_transcript_lines
+from jobs import JobManager, QueueFullError
+from tts import get_speech_service
+import bulk
 
 app = Flask(__name__, static_folder='frontend')
-CORS(app)
+CORS(app, expose_headers=['X-Request-ID', 'X-Video-Title'])
+metrics.configure_logging()
+warm_models()
+job_manager = JobManager(pipeline.process_video)
+# Bulk runs are long; one at a time keeps them from starving interactive jobs
+bulk_manager = JobManager(bulk.run_bulk_job, workers=1)
+
+# Read from the existing stats on every scrape
+metrics.registry.gauge('jobs_queued', 'Jobs waiting for a worker', ['manager'], lambda: {
+    ('process',): job_manager.stats()['queued'], ('bulk',): bulk_manager.stats()['queued']})
+metrics.registry.gauge('jobs_in_flight', 'Jobs queued or running', ['manager'], lambda: {
+    ('process',): job_manager.stats()['in_flight'], ('bulk',): bulk_manager.stats()['in_flight']})
+metrics.registry.gauge('model_resident_bytes', 'Estimated memory of loaded models', function=registry.resident_bytes)
+metrics.registry.gauge('model_loaded', 'Models resident in the registry', function=lambda: len(registry.stats()['resident_models']))
+metrics.registry.gauge('result_cache_hits', 'Result cache hits (memory and disk) since start', ['namespace'], lambda: {
+    (name,): counters['memory_hits'] + counters['disk_hits']
+    for name, counters in result_cache.stats()['namespaces'].items()})
+metrics.registry.gauge('result_cache_misses', 'Result cache misses since start', ['namespace'], lambda: {
+    (name,): counters['misses'] for name, counters in result_cache.stats()['namespaces'].items()})
+
+@app.before_request
+def start_request():
+    # Reuse the caller's request ID when a proxy already assigned one
+    g.request_id = request.headers.get('X-Request-ID') or metrics.new_request_id()
+    g.request_token = metrics.bind_request_id(g.request_id)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def finish_request(response):
+    seconds = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(seconds, method=request.method, endpoint=endpoint)
+    metrics.REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    response.headers['X-Request-ID'] = g.request_id
+    if request.path.startswith('/api/'):
+        metrics.log_event('request', method=request.method, path=request.path, status=response.status_code,
+                          seconds=round(seconds, 4))
+    return response
+
+def deadline_seconds(data):
+    """The optional `deadline` of a request body in seconds; raises ValueError if it is not a positive number."""
+    deadline = data.get('deadline')
+    if deadline is not None and (isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or deadline <= 0):
+        raise ValueError('deadline must be a positive number of seconds')
+    return deadline
+
+@app.teardown_request
+def end_request(exc):
+    token = g.pop('request_token', None)
+    if token is not None:
+        metrics.reset_request_id(token)
 
 @app.route('/')
 def serve_frontend():
@@ -25,124 +84,257 @@ def process_video():
         data = request.json
         video_url = data.get('url')
         summary_length = data.get('length', 'standard')
+        language = data.get('language', 'english').lower()
         
         if not video_url:
             return jsonify({'error': 'No video URL provided'}), 400
+        try:
+            deadline = deadline_seconds(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(pipeline.process_video(video_url, summary_length, language, deadline=Deadline(deadline)))
 
-        # Get captions
-        captions_url, video_title = get_english_captions(video_url)
-        if not captions_url:
-            return jsonify({'error': 'No English captions found for this video'}), 404
+    except PipelineError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Process captions
-        transcript = process_captions(captions_url)
-        if not transcript:
-            return jsonify({'error': 'Failed to process captions'}), 500
+@app.route('/api/rolling', methods=['POST'])
+def rolling_summary():
+    data = request.json or {}
+    video_url = data.get('url')
+    if not video_url:
+        return jsonify({'error': 'No video URL provided'}), 400
+    offset = data.get('offset')
+    if offset is not None and (not isinstance(offset, int) or offset < 0):
+        return jsonify({'error': 'offset must be a non-negative integer'}), 400
+    try:
+        return jsonify(pipeline.rolling_summary(video_url, data.get('length', 'standard'), offset))
+    except PipelineError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Format transcript: add newline after each timestamp
-        def add_newline_after_timestamp(text):
-            return re.sub(r'(\[\d{2}:\d{2}:\d{2}\])', '\n', text)
-        formatted_transcript = add_newline_after_timestamp(transcript)
+@app.route('/api/transcript', methods=['POST'])
+def stream_transcript():
+    data = request.json or {}
+    video_url = data.get('url')
+    if not video_url:
+        return jsonify({'error': 'No video URL provided'}), 400
 
-        # Generate summary
-        summary = summarize_text(formatted_transcript, summary_length)
+    captions_url, video_title = get_english_captions(video_url)
+    if not captions_url:
+        return jsonify({'error': 'No English captions found for this video'}), 404
 
-        # Translate summary if needed
-        language = data.get('language', 'english').lower()
-        if language != 'english':
-            try:
-                # Language code mapping for Helsinki-NLP models
-                helsinki_lang_map = {
-                    'hindi': 'Helsinki-NLP/opus-mt-en-hi',
-                    'marathi': 'Helsinki-NLP/opus-mt-en-mr',
-                    'chinese': 'Helsinki-NLP/opus-mt-en-zh',
-                    'arabic': 'Helsinki-NLP/opus-mt-en-ar'
-                }
-                
-                # Language code mapping for mBART
-                mbart_lang_map = {
-                    'kannada': 'kn_IN',
-                    'telugu': 'te_IN',
-                    'tamil': 'ta_IN'
-                }
-                
-                if language in helsinki_lang_map:
-                    try:
-                        # Load Helsinki-NLP model and tokenizer
-                        model_name = helsinki_lang_map[language]
-                        model = MarianMTModel.from_pretrained(model_name)
-                        tokenizer = MarianTokenizer.from_pretrained(model_name)
-                        
-                        # Tokenize and translate
-                        translated = model.generate(**tokenizer(summary, return_tensors="pt", padding=True))
-                        summary = tokenizer.decode(translated[0], skip_special_tokens=True)
-                    except Exception as e:
-                        print(f"Translation error for {language}: {str(e)}")
-                        summary = f"[Translation error: {str(e)}] " + summary
-                elif language in mbart_lang_map:
-                    try:
-                        # Load mBART model and tokenizer
-                        model = MBartForConditionalGeneration.from_pretrained("facebook/mbart-large-50-many-to-many-mmt")
-                        tokenizer = MBart50TokenizerFast.from_pretrained("facebook/mbart-large-50-many-to-many-mmt")
-                        
-                        # Set source and target language
-                        tokenizer.src_lang = "en_XX"
-                        tokenizer.tgt_lang = mbart_lang_map[language]
-                        
-                        # Tokenize and translate
-                        encoded = tokenizer(summary, return_tensors="pt")
-                        generated_tokens = model.generate(
-                            **encoded,
-                            forced_bos_token_id=tokenizer.lang_code_to_id[mbart_lang_map[language]],
-                            max_length=2500
-                        )
-                        
-                        # Decode the translation
-                        summary = tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)[0]
-                    except Exception as e:
-                        print(f"Translation error for {language}: {str(e)}")
-                        summary = f"[Translation error: {str(e)}] " + summary
-                else:
-                    summary = f"[Translation to '{language}' not supported] " + summary
-            except Exception as e:
-                summary = f"[Translation error: {str(e)}] " + summary
-
-        return jsonify({
-            'title': video_title,
-            'transcript': formatted_transcript,
-            'summary': summary
+    # Forward transcript lines as they are parsed from the caption stream
+    def generate():
+        for line in iter_transcript_lines(captions_url):
+            yield line + '\n\n'
+
+    return Response(generate(), mimetype='text/plain; charset=utf-8',
+                    headers={'X-Video-Title': video_title.encode('ascii', 'replace').decode('ascii')})
+
+@app.route('/api/analytics', methods=['POST'])
+def video_analytics():
+    data = request.json or {}
+    video_url = data.get('url')
+    if not video_url:
+        return jsonify({'error': 'No video URL provided'}), 400
+
+    # Numeric series by default; chart images only when listed, e.g. "images": ["wordcloud"]
+    images = data.get('images') or []
+    if isinstance(images, str):
+        images = [name for name in images.split(',') if name]
+    try:
+        width, height = int(data.get('width', 1000)), int(data.get('height', 400))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'width and height must be integers'}), 400
+    try:
+        return jsonify(pipeline.analyze_video(video_url, images, str(data.get('format', 'png')).lower(),
+                                              width, height))
+    except PipelineError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    data = request.json or {}
+    video_url = data.get('url')
+    summary_length = data.get('length', 'standard')
+    language = data.get('language', 'english').lower()
+
+    if not video_url:
+        return jsonify({'error': 'No video URL provided'}), 400
+    try:
+        deadline = deadline_seconds(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    params = {'video_url': video_url, 'summary_length': summary_length, 'language': language}
+    if deadline is not None:
+        params['deadline'] = deadline
+    try:
+        job, created = job_manager.submit(pipeline.job_key(video_url, summary_length, language, deadline), params)
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+
+    return jsonify(job.to_dict()), 202 if created else 200
+
+@app.route('/api/jobs', methods=['GET'])
+def job_stats():
+    return jsonify(job_manager.stats())
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    # A running job stops at its next check
+    return jsonify(job.to_dict()), 202 if job.active else 200
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def generate():
+        for event in job_manager.stream(job):
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+        yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/bulk', methods=['POST'])
+def submit_bulk():
+    data = request.json or {}
+    urls = data.get('urls') or ([data['url']] if data.get('url') else [])
+    summary_length = data.get('length', 'standard')
+    language = data.get('language', 'english').lower()
+    limit = data.get('limit')
+
+    if not urls:
+        return jsonify({'error': 'No playlist or channel URLs provided'}), 400
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        # The output file follows from the key, so no server path is part of the public job
+        job, created = bulk_manager.submit(bulk.bulk_job_key(urls, summary_length, language, limit), {
+            'urls': urls, 'summary_length': summary_length, 'language': language, 'limit': limit
         })
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '60'
+        return response, 429
+
+    return jsonify(job.to_dict()), 202 if created else 200
+
+@app.route('/api/bulk/<job_id>', methods=['GET'])
+def get_bulk(job_id):
+    job = bulk_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
+@app.route('/api/bulk/<job_id>/cancel', methods=['POST'])
+def cancel_bulk(job_id):
+    job = bulk_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 202 if job.active else 200
+
+@app.route('/api/bulk/<job_id>/results', methods=['GET'])
+def bulk_results(job_id):
+    job = bulk_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    params = job.params
+    output = bulk.bulk_output_path(bulk.bulk_job_key(params['urls'], params['summary_length'], params['language'],
+                                                     params['limit']))
+    if not os.path.exists(output):
+        return Response('', mimetype='application/x-ndjson')
+
+    # Results written so far, one JSON object per line
+    def generate():
+        with open(output, 'r', encoding='utf-8') as f:
+            yield from f
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/search', methods=['GET'])
+def search_transcripts():
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'No search query provided'}), 400
+    try:
+        limit, offset = int(request.args.get('limit', 20)), int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    try:
+        hits = search_index.search(query, limit, offset, request.args.get('video'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    return jsonify({'query': query, 'hits': hits})
+
+@app.route('/api/search/stats', methods=['GET'])
+def search_stats():
+    return jsonify(search_index.stats())
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@app.route('/api/models/stats', methods=['GET'])
+def model_stats():
+    return jsonify(registry.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/api/speak', methods=['POST'])
 def speak():
-    data = request.json
+    data = request.json or {}
     text = data.get('text')
     language = data.get('language', 'english').lower()
-    # gTTS language codes
-    lang_map = {
-        'english': 'en',
-        'hindi': 'hi',
-        'marathi': 'mr',
-        'chinese': 'zh-CN',
-        'arabic': 'ar',
-        'kannada': 'kn',
-        'telugu': 'te',
-        'tamil': 'ta'
-    }
-    tts_lang = lang_map.get(language, 'en')
     if not text:
         return jsonify({'error': 'No text provided'}), 400
     try:
-        tts = gTTS(text, lang=tts_lang)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-            tts.save(fp.name)
-            fp.flush()
-            return send_file(fp.name, mimetype='audio/mpeg', as_attachment=False)
+        audio = get_speech_service().stream(text, language)
+        # Synthesize the first chunk before responding so failures still return an error status
+        first = next(audio, b'')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    def generate():
+        # Closing the chunk stream cancels pending synthesis when the client goes away
+        with closing(audio):
+            yield first
+            yield from audio
+
+    return Response(generate(), mimetype='audio/mpeg', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/speak/stats', methods=['GET'])
+def speak_stats():
+    return jsonify(get_speech_service().stats())
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Dynamic batching of model calls across concurrent requests.
+
+A BatchScheduler owns one dispatcher thread in front of a family of models. Callers
+submit texts and get one future per text; the dispatcher groups queued texts that
+can share a generate() call (same model, same generation settings) into batches of
+at most `max_batch` texts and `max_tokens` padded tokens, runs them and resolves
+the futures. Lower priority values are served first, so brief summaries overtake
+detailed ones; within a priority, texts are served in arrival order.
+
+A batch that is not full waits up to `max_wait` seconds for more texts, but only
+while several threads have submitted within BATCH_ACTIVE_SECONDS: a lone request,
+including one arriving after a burst has ended, never waits.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Hashable, List, Optional, Sequence, Tuple
+
+from metrics import registry
+
+# BATCH_SCHEDULER=0 makes every request run its own batches, as before
+BATCH_SCHEDULER = os.environ.get('BATCH_SCHEDULER', '1') != '0'
+# Longest a partial batch is held back for texts from other requests
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', '20'))
+# Padded tokens (texts x longest text) per generate() call
+BATCH_MAX_TOKENS = int(os.environ.get('BATCH_MAX_TOKENS', '4096'))
+# Submissions remembered to decide whether other requests are active
+RECENT_SUBMISSIONS = 16
+# A thread counts as an active request for this long after its last submission
+BATCH_ACTIVE_SECONDS = float(os.environ.get('BATCH_ACTIVE_SECONDS', '5'))
+# A dispatcher with nothing to do exits after this long and restarts on the next submit
+IDLE_SECONDS = 30
+
+BATCH_SIZE = registry.histogram('batch_size', 'Texts per batched generate() call', ['scheduler'],
+                                buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 64))
+BATCH_QUEUE_WAIT = registry.histogram('batch_queue_wait_seconds', 'Time texts wait for a batch slot',
+                                      ['scheduler'],
+                                      buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                                               30, 60, 120, 300))
+
+# run_batch(handle, params, texts) -> one output per text
+BatchRunner = Callable[[Any, Hashable, List[str]], List[Any]]
+
+
+class _Item:
+    __slots__ = ('handle', 'params', 'text', 'tokens', 'arrived', 'future')
+
+    def __init__(self, handle: Any, params: Hashable, text: str, tokens: int):
+        self.handle = handle
+        self.params = params
+        self.text = text
+        self.tokens = tokens
+        self.arrived = time.monotonic()
+        self.future: Future = Future()
+
+    def key(self) -> tuple:
+        # Texts batch together only on the same model with the same settings
+        return self.handle, self.params
+
+
+class BatchScheduler:
+    """Queue texts from every caller and run them through `run_batch` in shared batches."""
+
+    def __init__(self, name: str, run_batch: BatchRunner, max_batch: int,
+                 max_tokens: int = BATCH_MAX_TOKENS, max_wait: float = BATCH_MAX_WAIT_MS / 1000):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        # (priority, sequence, item)
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        # (monotonic time, thread id) of recent submissions
+        self._recent: Deque[Tuple[float, int]] = deque(maxlen=RECENT_SUBMISSIONS)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, handle: Any, params: Hashable, texts: Sequence[str], tokens: Sequence[int],
+               priority: int = 0) -> List[Future]:
+        """
+        Queue `texts` (with their token lengths) for `handle` and return their futures.
+
+        `handle` is passed back to `run_batch` and identifies the model; `params` are
+        the generation settings. Both must be hashable, and equal for texts to share
+        a batch.
+        """
+        items = [_Item(handle, params, text, count) for text, count in zip(texts, tokens)]
+        with self._cond:
+            for item in items:
+                heapq.heappush(self._heap, (priority, next(self._sequence), item))
+            self._recent.append((time.monotonic(), threading.get_ident()))
+            if self._thread is None or not self._thread.is_alive():
+                # Also replaces a dispatcher that did not survive a fork
+                self._thread = threading.Thread(target=self._dispatch, name=f'batch-{self.name}', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return [item.future for item in items]
+
+    def queued(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _concurrent(self) -> bool:
+        # Old submissions stop counting, so the estimate decays once a burst is over
+        cutoff = time.monotonic() - BATCH_ACTIVE_SECONDS
+        return len({ident for submitted, ident in self._recent if submitted >= cutoff}) > 1
+
+    def _select(self) -> List[_Item]:
+        """The head of the queue plus the compatible texts that fit its batch, in queue order."""
+        head = self._heap[0][2]
+        batch, longest = [], 0
+        for _, _, item in sorted(self._heap, key=lambda entry: entry[:2]):
+            if item.key() != head.key():
+                continue
+            if batch and (len(batch) >= self.max_batch
+                          or max(longest, item.tokens) * (len(batch) + 1) > self.max_tokens):
+                break
+            batch.append(item)
+            longest = max(longest, item.tokens)
+        return batch
+
+    def _take(self) -> List[_Item]:
+        """Wait for a batch to fill or its deadline to pass, then remove it from the queue."""
+        if self.max_wait > 0 and self._concurrent():
+            deadline = self._heap[0][2].arrived + self.max_wait
+            while len(self._select()) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        batch = self._select()
+        chosen = set(map(id, batch))
+        self._heap = [entry for entry in self._heap if id(entry[2]) not in chosen]
+        heapq.heapify(self._heap)
+        # Texts whose caller gave up are dropped here
+        return [item for item in batch if item.future.set_running_or_notify_cancel()]
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    if not self._cond.wait(IDLE_SECONDS) and not self._heap:
+                        self._thread = None
+                        return
+                batch = self._take()
+            if batch:
+                self._execute(batch)
+
+    def _execute(self, batch: List[_Item]) -> None:
+        started = time.monotonic()
+        for item in batch:
+            BATCH_QUEUE_WAIT.observe(started - item.arrived, scheduler=self.name)
+        BATCH_SIZE.observe(len(batch), scheduler=self.name)
+        head = batch[0]
+        try:
+            outputs = self.run_batch(head.handle, head.params, [item.text for item in batch])
+        except Exception as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        for item, output in zip(batch, outputs):
+            item.future.set_result(output)
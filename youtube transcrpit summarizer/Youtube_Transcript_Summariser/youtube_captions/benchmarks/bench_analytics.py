@@ -0,0 +1,101 @@
+"""
+Compare the single-pass TranscriptIndex analytics against the previous per-metric
+implementation (NLTK word_tokenize in every metric, TextBlob per segment) on a
+multi-hour synthetic transcript. Charts are skipped on both sides; only the metric
+computation is timed.
+
+Usage:
+    python benchmarks/bench_analytics.py [--hours 3] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from fixtures import make_json3
+from process_captions import caption_segments
+from transcript import Transcript
+from transcript_index import TranscriptIndex
+
+
+def legacy_metrics(transcript: Transcript, stop_words: frozenset) -> dict:
+    """The metric computations of the previous DashboardAnalytics, without the charts."""
+    from nltk.tokenize import sent_tokenize, word_tokenize
+    from textblob import TextBlob
+
+    text = transcript.plain_text()
+    words = word_tokenize(text)
+    sentences = sent_tokenize(text)
+
+    speeds = []
+    starts = transcript.start_ms
+    for i in range(len(transcript) - 1):
+        minutes = (starts[i + 1] - starts[i]) / 60000
+        if minutes > 0:
+            speeds.append(len(word_tokenize(transcript.segment_text(i))) / minutes)
+
+    topic_words = [w.lower() for w in word_tokenize(text) if w.lower() not in stop_words and w.isalnum()]
+    engagement = [(TextBlob(content).sentiment.polarity + 1) * len(word_tokenize(content)) / 100
+                  for content in transcript.texts()]
+    return {
+        'total_words': len(words),
+        'total_sentences': len(sentences),
+        'avg_wpm': float(np.mean(speeds)) if speeds else 0.0,
+        'top_topics': dict(Counter(topic_words).most_common(10)),
+        'engagement': engagement,
+    }
+
+
+def indexed_metrics(transcript: Transcript, stop_words: frozenset) -> dict:
+    index = TranscriptIndex(transcript)
+    speeds = index.words_per_minute()
+    return {
+        'total_words': len(index),
+        'total_sentences': index.sentence_count,
+        'avg_wpm': float(speeds.mean()) if len(speeds) else 0.0,
+        'top_topics': dict(index.top_terms(10, stop_words)),
+        'engagement': index.engagement_scores().tolist(),
+    }
+
+
+def best_of(fn, repeat: int, *args):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from nltk.corpus import stopwords
+    stop_words = frozenset(stopwords.words('english'))
+
+    transcript = Transcript.from_segments(caption_segments(make_json3(args.hours * 60)['events']))
+    print(f"{args.hours:g} h fixture: {len(transcript)} segments, {len(transcript.text.split())} words")
+
+    legacy_s, legacy = best_of(legacy_metrics, args.repeat, transcript, stop_words)
+    indexed_s, indexed = best_of(indexed_metrics, args.repeat, transcript, stop_words)
+
+    correlation = np.corrcoef(legacy['engagement'], indexed['engagement'])[0, 1]
+    print(f"legacy  {legacy_s:8.3f}s")
+    print(f"indexed {indexed_s:8.3f}s  ({legacy_s / indexed_s:.1f}x faster)")
+    print(f"words {legacy['total_words']} vs {indexed['total_words']}, "
+          f"avg WPM {legacy['avg_wpm']:.1f} vs {indexed['avg_wpm']:.1f}, "
+          f"engagement correlation {correlation:.4f}")
+    print(f"top topics match: {list(legacy['top_topics']) == list(indexed['top_topics'])}")
+
+
+if __name__ == '__main__':
+    main()
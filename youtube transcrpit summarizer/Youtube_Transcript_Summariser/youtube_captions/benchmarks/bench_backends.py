@@ -0,0 +1,149 @@
+"""
+Benchmark inference backends (torch fp32, int8 dynamic quantization, ONNX Runtime)
+on fixed transcripts: load time, latency, throughput, peak RSS and ROUGE drift
+against the fp32 torch baseline.
+
+Usage:
+    python benchmarks/bench_backends.py [transcript.txt ...] [--backends torch,int8,onnx]
+        [--model facebook/bart-large-cnn] [--level standard] [--output results.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def _ngrams(tokens: List[str], n: int) -> Counter:
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _f1(overlap: int, candidate: int, reference: int) -> float:
+    if not overlap or not candidate or not reference:
+        return 0.0
+    precision, recall = overlap / candidate, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs(a: List[str], b: List[str]) -> int:
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge(candidate: str, reference: str) -> Dict[str, float]:
+    """ROUGE-1, ROUGE-2 and ROUGE-L F1 on lowercased whitespace tokens."""
+    c, r = candidate.lower().split(), reference.lower().split()
+    scores = {}
+    for n in (1, 2):
+        cn, rn = _ngrams(c, n), _ngrams(r, n)
+        scores[f'rouge{n}'] = _f1(sum((cn & rn).values()), sum(cn.values()), sum(rn.values()))
+    scores['rougeL'] = _f1(_lcs(c, r), len(c), len(r))
+    return scores
+
+
+def load_transcripts(paths: List[str]) -> List[str]:
+    from summarize_transcript import clean_transcript
+    if paths:
+        texts = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append(clean_transcript(f.read()))
+        return texts
+    from bench_batching import synthetic_transcript
+    return [synthetic_transcript(sentences, seed=seed) for seed, sentences in enumerate((150, 400))]
+
+
+def run_backend(backend: str, model: str, level: str, paths: List[str], batch_size: int) -> Dict:
+    """Load one backend in this process, summarize the fixed chunks and report."""
+    from model_registry import get_summarizer
+    from summarize_transcript import SUMMARY_CONFIGS, chunk_by_tokens, summarize_chunks
+
+    config = SUMMARY_CONFIGS[level]
+    start = time.perf_counter()
+    summarizer = get_summarizer(model, backend)
+    load_seconds = time.perf_counter() - start
+
+    chunks = []
+    for text in load_transcripts(paths):
+        chunks.extend(chunk_by_tokens(text, summarizer.tokenizer, config['chunk_tokens'], config['overlap_tokens']))
+
+    # One warm-up chunk so lazy kernel initialisation does not count as latency
+    summarize_chunks(summarizer, chunks[:1], config['max_length'], config['min_length'], 1)
+    start = time.perf_counter()
+    outputs = summarize_chunks(summarizer, chunks, config['max_length'], config['min_length'], batch_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'model': model,
+        'chunks': len(chunks),
+        'load_s': round(load_seconds, 2),
+        'total_s': round(elapsed, 2),
+        'latency_per_chunk_s': round(elapsed / max(1, len(chunks)), 3),
+        'chunks_per_s': round(len(chunks) / elapsed, 3) if elapsed else 0.0,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'outputs': outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcripts', nargs='*', help="Transcript files (fixed synthetic text if omitted)")
+    parser.add_argument('--backends', default='torch,int8,onnx')
+    parser.add_argument('--model', default=None, help="Model for every backend (defaults to the level's model)")
+    parser.add_argument('--level', default='standard')
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--output', help="Write the full results as JSON")
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from summarize_transcript import SUMMARY_CONFIGS
+    model = args.model or SUMMARY_CONFIGS[args.level]['model']
+
+    if args.run:
+        print(json.dumps(run_backend(args.run, model, args.level, args.transcripts, args.batch_size)))
+        return
+
+    results = []
+    for backend in args.backends.split(','):
+        # Fresh process per backend so peak RSS reflects that backend alone
+        proc = subprocess.run(
+            [sys.executable, __file__, *args.transcripts, '--run', backend, '--model', model,
+             '--level', args.level, '--batch-size', str(args.batch_size)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    baseline = next((r for r in results if r['backend'] == 'torch'), None)
+    for result in results:
+        if baseline and result is not baseline:
+            scores = [rouge(out, ref) for out, ref in zip(result['outputs'], baseline['outputs'])]
+            result['rouge_vs_fp32'] = {key: round(sum(s[key] for s in scores) / len(scores), 4)
+                                       for key in ('rouge1', 'rouge2', 'rougeL')} if scores else {}
+        drift = result.get('rouge_vs_fp32', {}).get('rougeL')
+        print(f"{result['backend']:>6}: load {result['load_s']:6.1f}s  {result['latency_per_chunk_s']:6.2f}s/chunk  "
+              f"{result['chunks_per_s']:6.2f} chunks/s  RSS {result['peak_rss_mb']:7.1f} MB  "
+              f"ROUGE-L vs fp32 {drift if drift is not None else 'baseline'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
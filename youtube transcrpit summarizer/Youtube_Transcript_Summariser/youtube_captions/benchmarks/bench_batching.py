@@ -0,0 +1,123 @@
+"""
+Concurrent summarize + translate requests with and without the batch scheduler:
+total time, latency per summary level, batch sizes and queue waits.
+
+Each request summarizes a synthetic transcript at one of the --levels (cycled over
+--requests threads started together) and translates the summary, the way
+concurrent /api/process calls do.
+
+Usage:
+    python benchmarks/bench_batching.py [--requests 6] [--minutes 10]
+        [--levels detailed brief standard] [--models stub|real] [--output batching.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+
+def run(scheduled: bool, transcript, levels: list, language: str) -> dict:
+    import batching
+    import summarize_transcript as st
+    import translation
+
+    # Both modules read the flag at import; switch them together
+    st.BATCH_SCHEDULER = translation.BATCH_SCHEDULER = scheduled
+    translation.sentence_cache = translation.SentenceCache(translation.SENTENCE_CACHE_SIZE)
+    before = {name: (batching.BATCH_SIZE.count(scheduler=name), batching.BATCH_SIZE.total(scheduler=name),
+                     batching.BATCH_QUEUE_WAIT.total(scheduler=name))
+              for name in ('summarize', 'translate')}
+
+    latencies = {level: [] for level in levels}
+    lock = threading.Lock()
+
+    def request(level):
+        start = time.perf_counter()
+        summary = st.summarize_text(transcript, level)
+        translation.translate_text(summary, language)
+        with lock:
+            latencies[level].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=request, args=(level,)) for level in levels]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'scheduler': scheduled,
+        'seconds': round(elapsed, 2),
+        'requests_per_s': round(len(levels) / elapsed, 3),
+        'latency_s': {level: {'p50': round(statistics.median(values), 2), 'max': round(max(values), 2)}
+                      for level, values in latencies.items()},
+    }
+    for name, (batches, texts, waited) in before.items():
+        batches = batching.BATCH_SIZE.count(scheduler=name) - batches
+        if batches:
+            texts = batching.BATCH_SIZE.total(scheduler=name) - texts
+            waited = batching.BATCH_QUEUE_WAIT.total(scheduler=name) - waited
+            result[name] = {'batches': batches, 'mean_batch': round(texts / batches, 2),
+                            'mean_queue_wait_s': round(waited / texts, 3)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=6)
+    parser.add_argument('--minutes', type=float, default=10, help="Length of the synthetic transcript")
+    parser.add_argument('--levels', nargs='*', default=['detailed', 'brief', 'standard'],
+                        choices=['brief', 'standard', 'detailed'])
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--language', help="Translation target (default: 'stub' for stub models, else hindi)")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    from fixtures import make_json3
+    from model_registry import get_summarizer
+    from process_captions import caption_segments
+    import summarize_transcript as st
+    from transcript import Transcript
+    import translation
+
+    language = args.language or ('stub' if args.models == 'stub' else 'hindi')
+    if args.models == 'stub':
+        from stub_models import stub_models
+
+        paths = stub_models()
+        for config in st.SUMMARY_CONFIGS.values():
+            config['model'] = paths['summarization']
+        translation.register_language('stub', translation.TranslationRoute('marian', paths['translation']))
+
+    transcript = Transcript.from_segments(caption_segments(make_json3(args.minutes)['events']))
+    levels = [args.levels[i % len(args.levels)] for i in range(args.requests)]
+    # Load every model before timing
+    for level in set(levels):
+        get_summarizer(st.SUMMARY_CONFIGS[level]['model'])
+    translation.translate_text('The model talks about data.', language)
+
+    results = []
+    for scheduled in (False, True):
+        result = run(scheduled, transcript, levels, language)
+        results.append(result)
+        latency = '  '.join(f"{level} p50 {values['p50']:.2f}s" for level, values in result['latency_s'].items())
+        batches = '  '.join(f"{name} batch {result[name]['mean_batch']:.1f} wait {result[name]['mean_queue_wait_s']:.3f}s"
+                            for name in ('summarize', 'translate') if name in result)
+        print(f"scheduler={str(scheduled):5}  {result['seconds']:7.2f}s  {latency}  {batches}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'models': args.models, 'levels': levels, 'results': results},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
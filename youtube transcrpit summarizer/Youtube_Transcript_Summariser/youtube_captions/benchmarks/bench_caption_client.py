@@ -0,0 +1,77 @@
+"""
+Compare caption downloads through a fresh requests.get() per file against the
+pooled CaptionClient, against a local server that adds per-connection and per-request latency, and
+check that injected 503s are retried.
+
+Usage:
+    python benchmarks/bench_caption_client.py [--files 64] [--workers 8] [--latency 0.05]
+        [--connect-latency 0.1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def fetch_all(get, urls, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for response in executor.map(get, urls):
+            response.raise_for_status()
+            response.json()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--minutes', type=float, default=10, help="Length of each caption fixture")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds the server waits per request")
+    parser.add_argument('--connect-latency', type=float, default=0.1,
+                        help="Seconds the server waits per new connection, standing in for the TLS handshake")
+    args = parser.parse_args()
+
+    import requests
+    from caption_client import CaptionClient
+    from fixtures import FixtureServer, write_json3
+
+    fixture_dir = os.path.join(tempfile.gettempdir(), 'caption_fixtures')
+    names = []
+    for i in range(args.files):
+        name = f"client_{args.minutes:g}m_{i}.json3"
+        write_json3(os.path.join(fixture_dir, name), args.minutes, seed=i)
+        names.append(name)
+
+    with FixtureServer(fixture_dir, latency=args.latency, connect_latency=args.connect_latency,
+                       keep_alive=True) as server:
+        urls = [server.url(name) for name in names]
+        elapsed = fetch_all(requests.get, urls, args.workers)
+        print(f"{'requests.get':>14}: {elapsed:7.3f}s  {server.connections:4d} connections")
+
+    with FixtureServer(fixture_dir, latency=args.latency, connect_latency=args.connect_latency,
+                       keep_alive=True) as server:
+        urls = [server.url(name) for name in names]
+        client = CaptionClient(pool_size=args.workers)
+        elapsed = fetch_all(client.get, urls, args.workers)
+        client.close()
+        print(f"{'CaptionClient':>14}: {elapsed:7.3f}s  {server.connections:4d} connections")
+
+    # Every third request fails with a 503; all files must still arrive
+    with FixtureServer(fixture_dir, fail_every=3, keep_alive=True) as server:
+        urls = [server.url(name) for name in names]
+        client = CaptionClient(pool_size=args.workers, backoff=0.01)
+        fetch_all(client.get, urls, args.workers)
+        stats = client.stats()
+        client.close()
+        assert stats['retries'] > 0 and stats['failures'] == 0, stats
+        print(f"{'retries':>14}: {stats['requests']} requests, {stats['retries']} retried, all {len(urls)} files fetched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare peak RSS and time-to-first-line of the streaming JSON3 parser against
+the previous whole-document requests.get().json() implementation.
+
+Usage:
+    python benchmarks/bench_caption_parser.py [--hours 4]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+MODES = ('legacy', 'streaming_join', 'streaming_write')
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, url: str) -> dict:
+    """Run one implementation in this process and report its timings."""
+    import requests
+    from process_captions import format_timestamp, iter_transcript_lines, process_captions
+
+    baseline = max_rss_mb()
+    start = time.perf_counter()
+    first_line = None
+    lines = 0
+
+    if mode == 'legacy':
+        caption_data = requests.get(url).json()
+        formatted = []
+        for event in caption_data.get('events', []):
+            if event.get('segs'):
+                text = ' '.join(seg.get('utf8', '') for seg in event['segs'] if seg.get('utf8')).strip()
+                if text:
+                    formatted.append(f"[{format_timestamp(event.get('tStartMs', 0))}] {text}")
+        result = '\n\n'.join(formatted)
+        first_line = time.perf_counter() - start
+        lines = len(formatted)
+    elif mode == 'streaming_join':
+        result = process_captions(url)
+        first_line = time.perf_counter() - start
+        lines = result.count('\n\n') + 1
+    else:
+        with open(os.devnull, 'w', encoding='utf-8') as out:
+            for line in iter_transcript_lines(url):
+                if first_line is None:
+                    first_line = time.perf_counter() - start
+                out.write(line + '\n\n')
+                lines += 1
+
+    return {
+        'mode': mode,
+        'lines': lines,
+        'time_to_first_line_s': round(first_line or 0.0, 4),
+        'total_s': round(time.perf_counter() - start, 4),
+        'peak_rss_delta_mb': round(max_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hours', type=float, default=4.0, help="Length of the synthetic captions")
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.url)))
+        return
+
+    from fixtures import FixtureServer, write_json3
+
+    fixture_dir = os.path.join(tempfile.gettempdir(), 'caption_fixtures')
+    name = f"captions_{args.hours:g}h.json3"
+    path = write_json3(os.path.join(fixture_dir, name), args.hours * 60)
+    print(f"Fixture: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    with FixtureServer(fixture_dir) as server:
+        for mode in MODES:
+            # Each mode runs in a fresh process so peak RSS is not shared between them
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--url', server.url(name)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>16}: first line {result['time_to_first_line_s']:7.3f}s  "
+                  f"total {result['total_s']:7.3f}s  peak RSS +{result['peak_rss_delta_mb']:6.1f} MB  "
+                  f"({result['lines']} lines)")
+
+
+if __name__ == '__main__':
+    main()
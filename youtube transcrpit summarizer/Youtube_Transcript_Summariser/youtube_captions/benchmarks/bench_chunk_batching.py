@@ -0,0 +1,98 @@
+"""
+Chunks/sec of one transcript summarized through the old thread-pool path, the
+length-bucketed batches of summarize_chunks and the shared batch scheduler.
+
+The thread-pool path runs one summarize_chunk() call per chunk on 4 threads, as
+summarization did before chunks were batched. bench_batching.py measures the
+scheduler across concurrent requests instead.
+
+Usage:
+    python benchmarks/bench_chunk_batching.py [transcript.txt] [--level standard] [--batch-size 4]
+        [--minutes 10] [--models stub|real] [--output chunk_batching.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+
+def run_thread_pool(summarizer, chunks, max_length, min_length):
+    """The previous implementation: one pipeline call per chunk across 4 threads."""
+    import summarize_transcript as st
+
+    with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as executor:
+        return list(executor.map(
+            lambda chunk: st.summarize_chunk(summarizer, chunk, max_length, min_length), chunks))
+
+
+def run_batched(summarizer, chunks, max_length, min_length, batch_size, scheduled):
+    import summarize_transcript as st
+
+    st.BATCH_SCHEDULER = scheduled
+    return st.summarize_chunks(summarizer, chunks, max_length, min_length, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('transcript', nargs='?', help="Transcript file (synthetic captions if omitted)")
+    parser.add_argument('--level', default='standard', choices=['brief', 'standard', 'detailed'])
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--minutes', type=float, default=10, help="Length of the synthetic transcript")
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    from model_registry import get_summarizer
+    import summarize_transcript as st
+
+    if args.models == 'stub':
+        from stub_models import stub_models
+
+        model = stub_models()['summarization']
+        for config in st.SUMMARY_CONFIGS.values():
+            config['model'] = model
+
+    if args.transcript:
+        with open(args.transcript, 'r', encoding='utf-8') as f:
+            text = st.clean_transcript(f.read())
+    else:
+        from fixtures import make_json3
+        from process_captions import caption_segments
+        from transcript import Transcript
+
+        text = Transcript.from_segments(caption_segments(make_json3(args.minutes)['events'])).plain_text()
+
+    config = st.SUMMARY_CONFIGS[args.level]
+    summarizer = get_summarizer(config['model'])
+    chunks = st.chunk_by_tokens(text, summarizer.tokenizer, config['chunk_tokens'], config['overlap_tokens'])
+    max_length, min_length = config['max_length'], config['min_length']
+    print(f"{len(chunks)} chunks, level={args.level}, model={config['model']}")
+    # Warm up so the first path does not pay for lazy initialization
+    st.summarize_chunk(summarizer, chunks[0], max_length, min_length)
+
+    results = []
+    for name, run in (
+        ('thread_pool', lambda: run_thread_pool(summarizer, chunks, max_length, min_length)),
+        ('batched', lambda: run_batched(summarizer, chunks, max_length, min_length, args.batch_size, False)),
+        ('scheduler', lambda: run_batched(summarizer, chunks, max_length, min_length, args.batch_size, True)),
+    ):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        results.append({'path': name, 'seconds': round(elapsed, 2), 'chunks_per_s': round(len(chunks) / elapsed, 2)})
+        print(f"{name:>12}: {elapsed:8.2f}s  {len(chunks) / elapsed:6.2f} chunks/sec")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'models': args.models, 'level': args.level,
+                       'chunks': len(chunks), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
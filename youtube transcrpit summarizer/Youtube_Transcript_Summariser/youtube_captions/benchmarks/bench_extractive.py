@@ -0,0 +1,119 @@
+"""
+Extractive pre-filter and 'instant' level: token reduction, latency savings and
+quality against the full abstractive summary on caption fixtures.
+
+For every fixture and level, the transcript is summarized as is and with the
+extractive pre-filter; the report gives model tokens before and after, both
+latencies and the ROUGE of the pre-filtered summary against the full one. The
+model-free 'instant' summary is scored against each level's full summary too.
+ROUGE is only meaningful with --models real; stub models measure speed.
+
+Usage:
+    python benchmarks/bench_extractive.py [--minutes 30 60 240] [--fixture captions.json3 ...]
+        [--levels brief standard] [--method textrank|tfidf] [--models stub|real] [--output extractive.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+os.environ.setdefault('NLTK_DOWNLOAD', '0')
+
+
+def load_fixtures(minutes: list, paths: list) -> dict:
+    from fixtures import make_json3
+    from process_captions import caption_segments
+    from transcript import Transcript
+
+    fixtures = {}
+    for length in minutes:
+        fixtures[f"{length:g}m"] = Transcript.from_segments(caption_segments(make_json3(length)['events']))
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            events = json.load(f).get('events', [])
+        fixtures[os.path.splitext(os.path.basename(path))[0]] = Transcript.from_segments(caption_segments(events))
+    return fixtures
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    output = function(*args)
+    return output, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='*', default=[30, 60, 240])
+    parser.add_argument('--fixture', nargs='*', default=[], help="Recorded JSON3 caption files")
+    parser.add_argument('--levels', nargs='*', default=['brief', 'standard'], choices=['brief', 'standard'])
+    parser.add_argument('--method', choices=['textrank', 'tfidf'])
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    from bench_backends import rouge
+    import extractive
+    from model_registry import get_summarizer
+    import summarize_transcript as st
+
+    if args.method:
+        extractive.EXTRACTIVE_METHOD = args.method
+    if args.models == 'stub':
+        from stub_models import stub_models
+
+        model = stub_models()['summarization']
+        for config in st.SUMMARY_CONFIGS.values():
+            config['model'] = model
+
+    fixtures = load_fixtures(args.minutes, args.fixture)
+    results = []
+    for name, transcript in fixtures.items():
+        text = transcript.plain_text()
+        instant, instant_s = timed(st.summarize_text, transcript, 'instant')
+        print(f"{name} ({len(text.split())} words)  instant: {instant_s * 1000:.0f} ms")
+        for level in args.levels:
+            config = st.SUMMARY_CONFIGS[level]
+            tokenizer = get_summarizer(config['model']).tokenizer
+            filtered, filter_s = timed(st.prefilter_text, text, tokenizer, config['prefilter_tokens'])
+            count = extractive.token_counter(tokenizer)
+            tokens_before, tokens_after = sum(count([text])), sum(count([filtered]))
+
+            st.EXTRACTIVE_PREFILTER = False
+            full, full_s = timed(st.summarize_text, transcript, level)
+            st.EXTRACTIVE_PREFILTER = True
+            prefiltered, prefiltered_s = timed(st.summarize_text, transcript, level)
+            st.EXTRACTIVE_PREFILTER = False
+
+            record = {
+                'fixture': name,
+                'level': level,
+                'method': extractive.EXTRACTIVE_METHOD,
+                'tokens_before': tokens_before,
+                'tokens_after': tokens_after,
+                'token_reduction': round(1 - tokens_after / tokens_before, 3) if tokens_before else 0,
+                'prefilter_s': round(filter_s, 3),
+                'full_s': round(full_s, 2),
+                'prefiltered_s': round(prefiltered_s, 2),
+                'speedup': round(full_s / prefiltered_s, 2) if prefiltered_s else None,
+                'rouge_prefiltered_vs_full': rouge(prefiltered, full),
+                'instant_s': round(instant_s, 3),
+                'rouge_instant_vs_full': rouge(instant, full),
+            }
+            results.append(record)
+            print(f"  {level:>8}: tokens {tokens_before} -> {tokens_after} (-{record['token_reduction']:.0%})  "
+                  f"{full_s:6.2f}s -> {prefiltered_s:6.2f}s ({record['speedup']}x)  "
+                  f"ROUGE-L prefiltered {record['rouge_prefiltered_vs_full']['rougeL']:.3f}  "
+                  f"instant {record['rouge_instant_vs_full']['rougeL']:.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'models': args.models, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
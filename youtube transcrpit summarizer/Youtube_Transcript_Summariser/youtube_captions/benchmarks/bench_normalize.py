@@ -0,0 +1,104 @@
+"""
+Auto-caption normalization: words and model tokens removed, sentences found and
+chunks produced in the summarizer's input, and the time per segment of the
+normalize and punctuate passes for each fixture size.
+
+Synthetic fixtures are generated for each --minutes length in both the plain and
+the rolling (two-line scrolling window) auto-caption style; recorded JSON3 files
+can be added with --fixture. Tokens are counted with the stub BART tokenizer
+unless --tokenizer names a model.
+
+Usage:
+    python benchmarks/bench_normalize.py [--minutes 10 60 240] [--fixture captions.json3 ...]
+        [--tokenizer facebook/bart-large-cnn] [--output normalize.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+
+def load_events(minutes: list, paths: list) -> dict:
+    from fixtures import make_json3
+
+    fixtures = {}
+    for length in minutes:
+        for rolling in (False, True):
+            name = f"{length:g}m{'-rolling' if rolling else ''}"
+            fixtures[name] = make_json3(length, rolling=rolling)['events']
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = json.load(f).get('events', [])
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='*', default=[10, 60, 240])
+    parser.add_argument('--fixture', nargs='*', default=[], help="Recorded JSON3 caption files")
+    parser.add_argument('--tokenizer', help="Tokenizer to count model tokens with (default: stub BART)")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+
+    from process_captions import NormalizeStats, caption_segments, normalize_segments, punctuate_segments
+    from summarize_transcript import SUMMARY_CONFIGS, chunk_by_tokens, split_sentences
+    from transcript import Transcript
+
+    if args.tokenizer:
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    else:
+        from stub_models import stub_models
+
+        tokenizer = AutoTokenizer.from_pretrained(stub_models()['summarization'])
+    config = SUMMARY_CONFIGS['standard']
+
+    def measure(transcript):
+        text = transcript.plain_text()
+        return {
+            'segments': len(transcript),
+            'words': len(text.split()),
+            'tokens': sum(len(ids) for ids in tokenizer([text], add_special_tokens=False)['input_ids']),
+            'sentences': len(split_sentences(text)),
+            'chunks': len(chunk_by_tokens(text, tokenizer, config['chunk_tokens'], config['overlap_tokens'])),
+        }
+
+    results = []
+    for name, events in load_events(args.minutes, args.fixture).items():
+        segments = list(caption_segments(events))
+        stats = NormalizeStats()
+        start = time.perf_counter()
+        # The summarizer's input: deduplicated captions with sentence ends restored
+        normalized = list(punctuate_segments(normalize_segments(segments, stats), stats))
+        seconds = time.perf_counter() - start
+
+        before = measure(Transcript.from_segments(segments))
+        after = measure(Transcript.from_segments(normalized))
+        record = {
+            'fixture': name,
+            'seconds': round(seconds, 4),
+            'us_per_segment': round(seconds / max(1, len(segments)) * 1e6, 2),
+            'before': before,
+            'after': after,
+            'token_reduction': round(1 - after['tokens'] / before['tokens'], 3) if before['tokens'] else 0,
+            'stats': stats.to_dict(),
+        }
+        results.append(record)
+        print(f"{name:>14}: {len(segments):6d} segments  {record['us_per_segment']:6.2f} us/segment  "
+              f"tokens {before['tokens']} -> {after['tokens']} ({-record['token_reduction']:+.0%})  "
+              f"sentences {before['sentences']} -> {after['sentences']}  "
+              f"chunks {before['chunks']} -> {after['chunks']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
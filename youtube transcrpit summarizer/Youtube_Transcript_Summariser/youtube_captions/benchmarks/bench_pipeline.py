@@ -0,0 +1,260 @@
+"""
+End-to-end offline benchmark of the fetch -> parse -> chunk -> summarize -> combine
+-> translate -> analytics path, with per-stage wall time, throughput and peak RSS.
+
+Captions are JSON3 fixtures served from a local HTTP server: synthetic ones of each
+--minutes length, or recorded ones passed with --fixture. Models are tiny random-weight
+stand-ins by default (see stub_models.py), so a full run takes minutes on a laptop;
+--models real uses the configured production models instead.
+
+Results are written as JSON; --compare prints the change against an earlier run.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--minutes 5 30 60 240] [--fixture captions.json3 ...]
+        [--models stub|real] [--level standard] [--language stub] [--output results.json]
+        [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+# The analytics stage must not try to download NLTK data
+os.environ.setdefault('NLTK_DOWNLOAD', '0')
+
+PAGE_MB = os.sysconf('SC_PAGE_SIZE') / (1024 * 1024) if hasattr(os, 'sysconf') else 0
+
+
+def rss_mb() -> float:
+    """Current resident set size; falls back to the lifetime peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_MB
+    except OSError:
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class PeakRss:
+    """Sample RSS on a background thread while a stage runs and keep the highest value."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start = rss_mb()
+        self.peak = self.start
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def measure(results: List[Dict[str, Any]], fixture: str, stage: str, run: Callable[[], Any],
+            count: Callable[[Any], int], unit: str) -> Any:
+    """Run one stage, append its timing record and return its output."""
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        output = run()
+        seconds = time.perf_counter() - start
+    items = count(output)
+    record = {
+        'fixture': fixture,
+        'stage': stage,
+        'seconds': round(seconds, 4),
+        'items': items,
+        'unit': unit,
+        'per_second': round(items / seconds, 2) if seconds else None,
+        'peak_rss_mb': round(rss.peak, 1),
+        'rss_delta_mb': round(rss.peak - rss.start, 1),
+    }
+    results.append(record)
+    print(f"  {stage:>17}: {seconds:8.3f}s  {record['per_second'] or 0:10.1f} {unit}/s  "
+          f"peak RSS {rss.peak:7.1f} MB (+{rss.peak - rss.start:.1f})")
+    return output
+
+
+def run_fixture(results: List[Dict[str, Any]], name: str, url: str, level: str, language: str,
+                batch_size: int) -> None:
+    from dashboard_analytics import CHARTS, DashboardAnalytics
+    from model_registry import get_summarizer
+    from process_captions import fetch_transcript
+    import summarize_transcript as st
+    import translation
+
+    config = st.SUMMARY_CONFIGS[level]
+    summarizer = get_summarizer(config['model'])
+
+    transcript = measure(results, name, 'process_captions', lambda: fetch_transcript(url), len, 'segments')
+    text = transcript.plain_text()
+    words = len(text.split())
+    chunks = measure(results, name, 'chunk_by_tokens',
+                     lambda: st.chunk_by_tokens(text, summarizer.tokenizer, config['chunk_tokens'],
+                                                config['overlap_tokens']),
+                     lambda _: words, 'words')
+    summaries = measure(results, name, 'summarize_chunks',
+                        lambda: [s for s in st.summarize_chunks(summarizer, chunks, config['max_length'],
+                                                                config['min_length'], batch_size) if s],
+                        lambda _: len(chunks), 'chunks')
+    summary = measure(results, name, 'combine_summaries',
+                      lambda: st.combine_summaries(summaries, config['max_length'], batch_size=batch_size,
+                                                   summarizer=summarizer),
+                      lambda _: len(summaries), 'summaries')
+    if language != 'english':
+        # Start every fixture cold, as a new summary would
+        translation.sentence_cache = translation.SentenceCache(translation.SENTENCE_CACHE_SIZE)
+        sentences = len(st.split_sentences(summary))
+        measure(results, name, 'translate', lambda: translation.translate_text(summary, language),
+                lambda _: sentences, 'sentences')
+
+    analytics = DashboardAnalytics()
+    measure(results, name, 'analytics', lambda: analytics.series(transcript), lambda _: words, 'words')
+    measure(results, name, 'analytics_charts',
+            lambda: [analytics.render_chart(transcript, chart) for chart in CHARTS], len, 'charts')
+
+
+def warm_up(models: Dict[str, str], language: str) -> None:
+    """Load the models and the lazily imported analytics stack, so fixtures measure steady state."""
+    from dashboard_analytics import CHARTS, DashboardAnalytics
+    from model_registry import get_summarizer
+    from transcript import Transcript
+    import translation
+
+    get_summarizer(models['summarization'])
+    if language != 'english':
+        translation.translate_text('The model talks about data.', language)
+    transcript = Transcript.from_segments((i * 2000, 2000, 'we can see the model here') for i in range(30))
+    analytics = DashboardAnalytics()
+    analytics.series(transcript)
+    for chart in CHARTS:
+        analytics.render_chart(transcript, chart)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], previous_path: str) -> None:
+    """Print the per-stage time ratio against an earlier results file."""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {(r['fixture'], r['stage']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path} (time ratio, < 1 is faster):")
+    for record in current['results']:
+        before = previous.get((record['fixture'], record['stage']))
+        if before and before['seconds']:
+            ratio = record['seconds'] / before['seconds']
+            rss = record['peak_rss_mb'] - before['peak_rss_mb']
+            print(f"  {record['fixture']:>12} {record['stage']:>17}: {ratio:6.2f}x  peak RSS {rss:+7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, nargs='*', default=[5, 30, 60, 240],
+                        help="Lengths of the synthetic caption fixtures")
+    parser.add_argument('--fixture', nargs='*', default=[], help="Recorded JSON3 caption files")
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--level', default='standard', choices=['brief', 'standard', 'detailed'])
+    parser.add_argument('--language', help="Translation target (default: 'stub' for stub models, else hindi)")
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--output', default='bench_pipeline.json')
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    from fixtures import FixtureServer, write_json3
+    import summarize_transcript as st
+    import translation
+
+    language = args.language or ('stub' if args.models == 'stub' else 'hindi')
+    models = {'summarization': st.SUMMARY_CONFIGS[args.level]['model']}
+    if args.models == 'stub':
+        from stub_models import stub_models
+
+        paths = stub_models()
+        for config in st.SUMMARY_CONFIGS.values():
+            config['model'] = paths['summarization']
+        translation.register_language('stub', translation.TranslationRoute('marian', paths['translation']))
+        models['summarization'] = paths['summarization']
+    if language != 'english':
+        models['translation'] = translation.LANGUAGE_ROUTES[language].model_name
+
+    # Every fixture is served from one directory, under a stable name used in the results
+    fixture_dir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    fixtures = []
+    for minutes in args.minutes:
+        name = f"{minutes:g}m"
+        write_json3(os.path.join(fixture_dir, name + '.json3'), minutes)
+        fixtures.append(name)
+    for path in args.fixture:
+        name = os.path.splitext(os.path.basename(path))[0]
+        shutil.copy(path, os.path.join(fixture_dir, name + '.json3'))
+        fixtures.append(name)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        with FixtureServer(fixture_dir, keep_alive=True) as server:
+            measure(results, 'all', 'warmup', lambda: warm_up(models, language), lambda _: 1, 'runs')
+            for name in fixtures:
+                size_mb = os.path.getsize(os.path.join(fixture_dir, name + '.json3')) / 1e6
+                print(f"{name} ({size_mb:.1f} MB captions)")
+                run_fixture(results, name, server.url(name + '.json3'), args.level, language, args.batch_size)
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    import torch
+    import transformers
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch': torch.__version__,
+            'transformers': transformers.__version__,
+            'models': args.models,
+            'model_names': models,
+            'level': args.level,
+            'language': language,
+            'batch_size': args.batch_size,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
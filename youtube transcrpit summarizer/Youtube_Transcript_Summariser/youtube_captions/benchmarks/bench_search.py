@@ -0,0 +1,131 @@
+"""
+Transcript search index: batched indexing throughput and query latency.
+
+Builds a fresh index of --videos synthetic transcripts whose words follow a Zipf
+distribution over a --vocabulary sized lexicon, so rare, common and very common
+terms behave like real speech. Indexing goes through SearchIndex.add() and the
+batched flush; queries are then timed by kind: rare terms, common terms, two-word
+AND queries, phrases taken from the corpus, prefixes and single-video searches.
+
+Usage:
+    python benchmarks/bench_search.py [--videos 10000] [--minutes 10] [--vocabulary 20000]
+        [--queries 50] [--path /tmp/search.sqlite3] [--output search.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+SYLLABLES = ['ka', 'to', 'ri', 'men', 'sa', 'lo', 'dex', 'vi', 'ran', 'po', 'tel', 'mu', 'gor', 'ni', 'ba', 'quin']
+
+
+def make_lexicon(size: int, rng: random.Random) -> list:
+    words, seen = [], set()
+    while len(words) < size:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def make_transcript(lexicon: list, weights: list, minutes: float, rng: random.Random):
+    from transcript import Transcript
+
+    segments, t = [], 0
+    while t < minutes * 60000:
+        duration = rng.randint(1500, 4500)
+        segments.append((t, duration, ' '.join(rng.choices(lexicon, cum_weights=weights, k=rng.randint(4, 12)))))
+        t += duration
+    return Transcript.from_segments(segments)
+
+
+def percentiles(values: list) -> dict:
+    values = sorted(values)
+    return {'p50_ms': round(statistics.median(values) * 1000, 2),
+            'p95_ms': round(values[int(len(values) * 0.95) - 1] * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--videos', type=int, default=10000)
+    parser.add_argument('--minutes', type=float, default=10, help="Length of each synthetic transcript")
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=50, help="Queries timed per kind")
+    parser.add_argument('--path', help="Index file (default: a temporary file)")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    from search_index import SearchIndex
+
+    rng = random.Random(0)
+    lexicon = make_lexicon(args.vocabulary, rng)
+    # Zipf: the word of rank r is used in proportion to 1 / r
+    weights, total = [], 0.0
+    for rank in range(1, len(lexicon) + 1):
+        total += 1 / rank
+        weights.append(total)
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), 'search.sqlite3')
+    index = SearchIndex(path)
+    start = time.perf_counter()
+    generate_s = 0.0
+    samples = []
+    for i in range(args.videos):
+        generated = time.perf_counter()
+        transcript = make_transcript(lexicon, weights, args.minutes, rng)
+        generate_s += time.perf_counter() - generated
+        index.add(f"video{i:06d}", f"Synthetic video {i}", transcript)
+        if i % max(1, args.videos // 200) == 0:
+            samples.append(transcript.segment_text(rng.randrange(len(transcript))).split())
+    index.flush()
+    index_s = time.perf_counter() - start - generate_s
+    stats = index.stats()
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"indexed {stats['videos']} videos, {stats['passages']} passages in {index_s:.1f}s "
+          f"({stats['videos'] / index_s:.0f} videos/s), {size_mb:.0f} MB")
+
+    queries = {
+        'rare term': [rng.choice(lexicon[len(lexicon) // 2:]) for _ in range(args.queries)],
+        'common term': [rng.choice(lexicon[:20]) for _ in range(args.queries)],
+        'two terms': [f"{rng.choice(lexicon[20:2000])} {rng.choice(lexicon[20:2000])}" for _ in range(args.queries)],
+        'phrase': ['"' + ' '.join(words[:3]) + '"' for words in rng.choices(samples, k=args.queries)],
+        'prefix': [rng.choice(lexicon[100:])[:4] + '*' for _ in range(args.queries)],
+    }
+    results = {}
+    for kind, texts in queries.items():
+        timings, found = [], 0
+        for text in texts:
+            started = time.perf_counter()
+            found += bool(index.search(text, 20))
+            timings.append(time.perf_counter() - started)
+        results[kind] = dict(percentiles(timings), found=round(found / len(texts), 2))
+    timings = []
+    for _ in range(args.queries):
+        started = time.perf_counter()
+        index.search(rng.choice(lexicon[:2000]), 20, video_id=f"video{rng.randrange(args.videos):06d}")
+        timings.append(time.perf_counter() - started)
+    results['one video'] = percentiles(timings)
+    for kind, result in results.items():
+        print(f"{kind:>12}: p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms  "
+              f"max {result['max_ms']:7.2f} ms" + (f"  hits {result['found']:.0%}" if 'found' in result else ''))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'videos': stats['videos'], 'passages': stats['passages'], 'index_s': round(index_s, 1),
+                       'index_mb': round(size_mb, 1), 'queries': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Property check for chunk_by_tokens on randomly generated transcripts:
+every chunk fits the model input, so no input tokens are truncated, and
+every word of the transcript lands in at least one chunk, in order.
+
+Usage:
+    python benchmarks/check_chunking.py [--tokenizer facebook/bart-large-cnn] [--trials 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformers import AutoTokenizer
+
+from model_registry import SUMMARIZATION_MODEL
+from summarize_transcript import SUMMARY_CONFIGS, chunk_by_tokens
+
+WORDS = ("the model video speaker talks about data training results people time first because "
+         "really important example question system going know think next 12,345 covid-19 e-mail "
+         "Supercalifragilisticexpialidocious antidisestablishmentarianism".split())
+
+
+def random_transcript(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(0, 300)):
+        # Mostly normal sentences, with the odd run-on caption far over the token limit
+        length = rng.randint(1, 40) if rng.random() > 0.03 else rng.randint(800, 3000)
+        words = [rng.choice(WORDS) for _ in range(length)]
+        sentences.append(' '.join(words) + rng.choice(['.', '?', '!', '']))
+    return ' '.join(sentences)
+
+
+def check(tokenizer, text: str, chunk_tokens: int, overlap_tokens: int) -> None:
+    chunks = chunk_by_tokens(text, tokenizer, chunk_tokens, overlap_tokens)
+
+    # No chunk is longer than the model accepts, so truncation never drops tokens
+    for ids in tokenizer(chunks)['input_ids'] if chunks else []:
+        assert len(ids) <= tokenizer.model_max_length, f"chunk of {len(ids)} tokens"
+
+    # Chunks are contiguous runs of the input words that only overlap their predecessor,
+    # and together they cover every word
+    words = text.split()
+    previous_start, covered = -1, 0
+    for chunk in chunks:
+        chunk_words = chunk.split()
+        start = next((s for s in range(previous_start + 1, covered + 1)
+                      if words[s:s + len(chunk_words)] == chunk_words), None)
+        assert start is not None, "chunk is not a contiguous continuation of the input"
+        previous_start, covered = start, start + len(chunk_words)
+    assert covered == len(words), f"{len(words) - covered} words missing from chunks"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokenizer', default=SUMMARIZATION_MODEL)
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer, use_fast=True)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    for trial in range(args.trials):
+        config = SUMMARY_CONFIGS[rng.choice(list(SUMMARY_CONFIGS))]
+        check(tokenizer, random_transcript(rng), config['chunk_tokens'], config['overlap_tokens'])
+    print(f"{args.trials} transcripts chunked without truncation in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Synthetic JSON3 caption fixtures and a local HTTP server to serve them.
+
+The generated documents mimic YouTube auto-captions: window setup events,
+word-level segments with offsets, newline-only append events and occasional
+non-speech markers. Rolling documents also repeat the previous line at the start
+of each event and keep each event on screen past the next one's start, as the
+two-line scrolling auto-caption window does.
+"""
+import json
+import os
+import random
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the model video speaker talks about data training results people time first "
+         "because really important example question system going know think next "
+         "we can see this is what you want to look at here right so".split())
+MARKERS = ['[Music]', '[Applause]', '[Laughter]']
+
+
+def make_json3(minutes: float, seed: int = 0, rolling: bool = False) -> dict:
+    """Build a JSON3 document covering roughly `minutes` of speech."""
+    rng = random.Random(seed)
+    previous = ''
+    events = [{'tStartMs': 0, 'dDurationMs': int(minutes * 60000), 'id': 1,
+               'wpWinPosId': 1, 'wsWinStyleId': 1}]
+    t = 0
+    end = int(minutes * 60000)
+    while t < end:
+        duration = rng.randint(1500, 4500)
+        if rng.random() < 0.02:
+            segs = [{'utf8': rng.choice(MARKERS)}]
+        else:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(4, 12))]
+            segs = [{'utf8': words[0], 'acAsrConf': 0}]
+            offset = 0
+            for word in words[1:]:
+                offset += rng.randint(120, 400)
+                segs.append({'utf8': ' ' + word, 'tOffsetMs': offset, 'acAsrConf': 0})
+            if rolling:
+                if previous:
+                    segs.insert(0, {'utf8': previous + '\n'})
+                previous = ' '.join(words)
+        events.append({'tStartMs': t, 'dDurationMs': duration * 2 if rolling else duration, 'wWinId': 1,
+                       'segs': segs})
+        events.append({'tStartMs': t + duration, 'dDurationMs': 40, 'wWinId': 1,
+                       'aAppend': 1, 'segs': [{'utf8': '\n'}]})
+        t += duration
+    return {
+        'wireMagic': 'pb3',
+        'pens': [{}],
+        'wsWinStyles': [{}, {'mhModeHint': 2, 'juJustifCode': 0, 'sdScrollDir': 3}],
+        'wpWinPositions': [{}, {'apPoint': 6, 'ahHorPos': 20, 'avVerPos': 100, 'rcRows': 2, 'ccCols': 40}],
+        'events': events,
+    }
+
+
+def write_json3(path: str, minutes: float, seed: int = 0) -> str:
+    """Write a fixture to `path` unless it already exists and return the path."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_json3(minutes, seed), f)
+    return path
+
+
+class FixtureServer:
+    """
+    Serve a directory over HTTP on localhost from a background thread.
+
+    `latency` delays each response like a remote host would, `connect_latency` delays
+    each new connection like a TCP and TLS handshake would, `fail_every` answers
+    every n-th request with a 503, and `keep_alive` serves HTTP/1.1 so clients can
+    reuse connections. `connections` counts the TCP connections accepted.
+    """
+
+    def __init__(self, directory: str, latency: float = 0.0, connect_latency: float = 0.0,
+                 fail_every: int = 0, keep_alive: bool = False):
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = partial(_QuietHandler, self, latency, connect_latency, fail_every, keep_alive, directory=directory)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _count(self, name: str) -> int:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            return getattr(self, name)
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/{name}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def __init__(self, server_state, latency, connect_latency, fail_every, keep_alive, *args, **kwargs):
+        self.server_state = server_state
+        self.latency = latency
+        self.fail_every = fail_every
+        if keep_alive:
+            self.protocol_version = 'HTTP/1.1'
+        server_state._count('connections')
+        if connect_latency:
+            time.sleep(connect_latency)
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        count = self.server_state._count('requests')
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and count % self.fail_every == 0:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,210 @@
+"""
+Load test the gunicorn production server: requests/sec, latency and memory for
+each worker count, with and without preloading the models in the master.
+
+Transcripts for synthetic video ids are seeded into a temporary result cache, so
+/api/process runs the real summarization path without network access. Memory is
+reported as RSS and PSS summed over the master and its workers; PSS splits shared
+pages between the processes sharing them, so it is the honest total when
+workers share copy-on-write model weights.
+
+Usage:
+    python benchmarks/load_test.py [--workers 1 2 4] [--requests 40] [--concurrency 8]
+        [--models stub|real] [--length standard] [--no-preload] [--output load.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_tree(pid: int) -> list:
+    """The pid and all its descendants (Linux /proc)."""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS and PSS summed over a process tree, from /proc/<pid>/smaps_rollup."""
+    totals = {'rss_mb': 0.0, 'pss_mb': 0.0, 'processes': 0}
+    for child in process_tree(pid):
+        try:
+            with open(f'/proc/{child}/smaps_rollup') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        totals['rss_mb'] += int(fields['Rss'].split()[0]) / 1024
+        totals['pss_mb'] += int(fields['Pss'].split()[0]) / 1024
+        totals['processes'] += 1
+    return {key: round(value, 1) for key, value in totals.items()}
+
+
+def seed_transcripts(count: int, minutes: float, prefix: str) -> list:
+    """Cache a transcript under `count` fake 11-character video ids and return their URLs."""
+    from fixtures import make_json3
+    from process_captions import caption_segments
+    from result_cache import result_cache
+    from transcript import Transcript
+
+    transcript = Transcript.from_segments(caption_segments(make_json3(minutes)['events']))
+    urls = []
+    for i in range(count):
+        video_id = f"{prefix}{i:0{11 - len(prefix)}d}"
+        result_cache.set('transcript', video_id, transcript.to_dict())
+        result_cache.set('title', video_id, f"Load test {i}")
+        urls.append(f"https://youtu.be/{video_id}")
+    return urls
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 300) -> None:
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited with {server.returncode}")
+        try:
+            if requests.get(base_url + '/api/models/stats', timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise SystemExit("gunicorn did not become ready")
+
+
+def run(workers: int, preload: bool, urls: list, args, env: dict) -> dict:
+    import requests
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server_env = dict(env, WEB_WORKERS=str(workers), WEB_PRELOAD='1' if preload else '0',
+                      BIND=f"127.0.0.1:{port}")
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+                             cwd=APP_DIR, env=server_env, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        wait_ready(base_url, server)
+        # Every worker loads on its first request without preload; warm them all before measuring
+        with ThreadPoolExecutor(max_workers=workers * 2) as executor:
+            list(executor.map(lambda _: requests.get(base_url + '/api/models/stats', timeout=600),
+                              range(workers * 4)))
+        startup_s = time.perf_counter() - start
+        idle = memory_mb(server.pid)
+
+        peak = dict(idle)
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.2):
+                current = memory_mb(server.pid)
+                for key in ('rss_mb', 'pss_mb'):
+                    peak[key] = max(peak[key], current[key])
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        latencies, errors = [], 0
+
+        def call(url):
+            t = time.perf_counter()
+            response = requests.post(base_url + '/api/process', json={'url': url, 'length': args.length},
+                                     timeout=600)
+            if response.status_code != 200 and args.verbose:
+                print(response.status_code, response.text[:300])
+            return response.status_code, time.perf_counter() - t
+
+        load_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for status, seconds in executor.map(call, urls):
+                latencies.append(seconds)
+                errors += status != 200
+        elapsed = time.perf_counter() - load_start
+        done.set()
+        sampler.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies.sort()
+    return {
+        'workers': workers,
+        'preload': preload,
+        'startup_s': round(startup_s, 2),
+        'requests': len(urls),
+        'errors': errors,
+        'requests_per_s': round(len(urls) / elapsed, 3),
+        'latency_p50_s': round(statistics.median(latencies), 3),
+        'latency_p95_s': round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        'idle_memory': idle,
+        'peak_memory': peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=40, help="Requests per worker count")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--minutes', type=float, default=10, help="Length of each seeded transcript")
+    parser.add_argument('--length', default='standard', choices=['brief', 'standard', 'detailed'])
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub')
+    parser.add_argument('--no-preload', action='store_true', help="Also measure each worker count without preload")
+    parser.add_argument('--output', help="Write results as JSON")
+    parser.add_argument('--verbose', action='store_true', help="Show gunicorn logs")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='load_test_')
+    env = dict(os.environ, RESULT_CACHE_PATH=os.path.join(cache_dir, 'results.sqlite3'), NLTK_DOWNLOAD='0')
+    os.environ['RESULT_CACHE_PATH'] = env['RESULT_CACHE_PATH']
+    if args.models == 'stub':
+        from stub_models import stub_models
+
+        model = stub_models()['summarization']
+        env.update(SUMMARIZATION_MODEL=model, BRIEF_SUMMARIZATION_MODEL=model)
+
+    results = []
+    for workers in args.workers:
+        for preload in ([True, False] if args.no_preload else [True]):
+            # Fresh video ids per run, so no run is served from an earlier run's summaries
+            urls = seed_transcripts(args.requests, args.minutes, f"w{workers}{'p' if preload else 'n'}")
+            result = run(workers, preload, urls, args, env)
+            results.append(result)
+            print(f"workers={workers} preload={str(preload):5}  {result['requests_per_s']:7.2f} req/s  "
+                  f"p50 {result['latency_p50_s']:6.2f}s  p95 {result['latency_p95_s']:6.2f}s  "
+                  f"errors {result['errors']}  idle PSS {result['idle_memory']['pss_mb']:7.1f} MB  "
+                  f"peak PSS {result['peak_memory']['pss_mb']:7.1f} MB  "
+                  f"(RSS {result['peak_memory']['rss_mb']:7.1f} MB)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'models': args.models, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Startup profile: per-module import times (from python -X importtime) and the
+time to serve a first request, measured in a fresh interpreter.
+
+Usage:
+    python benchmarks/profile_startup.py [--module app] [--top 20] [--path /]
+    python benchmarks/profile_startup.py --module summarize_transcript
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+# Runs in the child: import the module, then serve one request if it is the Flask app
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__({module!r})
+imported = time.perf_counter()
+first_request = None
+app = getattr(module, 'app', None)
+if app is not None and hasattr(app, 'test_client'):
+    app.test_client().get({path!r})
+    first_request = time.perf_counter() - start
+print(json.dumps({{'import_s': imported - start, 'first_request_s': first_request}}))
+"""
+
+
+def profile(module: str, path: str) -> dict:
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD.format(module=module, path=path)],
+                          cwd=APP_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1] if proc.stderr else 'import failed')
+
+    # Self time summed per top-level package; cumulative time of each module imported directly by the target
+    packages = defaultdict(int)
+    direct = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        packages[name.split('.')[0]] += self_us
+        if indent == 3:
+            direct[name] = cumulative_us
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['packages_ms'] = {name: round(us / 1000, 1) for name, us in packages.items()}
+    result['direct_imports_ms'] = {name: round(us / 1000, 1) for name, us in direct.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='app', help="Module to import (default: the web app)")
+    parser.add_argument('--path', default='/', help="Path requested from the Flask app after import")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', help="Write the full profile as JSON")
+    args = parser.parse_args()
+
+    result = profile(args.module, args.path)
+    print(f"import {args.module}: {result['import_s'] * 1000:.0f} ms")
+    if result['first_request_s'] is not None:
+        print(f"first request to {args.path}: {result['first_request_s'] * 1000:.0f} ms after start")
+
+    print(f"\nSlowest imports of {args.module} (cumulative):")
+    for name, ms in sorted(result['direct_imports_ms'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:9.1f} ms  {name}")
+    print("\nSlowest packages (self time):")
+    for name, ms in sorted(result['packages_ms'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:9.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
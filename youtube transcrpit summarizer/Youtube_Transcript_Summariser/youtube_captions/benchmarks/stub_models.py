@@ -0,0 +1,100 @@
+"""
+Tiny random-weight stand-ins for the summarization and translation models.
+
+They share the architectures and tokenizer types of facebook/bart-large-cnn and
+the Helsinki-NLP Marian models, so every code path runs offline in seconds, but
+their output is noise: use them for speed and memory runs, never for quality.
+Tokenizers are trained on the synthetic caption vocabulary from fixtures.py.
+"""
+import io
+import json
+import os
+import random
+import tempfile
+
+from fixtures import MARKERS, WORDS
+
+STUB_DIR = os.path.join(tempfile.gettempdir(), 'stub_models')
+
+# Small enough to build in seconds, big enough that batching and generation lengths matter
+MODEL_DIMS = dict(d_model=64, encoder_layers=2, decoder_layers=2, encoder_attention_heads=4,
+                  decoder_attention_heads=4, encoder_ffn_dim=128, decoder_ffn_dim=128,
+                  max_position_embeddings=1024)
+
+
+def _corpus(lines: int = 2000, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(lines):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 24))]
+        yield ' '.join(words).capitalize() + rng.choice('.?!,') + ' ' + rng.choice(MARKERS)
+
+
+def build_bart(path: str) -> str:
+    """Write a tiny BART summarizer with a byte-level BPE tokenizer to `path`."""
+    import torch
+    from tokenizers import ByteLevelBPETokenizer, processors
+    from transformers import BartConfig, BartForConditionalGeneration, GenerationConfig, PreTrainedTokenizerFast
+
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(_corpus(), vocab_size=512, special_tokens=['<s>', '<pad>', '</s>', '<unk>'],
+                            show_progress=False)
+    bpe.post_processor = processors.RobertaProcessing(('</s>', 2), ('<s>', 0), trim_offsets=True)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe._tokenizer, bos_token='<s>', eos_token='</s>',
+                                        pad_token='<pad>', unk_token='<unk>', model_max_length=1024)
+
+    torch.manual_seed(0)
+    ids = dict(pad_token_id=1, bos_token_id=0, eos_token_id=2, decoder_start_token_id=2)
+    model = BartForConditionalGeneration(BartConfig(vocab_size=len(tokenizer), **ids, **MODEL_DIMS))
+    # Same decoding settings as bart-large-cnn
+    model.generation_config = GenerationConfig(num_beams=4, no_repeat_ngram_size=3, length_penalty=2.0,
+                                               early_stopping=True, forced_bos_token_id=0,
+                                               forced_eos_token_id=2, **ids)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def build_marian(path: str) -> str:
+    """Write a tiny Marian translator with a SentencePiece tokenizer to `path`."""
+    import sentencepiece as spm
+    import torch
+    from transformers import GenerationConfig, MarianConfig, MarianMTModel, MarianTokenizer
+
+    os.makedirs(path, exist_ok=True)
+    model_proto = io.BytesIO()
+    spm.SentencePieceTrainer.train(sentence_iterator=_corpus(), model_writer=model_proto, vocab_size=128,
+                                   character_coverage=1.0, hard_vocab_limit=False, minloglevel=2)
+    spm_path = os.path.join(path, 'source.spm')
+    with open(spm_path, 'wb') as f:
+        f.write(model_proto.getvalue())
+    with open(os.path.join(path, 'target.spm'), 'wb') as f:
+        f.write(model_proto.getvalue())
+
+    processor = spm.SentencePieceProcessor(model_file=spm_path)
+    pieces = [processor.id_to_piece(i) for i in range(processor.get_piece_size())]
+    vocab = {'</s>': 0, '<unk>': 1}
+    for piece in pieces:
+        vocab.setdefault(piece, len(vocab))
+    vocab['<pad>'] = len(vocab)
+    with open(os.path.join(path, 'vocab.json'), 'w', encoding='utf-8') as f:
+        json.dump(vocab, f)
+    tokenizer = MarianTokenizer(spm_path, os.path.join(path, 'target.spm'), os.path.join(path, 'vocab.json'),
+                                source_lang='en', target_lang='xx', model_max_length=512)
+
+    torch.manual_seed(0)
+    pad = vocab['<pad>']
+    ids = dict(pad_token_id=pad, eos_token_id=0, decoder_start_token_id=pad)
+    model = MarianMTModel(MarianConfig(vocab_size=len(vocab), **ids, **{**MODEL_DIMS, 'max_position_embeddings': 512}))
+    model.generation_config = GenerationConfig(num_beams=4, bad_words_ids=[[pad]], max_length=512, **ids)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def stub_models(directory: str = STUB_DIR) -> dict:
+    """Build the stand-ins once and return their paths as {'summarization': ..., 'translation': ...}."""
+    paths = {'summarization': os.path.join(directory, 'bart'), 'translation': os.path.join(directory, 'marian')}
+    for kind, build in (('summarization', build_bart), ('translation', build_marian)):
+        if not os.path.exists(os.path.join(paths[kind], 'config.json')):
+            build(paths[kind])
+    return paths
@@ -0,0 +1,227 @@
+"""
+Summarize every video of playlists or channels.
+
+Videos are listed with yt-dlp flat extraction, captions are fetched concurrently
+through the shared pooled caption client, and transcripts are summarized in batches across
+videos so the model always sees full batches. Each result is appended to a JSONL
+file as soon as it is ready, and finished video ids are recorded in a checkpoint
+file so an interrupted run resumes where it stopped.
+
+Usage:
+    python bulk.py <playlist_or_channel_url> [...] [--level standard] [--language english]
+        [--output results.jsonl] [--checkpoint results.jsonl.done] [--workers 8]
+        [--batch-videos 8] [--limit N]
+"""
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from caption_client import get_caption_client
+from deadline import Deadline
+from get_youtube_captions_combined import expand_playlist
+from metrics import configure_logging, log_event
+from pipeline import PipelineError, get_transcript, summary_cache_key, translate_cached
+from result_cache import cache_key, result_cache
+from summarize_transcript import DEFAULT_BATCH_SIZE, ProgressCallback, summarize_many
+
+# Concurrent caption fetches; keep CAPTION_POOL_SIZE at least this large
+BULK_FETCH_WORKERS = int(os.environ.get('BULK_FETCH_WORKERS', '8'))
+# Videos whose chunks are summarized together in one batched pass
+BULK_BATCH_VIDEOS = int(os.environ.get('BULK_BATCH_VIDEOS', '8'))
+BULK_OUTPUT_DIR = os.environ.get(
+    'BULK_OUTPUT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'bulk')
+)
+
+
+def load_checkpoint(path: Optional[str]) -> Set[str]:
+    """Video ids already finished by an earlier run."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def drop_records(output: str, video_ids: Set[str]) -> int:
+    """
+    Remove the records of `video_ids` from the JSONL file `output` and return how many went.
+
+    Run before retrying videos, so a video that failed before ends up with one record.
+    A line cut short by an interrupted run is dropped as well.
+    """
+    if not video_ids or not os.path.exists(output):
+        return 0
+    dropped = 0
+    temporary = output + '.tmp'
+    with open(output, 'r', encoding='utf-8') as src, open(temporary, 'w', encoding='utf-8') as dst:
+        for line in src:
+            try:
+                video_id = json.loads(line).get('video_id')
+            except ValueError:
+                video_id = None
+            if video_id is None or video_id in video_ids:
+                dropped += 1
+                continue
+            dst.write(line)
+    os.replace(temporary, output)
+    return dropped
+
+
+def iter_bulk_results(videos: Iterable[Dict[str, str]], summary_length: str = 'standard',
+                      language: str = 'english', workers: int = BULK_FETCH_WORKERS,
+                      batch_videos: int = BULK_BATCH_VIDEOS, batch_size: int = DEFAULT_BATCH_SIZE,
+                      progress: Optional[ProgressCallback] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one result per video: its id, url, title and summary, or an error.
+
+    Caption fetches keep running on the pool while a batch of fetched transcripts is
+    being summarized, and cached summaries skip the model entirely.
+    """
+    videos = list(videos)
+    client = get_caption_client()
+    done = 0
+
+    def summarize_batch(batch: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal done
+        misses = [item for item in batch if item['summary'] is None]
+        if misses:
+            summaries = summarize_many([item['transcript'] for item in misses], summary_length, batch_size)
+            for item, summary in zip(misses, summaries):
+                item['summary'] = summary
+                if summary:
+                    result_cache.set('summary', item['summary_key'], summary)
+        for item in batch:
+            record = {'video_id': item['id'], 'url': item['url'], 'title': item['title']}
+            if item['summary']:
+                record['summary'] = item['summary']
+                if language != 'english':
+                    record['summary'] = translate_cached(item['summary'], language)
+                    record['language'] = language
+            else:
+                record['error'] = 'No valid text to summarize'
+            done += 1
+            if progress:
+                progress('videos', done, len(videos))
+            yield record
+
+    def fetch(video: Dict[str, str]) -> Dict[str, Any]:
+        result = get_transcript(video['url'], video['id'], client)
+        transcript = result['transcript']
+        summary_key = summary_cache_key(video['id'], transcript, summary_length)
+        return {**video, 'title': result['title'] or video.get('title'), 'transcript': transcript,
+                'summary_key': summary_key, 'summary': result_cache.get('summary', summary_key)}
+
+    batch: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-fetch') as executor:
+        pending = {executor.submit(fetch, video): video for video in videos}
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    video = pending.pop(future)
+                    try:
+                        batch.append(future.result())
+                    except Exception as e:
+                        done += 1
+                        if progress:
+                            progress('videos', done, len(videos))
+                        yield {'video_id': video['id'], 'url': video['url'], 'title': video.get('title'),
+                               'error': str(e),
+                               'status_code': e.status_code if isinstance(e, PipelineError) else 500}
+                if len(batch) >= batch_videos or (batch and not pending):
+                    yield from summarize_batch(batch)
+                    batch = []
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def run_bulk(urls: List[str], output: str, checkpoint: Optional[str] = None, summary_length: str = 'standard',
+             language: str = 'english', workers: int = BULK_FETCH_WORKERS, batch_videos: int = BULK_BATCH_VIDEOS,
+             limit: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+             deadline: Optional[Deadline] = None) -> Dict[str, int]:
+    """
+    Summarize every video behind `urls` into the JSONL file `output`, resuming from `checkpoint`.
+
+    Failed videos are written with an `error` field and retried on the next run. A
+    cancelled `deadline` stops the run after the current result, which a resubmitted
+    run resumes from.
+    """
+    deadline = deadline or Deadline()
+    checkpoint = checkpoint or output + '.done'
+    finished = load_checkpoint(checkpoint)
+    videos, seen, skipped = [], set(), 0
+    for url in urls:
+        for video in expand_playlist(url, limit):
+            if video['id'] in seen:
+                continue
+            seen.add(video['id'])
+            if video['id'] in finished:
+                skipped += 1
+            else:
+                videos.append(video)
+    log_event('bulk_start', output=output, videos=len(videos), skipped=skipped)
+    # Videos without a checkpoint may have a failed or unfinished record from an earlier run
+    drop_records(output, {video['id'] for video in videos})
+
+    counts = {'videos': len(videos), 'skipped': skipped, 'succeeded': 0, 'failed': 0}
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'a', encoding='utf-8') as out, open(checkpoint, 'a', encoding='utf-8') as done:
+        for record in iter_bulk_results(videos, summary_length, language, workers, batch_videos,
+                                        progress=progress):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            if 'error' in record:
+                counts['failed'] += 1
+            else:
+                # Only checkpoint once the result is safely in the output file
+                done.write(record['video_id'] + '\n')
+                done.flush()
+                counts['succeeded'] += 1
+            deadline.check('bulk')
+    log_event('bulk_done', output=output, **counts)
+    return counts
+
+
+def bulk_job_key(urls: List[str], summary_length: str, language: str, limit: Optional[int]) -> str:
+    """Key of a bulk job submitted through the API; identical requests share it."""
+    return cache_key('bulk', sorted(urls), summary_length, language, limit)
+
+
+def bulk_output_path(key: str) -> str:
+    """JSONL output of a bulk job submitted through the API."""
+    return os.path.join(BULK_OUTPUT_DIR, key + '.jsonl')
+
+
+def run_bulk_job(urls: List[str], summary_length: str, language: str,
+                 limit: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+                 deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """JobManager runner for /api/bulk; resubmitting the same request resumes its checkpoint."""
+    output = bulk_output_path(bulk_job_key(urls, summary_length, language, limit))
+    counts = run_bulk(urls, output, None, summary_length, language, limit=limit, progress=progress,
+                      deadline=deadline)
+    return {'counts': counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='+', help="Playlist, channel or video URLs")
+    parser.add_argument('--level', default='standard', choices=['instant', 'brief', 'standard', 'detailed'])
+    parser.add_argument('--language', default='english')
+    parser.add_argument('--output', default='bulk_summaries.jsonl')
+    parser.add_argument('--checkpoint', help="Finished video ids (default: <output>.done)")
+    parser.add_argument('--workers', type=int, default=BULK_FETCH_WORKERS)
+    parser.add_argument('--batch-videos', type=int, default=BULK_BATCH_VIDEOS)
+    parser.add_argument('--limit', type=int, help="Videos per playlist or channel")
+    args = parser.parse_args()
+
+    # run_bulk reports progress and the final counts as bulk_start and bulk_done events
+    configure_logging()
+    run_bulk(args.urls, args.output, args.checkpoint, args.level, args.language.lower(),
+             args.workers, args.batch_videos, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Keep-alive connections held per host; at least the number of concurrent fetches
+CAPTION_POOL_SIZE = int(os.environ.get('CAPTION_POOL_SIZE', '16'))
+# (connect, read) timeouts in seconds; read applies between bytes, not to the whole body
+CAPTION_TIMEOUT: Tuple[float, float] = (
+    float(os.environ.get('CAPTION_CONNECT_TIMEOUT', '5')),
+    float(os.environ.get('CAPTION_READ_TIMEOUT', '30')),
+)
+CAPTION_RETRIES = int(os.environ.get('CAPTION_RETRIES', '3'))
+CAPTION_BACKOFF = float(os.environ.get('CAPTION_BACKOFF', '0.5'))
+
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+def _accept_encoding() -> str:
+    """gzip always; brotli only when a decoder is installed, since urllib3 needs one to decode it."""
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            return 'gzip, deflate, br'
+        except ImportError:
+            pass
+    return 'gzip, deflate'
+
+
+class CaptionClient:
+    """
+    Shared HTTP and yt-dlp client for caption downloads.
+
+    One keep-alive session with a sized connection pool serves every fetch, each request
+    has bounded timeouts, and connection errors or retryable statuses are retried with
+    jittered exponential backoff. Each thread keeps a long-lived YoutubeDL instance so
+    extractor setup and its info caches are reused between videos.
+    """
+
+    def __init__(self, pool_size: int = CAPTION_POOL_SIZE, timeout: Tuple[float, float] = CAPTION_TIMEOUT,
+                 retries: int = CAPTION_RETRIES, backoff: float = CAPTION_BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept-Encoding'] = _accept_encoding()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 60.0)
+        # Full jitter, so concurrent workers retrying the same host spread out
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def get(self, url: str, stream: bool = False, **kwargs: Any) -> requests.Response:
+        """GET with timeouts and retries. Retries happen before the body is read, so streaming is safe."""
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            self._count('requests')
+            response = None
+            try:
+                response = self.session.get(url, stream=stream, **kwargs)
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return response
+                response.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self._count('failures')
+                    raise
+            self._count('retries')
+            time.sleep(self._delay(attempt, response))
+        raise AssertionError('unreachable')
+
+    def youtube_dl(self):
+        """This thread's long-lived YoutubeDL instance."""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            import yt_dlp
+
+            ydl = yt_dlp.YoutubeDL({
+                'writesubtitles': True,
+                'subtitleslangs': ['en'],
+                'skip_download': True,
+                'quiet': True,
+                'socket_timeout': self.timeout[1],
+                'retries': self.retries,
+            })
+            self._local.ydl = ydl
+        return ydl
+
+    def extract_info(self, url: str) -> Dict[str, Any]:
+        return self.youtube_dl().extract_info(url, download=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[CaptionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_caption_client() -> CaptionClient:
+    """Return the process-wide caption client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CaptionClient()
+        return _client
+
+
+def _reset_after_fork() -> None:
+    # Pooled sockets and YoutubeDL instances must not be shared with the parent process
+    global _client, _client_lock
+    _client, _client_lock = None, threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,148 +1,195 @@
-
-import re
-from collections import Counter, defaultdict
-from datetime import datetime
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from textblob import TextBlob
+import os
+import threading
 import numpy as np
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import io
 import base64
+from transcript import Transcript, format_timestamp_ms
+from transcript_index import TranscriptIndex
+
+CHARTS = ('speaking_speed', 'wordcloud', 'engagement')
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml', 'jpeg': 'image/jpeg'}
+MIN_CHART_SIZE, MAX_CHART_SIZE = 100, 2000
+
+# NLTK_DOWNLOAD=1 fetches missing NLTK data; by default nothing touches the network
+NLTK_DOWNLOAD = os.environ.get('NLTK_DOWNLOAD', '0') == '1'
+
+_stop_words = None
+_stop_words_lock = threading.Lock()
+
+def english_stop_words():
+    """
+    NLTK's English stop words, resolved once per process.
+
+    Installed NLTK data is used when present. When it is missing, WordCloud's
+    built-in list is used instead, unless NLTK_DOWNLOAD=1 allows downloading it,
+    so offline hosts never wait on the network.
+    """
+    global _stop_words
+    with _stop_words_lock:
+        if _stop_words is None:
+            words = None
+            try:
+                import nltk
+            except ImportError:
+                nltk = None
+            if nltk is not None:
+                try:
+                    words = nltk.corpus.stopwords.words('english')
+                except LookupError:
+                    if NLTK_DOWNLOAD and nltk.download('stopwords', quiet=True):
+                        try:
+                            words = nltk.corpus.stopwords.words('english')
+                        except LookupError:
+                            pass
+            if words is None:
+                from wordcloud import STOPWORDS
+                words = STOPWORDS
+            _stop_words = frozenset(words)
+        return _stop_words
 
 class DashboardAnalytics:
-    def __init__(self):
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        self.stop_words = set(stopwords.words('english'))
+    @property
+    def stop_words(self):
+        return english_stop_words()
+
+    def as_transcript(self, text):
+        """Accept a TranscriptIndex, Transcript or legacy "[HH:MM:SS] text" string."""
+        if isinstance(text, TranscriptIndex):
+            return text.transcript
+        if isinstance(text, Transcript):
+            return text
+        return Transcript.from_timestamped(text)
+
+    def index(self, text):
+        """Tokenize once; pass the result to several metrics to share the work."""
+        return TranscriptIndex.build(text)
 
     def extract_timestamps(self, text):
         """Extract timestamps and their corresponding text."""
-        timestamp_pattern = r'\[(\d{2}:\d{2}:\d{2})\](.*?)(?=\[\d{2}:\d{2}:\d{2}\]|$)'
-        timestamps = re.findall(timestamp_pattern, text, re.DOTALL)
-        return [(ts[0], ts[1].strip()) for ts in timestamps]
+        transcript = self.as_transcript(text)
+        return [(format_timestamp_ms(start)[:8], content) for start, _, content in transcript.segments()]
 
     def calculate_word_count(self, text):
         """Calculate word count statistics."""
-        # Remove timestamps
-        text = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', text)
-        words = word_tokenize(text)
-        sentences = sent_tokenize(text)
-        
+        index = self.index(text)
+        sentences = index.sentence_count
+
+        return {
+            'total_words': len(index),
+            'unique_words': len(index.vocab),
+            'total_sentences': sentences,
+            'avg_words_per_sentence': len(index) / sentences if sentences else 0
+        }
+
+    def series(self, text, top_n=20):
+        """Numeric analytics only, for clients that draw their own charts."""
+        index = self.index(text)
+        rate_starts, speeds = index.speaking_rate()
+        starts = np.frombuffer(index.transcript.start_ms, dtype=np.int64)
         return {
-            'total_words': len(words),
-            'unique_words': len(set(words)),
-            'total_sentences': len(sentences),
-            'avg_words_per_sentence': len(words) / len(sentences) if sentences else 0
+            'word_count': self.calculate_word_count(index),
+            'avg_words_per_minute': round(float(speeds.mean()), 3) if len(speeds) else 0,
+            'speaking_speed': {'start_ms': rate_starts.tolist(), 'wpm': np.round(speeds, 3).tolist()},
+            'engagement': {'start_ms': starts.tolist(), 'scores': np.round(index.engagement_scores(), 4).tolist()},
+            'top_terms': index.top_terms(top_n, self.stop_words)
         }
 
+    def render_chart(self, text, chart, fmt='png', width=1000, height=400, dpi=100):
+        """
+        Render one chart to image bytes.
+
+        Uses the matplotlib Figure/Agg object API rather than pyplot, so concurrent
+        requests never share global figure state.
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart '{chart}', expected one of {', '.join(CHARTS)}")
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unknown image format '{fmt}', expected one of {', '.join(CHART_FORMATS)}")
+        width = min(max(int(width), MIN_CHART_SIZE), MAX_CHART_SIZE)
+        height = min(max(int(height), MIN_CHART_SIZE), MAX_CHART_SIZE)
+        index = self.index(text)
+        buf = io.BytesIO()
+
+        if chart == 'wordcloud':
+            from wordcloud import WordCloud
+
+            # The cloud only draws its top 200 words anyway
+            word_freq = dict(index.top_terms(200, self.stop_words)) or {'': 1}
+            wordcloud = WordCloud(width=width, height=height, background_color='white').generate_from_frequencies(word_freq)
+            if fmt == 'svg':
+                return wordcloud.to_svg().encode('utf-8')
+            wordcloud.to_image().convert('RGB').save(buf, format=fmt.upper())
+            return buf.getvalue()
+
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        if chart == 'speaking_speed':
+            rate_starts, speeds = index.speaking_rate()
+            ax.plot(rate_starts / 60000, speeds)
+            ax.set_title('Speaking Speed Over Time')
+            ax.set_xlabel('Minutes')
+            ax.set_ylabel('Words per Minute')
+        else:
+            image = ax.imshow([index.engagement_scores()], aspect='auto', cmap='YlOrRd')
+            fig.colorbar(image, ax=ax, label='Engagement Score')
+            ax.set_title('Content Engagement Heatmap')
+            ax.set_xlabel('Video Timeline')
+            ax.set_yticks([])
+        fig.tight_layout()
+        fig.savefig(buf, format=fmt)
+        return buf.getvalue()
+
+    def _chart_base64(self, text, chart):
+        return base64.b64encode(self.render_chart(text, chart)).decode('utf-8')
+
     def calculate_speaking_speed(self, text):
         """Calculate speaking speed based on timestamps."""
-        timestamps = self.extract_timestamps(text)
-        if not timestamps:
+        index = self.index(text)
+        if not len(index.transcript):
             return {'avg_words_per_minute': 0, 'speaking_speed_chart': None}
 
-        # Calculate words per minute for each segment
-        speeds = []
-        for i in range(len(timestamps) - 1):
-            current_time = datetime.strptime(timestamps[i][0], '%H:%M:%S')
-            next_time = datetime.strptime(timestamps[i+1][0], '%H:%M:%S')
-            time_diff = (next_time - current_time).total_seconds() / 60  # in minutes
-            
-            words = len(word_tokenize(timestamps[i][1]))
-            if time_diff > 0:
-                speed = words / time_diff
-                speeds.append(speed)
-
-        # Generate speed chart
-        plt.figure(figsize=(10, 4))
-        plt.plot(range(len(speeds)), speeds)
-        plt.title('Speaking Speed Over Time')
-        plt.xlabel('Segment')
-        plt.ylabel('Words per Minute')
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close()
+        # Words per minute for each segment
+        speeds = index.words_per_minute()
 
         return {
-            'avg_words_per_minute': np.mean(speeds) if speeds else 0,
-            'speaking_speed_chart': chart
+            'avg_words_per_minute': float(speeds.mean()) if len(speeds) else 0,
+            'speaking_speed_chart': self._chart_base64(index, 'speaking_speed')
         }
 
     def analyze_topic_frequency(self, text):
         """Analyze topic frequency and generate word cloud."""
-        # Remove timestamps and clean text
-        text = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', text)
-        words = [word.lower() for word in word_tokenize(text) 
-                if word.lower() not in self.stop_words and word.isalnum()]
-        
-        # Calculate word frequencies
-        word_freq = Counter(words)
-        
-        # Generate word cloud
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(word_freq)
-        
-        # Convert word cloud to base64 string
-        buf = io.BytesIO()
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        wordcloud_img = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close()
+        index = self.index(text)
+        top_topics = dict(index.top_terms(10, self.stop_words))
+        if not top_topics:
+            return {'top_topics': {}, 'wordcloud': None}
 
         return {
-            'top_topics': dict(word_freq.most_common(10)),
-            'wordcloud': wordcloud_img
+            'top_topics': top_topics,
+            'wordcloud': self._chart_base64(index, 'wordcloud')
         }
 
     def generate_engagement_heatmap(self, text, comments=None, likes=None):
         """Generate engagement heatmap based on content and optional engagement metrics."""
-        timestamps = self.extract_timestamps(text)
-        if not timestamps:
+        index = self.index(text)
+        if not len(index.transcript):
             return {'heatmap': None}
 
-        # Calculate engagement scores for each segment
-        engagement_scores = []
-        for timestamp, content in timestamps:
-            # Basic engagement score based on content length and sentiment
-            sentiment = TextBlob(content).sentiment.polarity
-            length_score = len(word_tokenize(content)) / 100  # Normalize length
-            engagement_score = (sentiment + 1) * length_score  # Combine factors
-            engagement_scores.append(engagement_score)
-
-        # Generate heatmap
-        plt.figure(figsize=(10, 4))
-        plt.imshow([engagement_scores], aspect='auto', cmap='YlOrRd')
-        plt.colorbar(label='Engagement Score')
-        plt.title('Content Engagement Heatmap')
-        plt.xlabel('Video Timeline')
-        plt.yticks([])
-        
-        # Convert heatmap to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        heatmap = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close()
-
         return {
-            'heatmap': heatmap,
-            'engagement_scores': engagement_scores
+            'heatmap': self._chart_base64(index, 'engagement'),
+            'engagement_scores': index.engagement_scores().tolist()
         }
 
     def get_dashboard_data(self, text, comments=None, likes=None):
         """Get all dashboard analytics data."""
+        # Tokenize once and share the index between the metrics
+        text = self.index(text)
         return {
             'word_count': self.calculate_word_count(text),
             'speaking_speed': self.calculate_speaking_speed(text),
             'topic_frequency': self.analyze_topic_frequency(text),
             'engagement': self.generate_engagement_heatmap(text, comments, likes)
-        } 
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Per-request time budgets and cancellation, checked cooperatively by the pipeline.
+
+A Deadline is created for each request (or job) and passed down to summarization
+and translation. Long-running stages check it between batches: they raise
+Cancelled once the client has gone, and when time runs short they degrade instead
+of overrunning (greedy decoding, shorter summaries, extractive fallbacks) and
+record each step in `degradations` so the response can report it.
+"""
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from metrics import log_event, registry
+
+# Longest a waiting stage goes without noticing a cancellation
+CHECK_INTERVAL = 0.25
+
+DEGRADATIONS = registry.counter('degradations_total', 'Pipeline steps degraded to meet a deadline', ['step'])
+CANCELLATIONS = registry.counter('cancellations_total', 'Requests cancelled while running', ['stage'])
+
+
+class Cancelled(Exception):
+    """Raised inside the pipeline once the request's client has gone away."""
+
+    status_code = 499
+
+    def __init__(self, stage: str = ''):
+        super().__init__('Request cancelled')
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Time budget and cancellation flag of one request.
+
+    `seconds=None` never expires. Deadlines made with `share()` expire earlier but
+    cancel together with their parent and record degradations into the same list.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires = time.monotonic() + seconds if seconds else math.inf
+        self._cancelled = threading.Event()
+        # [is_cancelled, interval, next poll] set by poll(), shared with share()d deadlines
+        self._poller: List[Any] = []
+        self.degradations: List[Dict[str, Any]] = []
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires != math.inf
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    @property
+    def cancelled(self) -> bool:
+        self._poll()
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def poll(self, is_cancelled: Callable[[], bool], interval: float = 1.0) -> None:
+        """Also cancel once `is_cancelled()` returns True, e.g. a flag set by another process; asked at most every `interval` seconds."""
+        self._poller[:] = [is_cancelled, interval, 0.0]
+
+    def _poll(self) -> None:
+        if not self._poller or self._cancelled.is_set():
+            return
+        is_cancelled, interval, next_poll = self._poller
+        now = time.monotonic()
+        if now >= next_poll:
+            self._poller[2] = now + interval
+            if is_cancelled():
+                self._cancelled.set()
+
+    def check(self, stage: str = '') -> None:
+        """Raise Cancelled if the request was cancelled."""
+        self._poll()
+        if self._cancelled.is_set():
+            CANCELLATIONS.inc(stage=stage)
+            raise Cancelled(stage)
+
+    def share(self, fraction: float) -> 'Deadline':
+        """A deadline for one stage: `fraction` of the time left, same cancellation and degradation log."""
+        child = Deadline()
+        child.expires = time.monotonic() + self.remaining() * fraction if self.bounded else math.inf
+        child._cancelled = self._cancelled
+        child._poller = self._poller
+        child.degradations = self.degradations
+        return child
+
+    def degrade(self, step: str, **details: Any) -> None:
+        """Record that `step` was taken to finish in time."""
+        self.degradations.append({'step': step, **details})
+        DEGRADATIONS.inc(step=step)
+        log_event('degrade', step=step, remaining_seconds=round(self.remaining(), 3), **details)
+
+    def wait(self, futures: Iterable[Future], stage: str = '') -> Set[Future]:
+        """
+        Wait for at least one of `futures`, the deadline or a cancellation, whichever comes first.
+
+        Returns the finished futures, empty once the deadline has passed. On cancellation
+        the unfinished futures are cancelled, which drops them from the batch queue, and
+        Cancelled is raised.
+        """
+        futures = set(futures)
+        while True:
+            try:
+                self.check(stage)
+            except Cancelled:
+                for future in futures:
+                    future.cancel()
+                raise
+            done, _ = wait(futures, timeout=min(CHECK_INTERVAL, self.remaining()), return_when=FIRST_COMPLETED)
+            if done or self.expired:
+                return done
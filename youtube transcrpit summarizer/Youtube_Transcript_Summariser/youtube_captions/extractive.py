@@ -0,0 +1,154 @@
+"""
+Extractive sentence selection: a NumPy TF-IDF / TextRank scorer that keeps the
+most central sentences of a transcript, in their original order, within a budget.
+
+Used as an optional pre-filter that shrinks long transcripts before the abstractive
+model, and on its own for the model-free 'instant' summary level.
+"""
+import math
+import os
+import re
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from summarize_transcript import split_sentences
+
+# 'textrank' ranks sentences by centrality in their similarity graph; 'tfidf' by similarity to the whole text
+EXTRACTIVE_METHOD = os.environ.get('EXTRACTIVE_METHOD', 'textrank')
+# Auto-captions often have no punctuation; longer "sentences" are cut into windows of about this many words
+MAX_UNIT_WORDS = 40
+# Only the best sentences by TF-IDF enter the TextRank graph, which is quadratic in its size
+TEXTRANK_CANDIDATES = 600
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['’-][a-z0-9]+)*")
+
+
+def split_units(text: str, max_words: int = MAX_UNIT_WORDS) -> List[str]:
+    """Sentences of `text`, with overlong ones cut into even windows of at most `max_words` words."""
+    units = []
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        if len(words) <= max_words:
+            units.append(sentence)
+            continue
+        size = math.ceil(len(words) / math.ceil(len(words) / max_words))
+        units.extend(' '.join(words[i:i + size]) for i in range(0, len(words), size))
+    return units
+
+
+def _stop_words() -> frozenset:
+    from dashboard_analytics import english_stop_words
+
+    return english_stop_words()
+
+
+def _tfidf(units: Sequence[str]):
+    """
+    L2-normalised TF-IDF weights as sparse (row, column, weight) arrays plus the vocabulary size.
+
+    Rows are units; stop words and single characters are not terms.
+    """
+    stop_words = _stop_words()
+    vocab = {}
+    rows: List[int] = []
+    columns: List[int] = []
+    for i, unit in enumerate(units):
+        for word in WORD_PATTERN.findall(unit.lower()):
+            if len(word) > 1 and word not in stop_words:
+                rows.append(i)
+                columns.append(vocab.setdefault(word, len(vocab)))
+    n_units, n_terms = len(units), len(vocab)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), n_terms
+
+    # Merge repeated (unit, term) pairs into counts
+    pairs, counts = np.unique(np.array(rows, dtype=np.int64) * n_terms + np.array(columns, dtype=np.int64),
+                              return_counts=True)
+    rows, columns = pairs // n_terms, pairs % n_terms
+    document_frequency = np.bincount(columns, minlength=n_terms)
+    idf = np.log((1 + n_units) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(counts)) * idf[columns]
+    norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=n_units))
+    weights /= norms[rows]
+    return rows, columns, weights, n_terms
+
+
+def score_units(units: Sequence[str], method: str = EXTRACTIVE_METHOD) -> np.ndarray:
+    """One score per unit; higher means more central to the transcript."""
+    n_units = len(units)
+    rows, columns, weights, n_terms = _tfidf(units)
+    if not len(rows):
+        return np.zeros(n_units)
+
+    # Cosine similarity of each unit to the centroid of all units
+    centroid = np.bincount(columns, weights, minlength=n_terms)
+    centroid /= np.linalg.norm(centroid) or 1
+    scores = np.bincount(rows, weights * centroid[columns], minlength=n_units)
+    if method == 'tfidf':
+        return scores
+    if method != 'textrank':
+        raise ValueError(f"Unknown extractive method '{method}'")
+
+    candidates = np.argsort(-scores, kind='stable')[:TEXTRANK_CANDIDATES]
+    position = np.full(n_units, -1)
+    position[candidates] = np.arange(len(candidates))
+    keep = position[rows] >= 0
+    terms, local_columns = np.unique(columns[keep], return_inverse=True)
+    matrix = np.zeros((len(candidates), len(terms)), dtype=np.float32)
+    matrix[position[rows[keep]], local_columns] = weights[keep]
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Units with no similar neighbour spread their rank evenly
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight > 0, out_weight, 1), 1 / len(candidates))
+    rank = np.full(len(candidates), 1 / len(candidates))
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / len(candidates) + TEXTRANK_DAMPING * (rank @ transition)
+        converged = np.abs(updated - rank).sum() < 1e-6
+        rank = updated
+        if converged:
+            break
+
+    ranked = np.zeros(n_units)
+    # Break near-ties by centroid similarity
+    ranked[candidates] = rank + 1e-9 * scores[candidates]
+    return ranked
+
+
+def select_units(units: Sequence[str], sizes: Sequence[int], budget: int,
+                 method: str = EXTRACTIVE_METHOD) -> List[str]:
+    """The best-scoring units whose sizes fit `budget`, in their original order; always at least one."""
+    if not units:
+        return []
+    scores = score_units(units, method)
+    order = np.argsort(-scores, kind='stable')
+    sizes = np.asarray(sizes)[order]
+    fits = np.cumsum(sizes) <= budget
+    fits[0] = True
+    return [units[i] for i in np.sort(order[fits])]
+
+
+def extract(text: str, budget: int, count: Optional[Callable[[List[str]], Sequence[int]]] = None,
+            method: str = EXTRACTIVE_METHOD) -> str:
+    """
+    Shrink `text` to its most central sentences within `budget`.
+
+    Sizes are measured with `count(units)`, e.g. model tokens, or in words by default.
+    Text already within the budget is returned unchanged.
+    """
+    units = split_units(text)
+    sizes = count(units) if count else [len(unit.split()) for unit in units]
+    if sum(sizes) <= budget:
+        return text
+    return ' '.join(select_units(units, sizes, budget, method))
+
+
+def token_counter(tokenizer) -> Callable[[List[str]], List[int]]:
+    """Count model tokens of many units in one batch call."""
+    def count(units: List[str]) -> List[int]:
+        return [len(ids) for ids in tokenizer(units, add_special_tokens=False)['input_ids']]
+    return count
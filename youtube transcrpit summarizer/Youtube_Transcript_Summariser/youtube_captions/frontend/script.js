@@ -50,10 +50,12 @@ document.addEventListener('DOMContentLoaded', function() {
         const language = document.getElementById('language').value;
         // Show loader
         loader.classList.remove('hidden');
+        progressText.classList.remove('hidden');
+        progressText.textContent = 'Queued...';
         summarizeBtn.disabled = true;
         
         try {
-            const response = await fetch('/api/process', {
+            const response = await fetch('/api/jobs', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -65,12 +67,14 @@ document.addEventListener('DOMContentLoaded', function() {
                 })
             });
 
-            const data = await response.json();
+            const job = await response.json();
             
             if (!response.ok) {
-                throw new Error(data.error || 'Failed to process video');
+                throw new Error(job.error || 'Failed to process video');
             }
 
+            const data = await waitForJob(job.id);
+
             // Add to history
             addToHistory({
                 title: data.title,
@@ -79,7 +83,7 @@ document.addEventListener('DOMContentLoaded', function() {
             });
 
             // Update result based on current tab
-            updateResult(data);
+            updateResult({ ...data, url: videoUrl });
             
         } catch (error) {
             console.error('Error:', error);
@@ -87,10 +91,72 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('result').innerHTML = `<p class="error">${error.message}</p>`;
         } finally {
             loader.classList.add('hidden');
+            progressText.classList.add('hidden');
             summarizeBtn.disabled = false;
         }
     });
 
+    // Job progress
+    const progressText = document.getElementById('progressText');
+    const stageLabels = {
+        queued: 'Queued...',
+        captions: 'Fetching captions...',
+        summarize: 'Summarizing',
+        combine: 'Combining summaries...',
+        translate: 'Translating...',
+        done: 'Done'
+    };
+
+    function showProgress(event) {
+        let label = stageLabels[event.stage] || event.stage;
+        if (event.stage === 'summarize' && event.total) {
+            label += ` chunk ${event.current}/${event.total}...`;
+        }
+        progressText.textContent = label;
+    }
+
+    function jobResult(job) {
+        if (job.status === 'error' || job.status === 'cancelled') {
+            throw new Error(job.error || 'Failed to process video');
+        }
+        return job.result;
+    }
+
+    // Follow the job's SSE progress stream, falling back to polling if it drops
+    function waitForJob(jobId) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/api/jobs/${jobId}/events`);
+            source.onmessage = (e) => showProgress(JSON.parse(e.data));
+            source.addEventListener('done', (e) => {
+                source.close();
+                try {
+                    resolve(jobResult(JSON.parse(e.data)));
+                } catch (err) {
+                    reject(err);
+                }
+            });
+            source.onerror = () => {
+                source.close();
+                pollJob(jobId).then(resolve, reject);
+            };
+        });
+    }
+
+    async function pollJob(jobId) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok) {
+                throw new Error(job.error || 'Failed to process video');
+            }
+            showProgress(job);
+            if (['done', 'error', 'cancelled'].includes(job.status)) {
+                return jobResult(job);
+            }
+            await new Promise(r => setTimeout(r, 2000));
+        }
+    }
+
     // Tab handling
     const tabs = document.querySelectorAll('.tab-btn');
     let currentTab = 'summary';
@@ -129,9 +195,129 @@ document.addEventListener('DOMContentLoaded', function() {
             case 'history':
                 displayHistory();
                 break;
+            case 'analytics':
+                if (currentData) {
+                    displayAnalytics(currentData.url);
+                }
+                break;
+        }
+    }
+
+    // Analytics: the server returns numeric series and the charts are drawn here
+    const analyticsCache = new Map();
+
+    async function displayAnalytics(url) {
+        const resultDiv = document.getElementById('result');
+        resultDiv.innerHTML = '<p>Loading analytics...</p>';
+        try {
+            if (!analyticsCache.has(url)) {
+                const response = await fetch('/api/analytics', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ url: url })
+                });
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Failed to load analytics');
+                }
+                analyticsCache.set(url, data);
+            }
+            if (currentTab !== 'analytics') return;
+            renderAnalytics(resultDiv, analyticsCache.get(url));
+        } catch (err) {
+            resultDiv.innerHTML = `<p class="error">${err.message}</p>`;
         }
     }
 
+    function renderAnalytics(container, data) {
+        const stats = data.word_count;
+        const maxCount = data.top_terms.length ? data.top_terms[0][1] : 1;
+        container.innerHTML = `
+            <div class="analytics">
+                <div class="analytics-stats">
+                    <div><strong>${stats.total_words}</strong><span>words</span></div>
+                    <div><strong>${stats.unique_words}</strong><span>unique</span></div>
+                    <div><strong>${stats.total_sentences}</strong><span>sentences</span></div>
+                    <div><strong>${Math.round(data.avg_words_per_minute)}</strong><span>words/min</span></div>
+                </div>
+                <h3>Speaking Speed</h3>
+                <canvas id="speedChart" class="analytics-chart" height="200"></canvas>
+                <h3>Engagement</h3>
+                <canvas id="engagementChart" class="analytics-chart" height="60"></canvas>
+                <h3>Top Terms</h3>
+                <div class="term-bars">
+                    ${data.top_terms.map(([term, count]) => `
+                        <div class="term-bar">
+                            <span class="term-label">${term}</span>
+                            <span class="term-fill" style="width: ${100 * count / maxCount}%"></span>
+                            <span class="term-count">${count}</span>
+                        </div>
+                    `).join('')}
+                </div>
+            </div>
+        `;
+        drawLineChart(document.getElementById('speedChart'),
+                      data.speaking_speed.start_ms.map(ms => ms / 60000), data.speaking_speed.wpm);
+        drawHeatStrip(document.getElementById('engagementChart'), data.engagement.scores);
+    }
+
+    function chartColors() {
+        const style = getComputedStyle(document.body);
+        return {
+            line: style.getPropertyValue('--primary-color').trim() || '#ff0000',
+            text: style.getPropertyValue('--text-secondary').trim() || '#575757'
+        };
+    }
+
+    function prepareCanvas(canvas) {
+        const ratio = window.devicePixelRatio || 1;
+        const width = canvas.clientWidth;
+        const height = canvas.height;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.height = height + 'px';
+        const ctx = canvas.getContext('2d');
+        ctx.scale(ratio, ratio);
+        return { ctx, width, height };
+    }
+
+    function drawLineChart(canvas, xs, ys) {
+        const { ctx, width, height } = prepareCanvas(canvas);
+        const colors = chartColors();
+        if (!xs.length) return;
+        const pad = 30;
+        const maxX = xs[xs.length - 1] || 1;
+        const maxY = Math.max(...ys) || 1;
+        ctx.fillStyle = colors.text;
+        ctx.font = '11px Inter, sans-serif';
+        ctx.fillText(`${Math.round(maxY)} wpm`, 0, 10);
+        ctx.fillText(`${maxX.toFixed(0)} min`, width - 40, height - 2);
+        ctx.strokeStyle = colors.line;
+        ctx.lineWidth = 1;
+        ctx.beginPath();
+        xs.forEach((x, i) => {
+            const px = pad + (width - pad) * x / maxX;
+            const py = (height - 15) * (1 - ys[i] / maxY) + 5;
+            if (i === 0) ctx.moveTo(px, py); else ctx.lineTo(px, py);
+        });
+        ctx.stroke();
+    }
+
+    function drawHeatStrip(canvas, values) {
+        const { ctx, width, height } = prepareCanvas(canvas);
+        if (!values.length) return;
+        const max = Math.max(...values) || 1;
+        const step = width / values.length;
+        values.forEach((value, i) => {
+            // Yellow for quiet segments through red for the most engaging ones
+            const t = value / max;
+            ctx.fillStyle = `rgb(255, ${Math.round(230 - 200 * t)}, ${Math.round(120 - 100 * t)})`;
+            ctx.fillRect(i * step, 0, Math.ceil(step), height);
+        });
+    }
+
     function addToHistory(item) {
         historyData.unshift(item);
         // Keep only last 10 items
@@ -160,6 +346,28 @@ document.addEventListener('DOMContentLoaded', function() {
     // Speak functionality
     const speakBtn = document.getElementById('speakBtn');
     const audioPlayer = document.getElementById('audioPlayer');
+
+    // Play MP3 chunks as they arrive instead of waiting for the whole summary
+    async function streamAudio(body) {
+        const mediaSource = new MediaSource();
+        audioPlayer.src = URL.createObjectURL(mediaSource);
+        await new Promise(resolve => mediaSource.addEventListener('sourceopen', resolve, { once: true }));
+        const sourceBuffer = mediaSource.addSourceBuffer('audio/mpeg');
+        const reader = body.getReader();
+        let started = false;
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            sourceBuffer.appendBuffer(value);
+            await new Promise(resolve => sourceBuffer.addEventListener('updateend', resolve, { once: true }));
+            if (!started) {
+                started = true;
+                audioPlayer.play();
+            }
+        }
+        mediaSource.endOfStream();
+    }
+
     speakBtn.addEventListener('click', async () => {
         if (!currentData || !currentData.summary) {
             showToast('No summary to speak!');
@@ -183,13 +391,19 @@ document.addEventListener('DOMContentLoaded', function() {
                 const err = await response.json();
                 throw new Error(err.error || 'Failed to generate speech');
             }
-            const blob = await response.blob();
-            const url = URL.createObjectURL(blob);
-            audioPlayer.src = url;
             // Move audio element right after speakBtn and show it
             speakBtn.parentNode.insertBefore(audioPlayer, speakBtn.nextSibling);
             audioPlayer.style.display = 'inline-block';
-            audioPlayer.play();
+            if (audioPlayer.src) {
+                URL.revokeObjectURL(audioPlayer.src);
+            }
+            if (window.MediaSource && MediaSource.isTypeSupported('audio/mpeg') && response.body) {
+                await streamAudio(response.body);
+            } else {
+                const blob = await response.blob();
+                audioPlayer.src = URL.createObjectURL(blob);
+                audioPlayer.play();
+            }
         } catch (err) {
             showToast('Speech error: ' + err.message);
         } finally {
@@ -1,6 +1,8 @@
-import yt_dlp
+import logging
 import sys
-from process_captions import process_captions
+from caption_client import get_caption_client
+from metrics import configure_logging, log_event, stage
+from process_captions import process_captions, iter_transcript_lines
 import re
 
 def sanitize_filename(filename):
@@ -14,44 +16,98 @@ def sanitize_filename(filename):
     # Trim length if needed (Windows has a 255 character limit)
     return filename[:240]  # Leave room for the _captions.txt suffix
 
-def get_english_captions(url):
+def extract_video_id(url):
     """
-    Extract English captions from a YouTube video.
+    Extract the 11-character video ID from common YouTube URL forms.
     
     Args:
         url (str): YouTube video URL
     
     Returns:
-        str: URL to the captions data, or None if not available
+        str: Video ID, or None if the URL is not recognised
+    """
+    match = re.search(
+        r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})',
+        url or ''
+    )
+    return match.group(1) if match else None
+
+def expand_playlist(url, limit=None):
     """
+    List the videos of a playlist or channel without fetching each video page.
+    
+    Args:
+        url (str): Playlist, channel or single video URL
+        limit (int): Maximum number of videos to return, optional
+    
+    Returns:
+        list: Dicts with the video 'id', 'url' and 'title', in playlist order
+    """
+    import yt_dlp
+
     ydl_opts = {
-        'writesubtitles': True,
-        'subtitleslangs': ['en'],
+        'extract_flat': 'in_playlist',
         'skip_download': True,
         'quiet': True
     }
+    if limit:
+        ydl_opts['playlistend'] = limit
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    def flatten(entry):
+        # Channels nest their tabs (videos, shorts, ...) as playlists of playlists
+        if entry.get('_type') in ('playlist', 'multi_video') or 'entries' in entry:
+            for child in entry.get('entries') or []:
+                if child:
+                    yield from flatten(child)
+        elif entry.get('id'):
+            yield {
+                'id': entry['id'],
+                'url': entry.get('url') if str(entry.get('url', '')).startswith('http')
+                       else f"https://www.youtube.com/watch?v={entry['id']}",
+                'title': entry.get('title') or entry['id']
+            }
+
+    videos, seen = [], set()
+    for video in flatten(info):
+        if video['id'] not in seen:
+            seen.add(video['id'])
+            videos.append(video)
+    return videos[:limit] if limit else videos
+
+def get_english_captions(url):
+    """
+    Extract English captions from a YouTube video.
     
+    Args:
+        url (str): YouTube video URL
+    
+    Returns:
+        str: URL to the captions data, or None if not available
+    """
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Get video info
-            info = ydl.extract_info(url, download=False)
-            video_title = sanitize_filename(info.get('title', 'Unknown_title'))
-            
-            # Check if English subtitles are available
-            if not info.get('subtitles') or 'en' not in info['subtitles']:
-                print(f"No English subtitles found for the video: {info.get('title', 'Unknown title')}")
-                return None, None
-            
-            # Extract English subtitles
-            subtitles = info['subtitles']['en']
-            for fmt in subtitles:
-                if fmt['ext'] == 'json3':
-                    return fmt['url'], video_title
-            
+        # Get video info through the shared long-lived YoutubeDL
+        with stage('yt_dlp'):
+            info = get_caption_client().extract_info(url)
+        video_title = sanitize_filename(info.get('title', 'Unknown_title'))
+        
+        # Check if English subtitles are available
+        if not info.get('subtitles') or 'en' not in info['subtitles']:
+            log_event('caption_extract_error', severity=logging.WARNING, url=url, title=info.get('title'),
+                      error='no English subtitles')
             return None, None
-            
+        
+        # Extract English subtitles
+        subtitles = info['subtitles']['en']
+        for fmt in subtitles:
+            if fmt['ext'] == 'json3':
+                return fmt['url'], video_title
+        
+        return None, None
+        
     except Exception as e:
-        print(f"Error extracting captions: {str(e)}")
+        log_event('caption_extract_error', severity=logging.ERROR, url=url, error=str(e))
         return None, None
 
 def main():
@@ -61,26 +117,29 @@ def main():
         return
 
     url = sys.argv[1]
+    configure_logging()
     print(f"Extracting and processing captions from: {url}")
     
     # Get captions URL and video title
     captions_url, video_title = get_english_captions(url)
     
     if captions_url:
-        # Process the captions
-        formatted_text = process_captions(captions_url)
-        
-        if formatted_text:
-            # Save the formatted captions to subs.txt
-            output_file = 'subs.txt'
-            try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(formatted_text)
+        # Stream the formatted captions to subs.txt as they are parsed
+        output_file = 'subs.txt'
+        try:
+            lines_written = 0
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for line in iter_transcript_lines(captions_url):
+                    if lines_written:
+                        f.write('\n\n')
+                    f.write(line)
+                    lines_written += 1
+            if lines_written:
                 print(f"Formatted captions saved to {output_file}")
-            except Exception as e:
-                print(f"Error saving captions: {str(e)}")
-        else:
-            print("Failed to process captions.")
+            else:
+                print("Failed to process captions.")
+        except Exception as e:
+            print(f"Error processing captions: {str(e)}")
     else:
         print("Failed to extract captions.")
 
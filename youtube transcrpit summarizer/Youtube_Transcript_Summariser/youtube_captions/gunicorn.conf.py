@@ -0,0 +1,55 @@
+"""
+Production server: gunicorn --config gunicorn.conf.py app:app
+
+The app, and the models named in WARM_MODELS, are loaded once in the master
+process before the workers are forked, so every worker shares the read-only
+model weights copy-on-write instead of loading its own copy. gc.freeze() moves
+everything loaded so far out of the garbage collector's reach, so collections in
+the workers do not write to (and thereby copy) the shared pages.
+
+Each worker runs WEB_THREADS request threads and TORCH_THREADS intra-op threads,
+by default the cores divided between the workers, so inference in parallel
+workers does not oversubscribe the CPU.
+"""
+import gc
+import os
+
+cpus = os.cpu_count() or 1
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_WORKERS', str(min(cpus, 4))))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', '4'))
+preload_app = os.environ.get('WEB_PRELOAD', '1') != '0'
+# /api/process summarizes synchronously; long videos take minutes on CPU
+timeout = int(os.environ.get('WEB_TIMEOUT', '600'))
+graceful_timeout = 30
+accesslog = os.environ.get('ACCESS_LOG')
+
+torch_threads = int(os.environ.get('TORCH_THREADS', str(max(1, cpus // workers))))
+
+# Loaded in the master and shared by every worker
+os.environ.setdefault('WARM_MODELS', 'summarization')
+# Job polls may reach any worker, so job state goes through the shared result cache
+os.environ.setdefault('JOB_SHARED_STATE', '1')
+# The master only loads models; a single OpenMP thread there leaves no thread pool to break across fork()
+os.environ['OMP_NUM_THREADS'] = '1'
+os.environ['MKL_NUM_THREADS'] = '1'
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before the first fork
+    gc.collect()
+    gc.freeze()
+    server.log.info("Serving with %d workers x %d threads, %d torch threads each, preload=%s",
+                    workers, threads, torch_threads, preload_app)
+
+
+def post_fork(server, worker):
+    os.environ['OMP_NUM_THREADS'] = str(torch_threads)
+    os.environ['MKL_NUM_THREADS'] = str(torch_threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(torch_threads)
@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from metrics import log_event
+
+# 'torch' (fp32, GPU when available), 'int8' (dynamic-quantized torch, CPU) or 'onnx' (ONNX Runtime, CPU)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'torch')
+BACKENDS = ('torch', 'int8', 'onnx')
+
+# Exported ONNX graphs are kept here so the export only happens once per model
+ONNX_CACHE_DIR = os.environ.get(
+    'ONNX_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'onnx')
+)
+
+DISTILLED_SUMMARIZATION_MODEL = "sshleifer/distilbart-cnn-12-6"
+
+
+class ThreadSafeTokenizer:
+    """
+    Serializes encoding and decoding through a shared tokenizer.
+
+    Fast tokenizers keep truncation and padding state in their Rust backend, so two
+    request threads encoding at once fail with "Already borrowed". Everything else
+    is forwarded to the wrapped tokenizer.
+    """
+
+    _LOCKED = frozenset(('encode', 'encode_plus', 'batch_encode_plus', 'pad', 'decode', 'batch_decode'))
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+        self._lock = threading.RLock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self._tokenizer(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._tokenizer, name)
+        if name not in self._LOCKED:
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+    def __len__(self) -> int:
+        return len(self._tokenizer)
+
+
+class Seq2SeqSummarizer:
+    """
+    Minimal summarization pipeline over any backend's model and tokenizer.
+
+    Exposes `model` and `tokenizer` like a transformers pipeline, and can be called
+    the same way for a single text.
+    """
+
+    def __init__(self, model, tokenizer, backend: str):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.backend = backend
+
+    def __call__(self, text: str, max_length: int, min_length: int, do_sample: bool = False,
+                 truncation: bool = True, **generate_kwargs) -> List[Dict[str, str]]:
+        import torch
+
+        inputs = self.tokenizer(text, truncation=truncation, return_tensors="pt",
+                                return_token_type_ids=False).to(self.model.device)
+        with torch.inference_mode():
+            output_ids = self.model.generate(**inputs, max_length=max_length, min_length=min_length,
+                                             do_sample=do_sample, **generate_kwargs)
+        summary = self.tokenizer.decode(output_ids[0], skip_special_tokens=True,
+                                        clean_up_tokenization_spaces=True)
+        return [{'summary_text': summary}]
+
+
+def check_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def _load_onnx(model_name: str):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError("The onnx backend needs optimum[onnxruntime]: pip install 'optimum[onnxruntime]'") from e
+
+    export_dir = os.path.join(ONNX_CACHE_DIR, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+    if os.path.isdir(export_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+
+    # Export encoder and decoder (with KV cache) once, then reuse the graphs
+    log_event('onnx_export', model=model_name, export_dir=export_dir)
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(export_dir)
+    return model
+
+
+def load_seq2seq(model_name: str, backend: str = INFERENCE_BACKEND, model_class: Optional[Any] = None):
+    """Load a seq2seq model for the given backend (AutoModelForSeq2SeqLM unless `model_class` is given)."""
+    check_backend(backend)
+    if backend == 'onnx':
+        return _load_onnx(model_name)
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = (model_class or AutoModelForSeq2SeqLM).from_pretrained(model_name)
+    model.eval()
+    if backend == 'int8':
+        # Dynamic quantization stores Linear weights as int8 and quantizes activations on the fly
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif torch.cuda.is_available():
+        model = model.to('cuda')
+    return model
+
+
+def load_summarizer(model_name: str, backend: str = INFERENCE_BACKEND) -> Seq2SeqSummarizer:
+    """Load a summarization model and tokenizer for the given backend."""
+    from transformers import AutoTokenizer
+
+    tokenizer = ThreadSafeTokenizer(AutoTokenizer.from_pretrained(model_name, use_fast=True))
+    return Seq2SeqSummarizer(load_seq2seq(model_name, backend), tokenizer, backend)
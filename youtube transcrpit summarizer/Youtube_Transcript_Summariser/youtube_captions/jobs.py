@@ -0,0 +1,364 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from deadline import Cancelled, Deadline
+from metrics import bind_request_id, current_request_id, log_event, registry, reset_request_id
+from result_cache import ResultCache, result_cache
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '16'))
+# Finished jobs stay pollable for this many seconds
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', '3600'))
+# Publish job state to the shared result cache so every server process can answer polls for it
+JOB_SHARED_STATE = os.environ.get('JOB_SHARED_STATE', '0') == '1'
+# Progress is published at most this often; status changes are always published
+JOB_PUBLISH_INTERVAL = float(os.environ.get('JOB_PUBLISH_INTERVAL', '1'))
+# A job whose last progress stream closed is cancelled if nobody watches or polls it for this long; 0 keeps it
+JOB_ABANDON_SECONDS = float(os.environ.get('JOB_ABANDON_SECONDS', '10'))
+# How often a running job checks the shared store for a cancel sent to another process
+JOB_CANCEL_POLL_SECONDS = float(os.environ.get('JOB_CANCEL_POLL_SECONDS', '1'))
+
+ProgressCallback = Callable[[str, int, int], None]
+
+JOB_WAIT_SECONDS = registry.histogram('job_queue_wait_seconds', 'Time jobs spend queued before a worker starts them')
+JOBS_FINISHED = registry.counter('jobs_finished_total', 'Jobs finished, by outcome', ['status'])
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+class Job:
+    """
+    A queued pipeline run with its progress events.
+
+    The job's `deadline` starts at submission, from the optional `deadline` param in
+    seconds, and is how a running job is cancelled.
+    """
+
+    def __init__(self, key: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        # Logs from the worker carry the ID of the request that submitted the job
+        self.request_id = current_request_id() or self.id[:16]
+        self.key = key
+        self.params = params
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.current = 0
+        self.total = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.deadline = Deadline(params.get('deadline'))
+        # Open progress streams, and when a client last asked about the job
+        self.watchers = 0
+        self.last_seen = time.monotonic()
+        self.events: List[Dict[str, Any]] = []
+        self._changed = threading.Condition()
+        # Called after every recorded event, e.g. to publish the job to other processes
+        self.on_change: Optional[Callable[['Job'], None]] = None
+        self._record()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def _record(self) -> None:
+        """Append the current state as an event and wake SSE listeners."""
+        with self._changed:
+            self.events.append({
+                'status': self.status,
+                'stage': self.stage,
+                'current': self.current,
+                'total': self.total,
+                'time': time.time(),
+            })
+            self._changed.notify_all()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def report(self, stage: str, current: int = 0, total: int = 0) -> None:
+        """Progress callback handed to the pipeline."""
+        self.stage, self.current, self.total = stage, current, total
+        self._record()
+
+    def start(self) -> None:
+        self.status, self.started = 'running', time.time()
+        self._record()
+
+    def succeed(self, result: Dict[str, Any]) -> None:
+        self.result = result
+        self.status, self.stage, self.finished = 'done', 'done', time.time()
+        self._record()
+
+    def fail(self, message: str, status_code: int = 500) -> None:
+        self.error, self.status_code = message, status_code
+        self.status, self.finished = 'error', time.time()
+        self._record()
+
+    def cancelled(self) -> None:
+        self.error, self.status_code = 'Job cancelled', Cancelled.status_code
+        self.status, self.finished = 'cancelled', time.time()
+        self._record()
+
+    def wait_for_events(self, seen: int, timeout: float) -> List[Dict[str, Any]]:
+        """Block until there are more than `seen` events or the timeout passes."""
+        with self._changed:
+            if len(self.events) <= seen and self.active:
+                self._changed.wait(timeout)
+            return self.events[seen:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'current': self.current,
+            'total': self.total,
+            'params': self.params,
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status in ('error', 'cancelled'):
+            data['error'] = self.error
+        return data
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State published for other processes, see RemoteJob."""
+        return {**self.to_dict(), 'event_count': len(self.events), 'last_event': self.events[-1]}
+
+
+class RemoteJob:
+    """Read-only view of a job running in another server process, refreshed from the shared store."""
+
+    def __init__(self, snapshot: Dict[str, Any], store: ResultCache, poll_interval: float = 0.25):
+        self.id = snapshot['id']
+        self.params = snapshot['params']
+        self.store = store
+        self.poll_interval = poll_interval
+        self._snapshot = snapshot
+        self.events: List[Dict[str, Any]] = [snapshot['last_event']]
+
+    @property
+    def status(self) -> str:
+        return self._snapshot['status']
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    def wait_for_events(self, seen: int, timeout: float) -> List[Dict[str, Any]]:
+        """Poll the store until the job publishes a change or the timeout passes."""
+        deadline = time.time() + timeout
+        while len(self.events) <= seen and self.active and time.time() < deadline:
+            time.sleep(self.poll_interval)
+            snapshot = self.store.get('job', self.id)
+            if snapshot is not None and snapshot['event_count'] != self._snapshot['event_count']:
+                self._snapshot = snapshot
+                self.events.append(snapshot['last_event'])
+        return self.events[seen:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in self._snapshot.items() if key not in ('event_count', 'last_event')}
+
+
+class JobManager:
+    """Bounded worker pool running pipeline jobs, deduplicating identical in-flight jobs."""
+
+    def __init__(self, runner: Callable[..., Dict[str, Any]], workers: int = JOB_WORKERS,
+                 max_queued: int = JOB_QUEUE_SIZE, store: Optional[ResultCache] = None):
+        self.runner = runner
+        self.workers = workers
+        # Under a multi-process server a poll may reach a process other than the one running the job
+        self.store = store if store is not None else (result_cache if JOB_SHARED_STATE else None)
+        self._published: Dict[str, Tuple[str, float]] = {}
+        # Separate from _lock, which submit, cancel and _work already hold when a job publishes
+        self._publish_lock = threading.Lock()
+        self._queue: 'queue.Queue[Job]' = queue.Queue(maxsize=max_queued)
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        # Workers start on first submit so importing the module has no side effects
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key: str, params: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Queue a job, or return the in-flight job with the same key. Returns (job, created)."""
+        with self._lock:
+            self._ensure_workers()
+            self._prune()
+            existing = self._in_flight.get(key)
+            if existing is not None and existing.active:
+                return existing, False
+
+            job = Job(key, params)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+            self._jobs[job.id] = job
+            if self.store is not None:
+                job.on_change = self._publish
+                self._publish(job)
+                job.deadline.poll(lambda: self.store.get('job_cancel', job.id) is not None, JOB_CANCEL_POLL_SECONDS)
+            self._in_flight[key] = job
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Union[Job, RemoteJob]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.last_seen = time.monotonic()
+        if job is None and self.store is not None:
+            snapshot = self.store.get('job', job_id)
+            if snapshot is not None:
+                return RemoteJob(snapshot, self.store)
+        return job
+
+    def cancel(self, job_id: str, reason: str = 'client') -> Optional[Union[Job, RemoteJob]]:
+        """
+        Cancel a job; None if it is unknown.
+
+        A queued job is finished at once. A running job stops at its next deadline
+        check, which also withdraws its chunks from the batch queue. A job of another
+        process is flagged in the shared store, where its deadline polls for it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return self._cancel_remote(job_id, reason)
+            if not job.active:
+                return job
+            job.deadline.cancel()
+            # New identical requests start a fresh job instead of joining this one
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            queued = job.status == 'queued'
+            if queued:
+                # Under the lock, so no worker starts it meanwhile
+                job.cancelled()
+                JOBS_FINISHED.inc(status=job.status)
+        log_event('job_cancel', job_id=job.id, reason=reason, was=('queued' if queued else 'running'))
+        return job
+
+    def _cancel_remote(self, job_id: str, reason: str) -> Optional[RemoteJob]:
+        if self.store is None:
+            return None
+        snapshot = self.store.get('job', job_id)
+        if snapshot is None:
+            return None
+        job = RemoteJob(snapshot, self.store)
+        if job.active:
+            self.store.set('job_cancel', job_id, reason, ttl=JOB_RETENTION_SECONDS)
+            log_event('job_cancel', job_id=job_id, reason=reason, was='remote')
+        return job
+
+    def _abandon_check(self, job: Job) -> None:
+        if job.active and job.watchers == 0 and time.monotonic() - job.last_seen >= JOB_ABANDON_SECONDS:
+            self.cancel(job.id, reason='abandoned')
+
+    def _publish(self, job: Job) -> None:
+        """Write the job's state to the shared store, throttling progress-only updates."""
+        with self._publish_lock:
+            now = time.time()
+            status, published_at = self._published.get(job.id, (None, 0.0))
+            if job.active and status == job.status and now - published_at < JOB_PUBLISH_INTERVAL:
+                return
+            self._published[job.id] = (job.status, now)
+            if not job.active:
+                self._published.pop(job.id, None)
+            # Also under the lock, so an older snapshot never overwrites a newer one
+            self.store.set('job', job.id, job.snapshot(), ttl=JOB_RETENTION_SECONDS)
+
+    def stream(self, job: Union[Job, RemoteJob], heartbeat: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Yield progress events until the job finishes; None is yielded as a keep-alive.
+
+        When the last stream of a local job closes early, e.g. because the browser went
+        away, the job is cancelled unless a client watches or polls it again within
+        JOB_ABANDON_SECONDS.
+        """
+        local = isinstance(job, Job)
+        if local:
+            job.watchers += 1
+        try:
+            seen = 0
+            while True:
+                events = job.wait_for_events(seen, heartbeat)
+                if not events:
+                    if not job.active:
+                        return
+                    yield None
+                    continue
+                seen += len(events)
+                for event in events:
+                    yield event
+                if not job.active:
+                    return
+        finally:
+            if local:
+                job.watchers -= 1
+                job.last_seen = time.monotonic()
+                if job.active and job.watchers == 0 and JOB_ABANDON_SECONDS > 0:
+                    timer = threading.Timer(JOB_ABANDON_SECONDS, self._abandon_check, (job,))
+                    timer.daemon = True
+                    timer.start()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status == 'queued':
+                    job.start()
+            if job.status != 'running':
+                # Cancelled while it waited
+                self._queue.task_done()
+                continue
+            token = bind_request_id(job.request_id)
+            JOB_WAIT_SECONDS.observe(job.started - job.created)
+            params = {key: value for key, value in job.params.items() if key != 'deadline'}
+            try:
+                job.succeed(self.runner(progress=job.report, deadline=job.deadline, **params))
+            except Cancelled:
+                job.cancelled()
+            except Exception as e:
+                job.fail(str(e), getattr(e, 'status_code', 500))
+            finally:
+                JOBS_FINISHED.inc(status=job.status)
+                log_event('job', job_id=job.id, status=job.status, queued_seconds=round(job.started - job.created, 3),
+                          seconds=round(job.finished - job.started, 3), error=job.error)
+                reset_request_id(token)
+                with self._lock:
+                    if self._in_flight.get(job.key) is job:
+                        del self._in_flight[job.key]
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Forget finished jobs past the retention window. Caller holds the lock."""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'in_flight': len(self._in_flight),
+                'tracked_jobs': len(self._jobs),
+            }
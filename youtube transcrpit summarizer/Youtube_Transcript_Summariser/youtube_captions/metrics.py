@@ -0,0 +1,362 @@
+"""
+Lightweight instrumentation: counters, gauges and histograms rendered in the
+Prometheus text format, per-stage timers, request IDs and structured logs.
+
+Set METRICS_ENABLED=0 to turn stage timing into a shared no-op context manager.
+Set PROFILE_STAGE to a stage name (e.g. summarize_chunks) to sample that stage's
+thread stacks while it runs and write them in collapsed-stack format, ready for
+flamegraph.pl or speedscope, to PROFILE_DIR.
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter as _Tally
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+METRICS_PREFIX = 'ytsum'
+# 'json' writes one JSON object per log line; anything else writes key=value text
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+PROFILE_STAGE = os.environ.get('PROFILE_STAGE')
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.environ.get(
+    'PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'profiles')
+)
+
+# Seconds; spans a cache hit to a multi-hour transcript on CPU
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelValues = Tuple[str, ...]
+
+logger = logging.getLogger('youtube_captions')
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+_stage_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar('stage_timings',
+                                                                                          default=None)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, label string, value) for every series."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}"
+                     for suffix, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [('', _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """A value set directly, or read on every scrape from `function`.
+
+    A labelled gauge's function returns {label values tuple: value}.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is not None:
+            values = self.function()
+            items = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [('', _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: non-cumulative bucket counts (last one is +Inf), sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def total(self, **labels: Any) -> float:
+        """Sum of the observed values."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[1][0] if series else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        samples = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                samples.append(('_bucket', _format_labels(self.labelnames, key, le), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics of the process, rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            # Re-registering returns the existing metric, so module reloads stay harmless
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), function=None) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing gauge callback must not take the whole scrape down
+                logger.warning("metric %s failed: %s", metric.name, e)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram('stage_duration_seconds', 'Wall time of pipeline stages', ['stage'])
+STAGE_ERRORS = registry.counter('stage_errors_total', 'Pipeline stages that raised', ['stage'])
+REQUEST_SECONDS = registry.histogram('http_request_duration_seconds', 'HTTP request latency until the '
+                                     'response is returned (streamed bodies excluded)', ['method', 'endpoint'])
+REQUESTS = registry.counter('http_requests_total', 'HTTP requests served', ['method', 'endpoint', 'status'])
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def bind_request_id(request_id: Optional[str]) -> contextvars.Token:
+    """Attach a request ID to this thread's context; pass the token to `reset_request_id`."""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token) -> None:
+    _request_id.reset(token)
+
+
+@contextmanager
+def record_stages() -> Iterator[Dict[str, float]]:
+    """Collect the seconds of every stage() finished in this context, summed per stage name."""
+    timings: Dict[str, float] = {}
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
+
+def log_event(event: str, severity: int = logging.INFO, **fields: Any) -> None:
+    """Log one structured event carrying the current request ID."""
+    if not logger.isEnabledFor(severity):
+        return
+    record = {'event': event, 'request_id': current_request_id(), **fields}
+    logger.log(severity, event, extra={'fields': record})
+
+
+class _StructuredFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, 'fields', None) or {'event': record.getMessage(),
+                                                     'request_id': current_request_id()}
+        fields = {'time': round(record.created, 3), 'severity': record.levelname.lower(), **fields}
+        if LOG_FORMAT == 'json':
+            return json.dumps(fields, default=str, ensure_ascii=False)
+        return ' '.join(f"{key}={value}" for key, value in fields.items() if value is not None)
+
+
+def configure_logging() -> None:
+    """Send structured events to stderr once per process."""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_StructuredFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+class StackSampler:
+    """
+    Sampling profiler for one thread: its stack is read every `interval` seconds
+    from a background thread and tallied as collapsed stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: _Tally = _Tally()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _StageTimer:
+    __slots__ = ('name', 'fields', 'start', 'sampler')
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+        self.sampler: Optional[StackSampler] = None
+
+    def __enter__(self):
+        if self.name == PROFILE_STAGE:
+            self.sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000).start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(seconds, stage=self.name)
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + seconds
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.name)
+        if self.sampler is not None:
+            self.sampler.stop()
+            path = os.path.join(PROFILE_DIR, f"{self.name}-{current_request_id() or new_request_id()}.folded")
+            self.sampler.write(path)
+            self.fields['profile'] = path
+        log_event('stage', stage=self.name, seconds=round(seconds, 4),
+                  status='error' if exc_type is not None else 'ok', **self.fields)
+        return False
+
+
+_DISABLED = nullcontext()
+
+
+def stage(name: str, **fields: Any):
+    """Time a block as pipeline stage `name`: histogram, error counter and a structured log line."""
+    if not METRICS_ENABLED:
+        return _DISABLED
+    return _StageTimer(name, fields)
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from inference_backends import INFERENCE_BACKEND, ThreadSafeTokenizer, check_backend, load_seq2seq, load_summarizer
+from metrics import log_event, stage
+
+SUMMARIZATION_MODEL = os.environ.get("SUMMARIZATION_MODEL", "facebook/bart-large-cnn")
+MBART_MODEL = "facebook/mbart-large-50-many-to-many-mmt"
+
+# Resident model cap; least recently used models are dropped once exceeded
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get('MODEL_MEMORY_BUDGET_MB', '6144'))
+
+
+def _tensor_bytes(value: Any) -> int:
+    import torch
+
+    if torch.is_tensor(value):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        # Dynamic-quantized Linear layers keep packed (weight, bias) tuples
+        return sum(_tensor_bytes(item) for item in value)
+    return 0
+
+
+def estimate_size(obj: Any) -> int:
+    """Estimate the resident size in bytes of a model, summarizer or (model, tokenizer) pair."""
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_size(item) for item in obj)
+    import torch
+
+    model = getattr(obj, 'model', obj)
+    if isinstance(model, torch.nn.Module):
+        return sum(_tensor_bytes(value) for value in model.state_dict().values())
+    save_dir = getattr(model, 'model_save_dir', None)
+    if save_dir and os.path.isdir(save_dir):
+        # ONNX Runtime sessions hold roughly the size of their graph files
+        return sum(os.path.getsize(os.path.join(save_dir, name))
+                   for name in os.listdir(save_dir) if name.endswith(('.onnx', '.onnx_data')))
+    return 0
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models with LRU eviction by memory budget."""
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._models: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_seconds: Dict[str, float] = {}
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """Return the model registered under `name`, loading it with `loader` on first use."""
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._hits += 1
+                return self._models[name][0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and then hit the cache
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self._hits += 1
+                    return self._models[name][0]
+                self._misses += 1
+
+            start = time.perf_counter()
+            with stage('model_load', model=name):
+                model = loader()
+            elapsed = time.perf_counter() - start
+            size = estimate_size(model)
+
+            with self._lock:
+                self._load_seconds[name] = self._load_seconds.get(name, 0.0) + elapsed
+                self._models[name] = (model, size)
+                self._evict(keep=name)
+            return model
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used models until the budget is met. Caller holds the lock."""
+        while self.resident_bytes() > self.memory_budget_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            del self._models[oldest]
+            self._evictions += 1
+            log_event('model_evict', model=oldest, resident_bytes=self.resident_bytes())
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, cumulative load times and resident models."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'load_seconds': dict(self._load_seconds),
+                'resident_bytes': self.resident_bytes(),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'resident_models': list(self._models.keys()),
+            }
+
+
+registry = ModelRegistry(DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+def get_summarizer(model_name: str = SUMMARIZATION_MODEL, backend: Optional[str] = None):
+    """Return the shared summarizer for a model on the configured inference backend."""
+    backend = check_backend(backend or INFERENCE_BACKEND)
+
+    def load():
+        log_event('model_load', task='summarization', model=model_name, backend=backend)
+        return load_summarizer(model_name, backend)
+    return registry.get(f"summarization:{backend}:{model_name}", load)
+
+
+def get_marian(model_name: str, backend: Optional[str] = None):
+    """Return the shared (model, tokenizer) pair for a Helsinki-NLP Marian model."""
+    backend = check_backend(backend or INFERENCE_BACKEND)
+
+    def load():
+        from transformers import MarianMTModel, MarianTokenizer
+
+        log_event('model_load', task='translation', model=model_name, backend=backend)
+        return load_seq2seq(model_name, backend, MarianMTModel), ThreadSafeTokenizer(MarianTokenizer.from_pretrained(model_name))
+    return registry.get(f"marian:{backend}:{model_name}", load)
+
+
+def get_mbart(model_name: str = MBART_MODEL, backend: Optional[str] = None):
+    """Return the shared (model, tokenizer) pair for the mBART-50 translation model."""
+    backend = check_backend(backend or INFERENCE_BACKEND)
+
+    def load():
+        from transformers import MBart50TokenizerFast
+
+        log_event('model_load', task='translation', model=model_name, backend=backend)
+        model = load_seq2seq(model_name, backend)
+        tokenizer = MBart50TokenizerFast.from_pretrained(model_name)
+        # Source language is fixed, so the shared tokenizer is never mutated per request
+        tokenizer.src_lang = "en_XX"
+        return model, ThreadSafeTokenizer(tokenizer)
+    return registry.get(f"mbart:{backend}:{model_name}", load)
+
+
+def warm_models(names: Optional[str] = None) -> None:
+    """Load models ahead of the first request, e.g. WARM_MODELS=summarization,mbart."""
+    names = names if names is not None else os.environ.get('WARM_MODELS', '')
+    for name in filter(None, (n.strip() for n in names.split(','))):
+        if name == 'summarization':
+            get_summarizer()
+        elif name == 'mbart':
+            get_mbart()
+        elif name.startswith('Helsinki-NLP/'):
+            get_marian(name)
+        else:
+            log_event('model_warm_error', severity=logging.WARNING, model=name, error='unknown model')
@@ -0,0 +1,258 @@
+import base64
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+
+from dashboard_analytics import CHART_FORMATS, DashboardAnalytics
+from deadline import Deadline
+from get_youtube_captions_combined import extract_video_id, get_english_captions
+from inference_backends import INFERENCE_BACKEND
+from metrics import log_event, record_stages, stage
+from process_captions import fetch_transcript, summary_text
+from result_cache import CacheMapping, cache_key, result_cache
+from search_index import search_index
+from summarize_transcript import SUMMARY_CONFIGS, ProgressCallback, summarize_incremental, summarize_text
+from transcript import Transcript
+from translation import translate_summary
+
+# Share of a deadline's remaining time given to summarization when the summary is also translated
+SUMMARY_DEADLINE_SHARE = 0.85
+
+
+class PipelineError(Exception):
+    """Raised when a video cannot be processed; carries the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_transcript(video_url: str, video_id: Optional[str], session=None) -> Dict[str, Any]:
+    """
+    Return the title and structured transcript, fetching captions only on a cache miss.
+
+    Transcripts of known videos are also queued for the search index, which skips
+    versions it already holds.
+    """
+    if video_id:
+        cached = result_cache.get('transcript', video_id)
+        title = result_cache.get('title', video_id)
+        if isinstance(cached, dict) and title is not None:
+            transcript = Transcript.from_dict(cached)
+            search_index.add(video_id, title, transcript)
+            return {'title': title, 'transcript': transcript}
+
+    captions_url, title = get_english_captions(video_url)
+    if not captions_url:
+        raise PipelineError('No English captions found for this video', 404)
+    # Captions stream straight into the structured form shared by every later stage
+    transcript = load_transcript(captions_url, session)
+    if not len(transcript):
+        raise PipelineError('Failed to process captions', 500)
+
+    if video_id:
+        result_cache.set('title', video_id, title)
+        result_cache.set('transcript', video_id, transcript.to_dict())
+        search_index.add(video_id, title, transcript)
+    return {'title': title, 'transcript': transcript}
+
+
+def load_transcript(captions_url: str, session=None) -> Transcript:
+    """Stream a captions document into a Transcript; a failed fetch or parse is a PipelineError."""
+    try:
+        return fetch_transcript(captions_url, session)
+    except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+        log_event('caption_fetch_error', severity=logging.ERROR, error=str(e))
+        raise PipelineError('Failed to process captions', 500)
+
+
+def summary_cache_key(video_id: Optional[str], transcript: Transcript, summary_length: str) -> str:
+    """Key for a summary: the video (or its text), level, backend and the level's settings."""
+    return cache_key(video_id or transcript.text, summary_length, INFERENCE_BACKEND,
+                     SUMMARY_CONFIGS.get(summary_length))
+
+
+def translate_cached(summary: str, language: str, progress: Optional[ProgressCallback] = None,
+                     deadline: Optional[Deadline] = None) -> str:
+    """
+    Translate a summary, keyed by its content and the target language.
+
+    Failures and translations cut short by the deadline are not cached.
+    """
+    deadline = deadline or Deadline()
+    translation_key = cache_key(summary, language)
+    translated = result_cache.get('translation', translation_key)
+    if translated is None:
+        degradations = len(deadline.degradations)
+        translated = translate_summary(summary, language, progress, deadline)
+        if not translated.startswith('[Translation') and len(deadline.degradations) == degradations:
+            result_cache.set('translation', translation_key, translated)
+    return translated
+
+
+def job_key(video_url: str, summary_length: str, language: str, deadline: Optional[float] = None) -> str:
+    """Key identifying identical requests, used to share one in-flight job between them."""
+    return cache_key(extract_video_id(video_url) or video_url, summary_length, language, deadline)
+
+
+def process_video(video_url: str, summary_length: str = 'standard', language: str = 'english',
+                  progress: Optional[ProgressCallback] = None,
+                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Run the fetch, summarize and translate pipeline for a video, reusing cached stages.
+
+    Captions, the structured transcript, each summary level and each translation are
+    cached separately, so a new language for a known video only pays for translation.
+    `progress(stage, current, total)` is called as the stages advance. With a
+    `deadline`, summarization and translation degrade to finish in time; the steps
+    taken are returned as `degradations`, results shortened by them are not cached,
+    and a cancelled deadline stops the run with Cancelled. `timings` gives the
+    seconds spent in each stage.
+    """
+    report = progress or (lambda stage, current=0, total=0: None)
+    deadline = deadline or Deadline()
+    started = time.perf_counter()
+    with record_stages() as timings:
+        video_id = extract_video_id(video_url)
+        report('captions', 0, 1)
+        result = get_transcript(video_url, video_id)
+        transcript = result['transcript']
+        deadline.check('captions')
+
+        # Generate summary; the key covers the model, backend and level settings that shape it
+        summary_key = summary_cache_key(video_id, transcript, summary_length)
+        summary = result_cache.get('summary', summary_key)
+        if summary is None:
+            degradations = len(deadline.degradations)
+            # Leave part of the time for translation
+            budget = deadline.share(SUMMARY_DEADLINE_SHARE) if language != 'english' else deadline
+            summary = summarize_text(transcript, summary_length, progress=progress, deadline=budget)
+            if len(deadline.degradations) == degradations:
+                result_cache.set('summary', summary_key, summary)
+
+        # Translate summary if needed
+        if language != 'english':
+            report('translate', 0, 1)
+            summary = translate_cached(summary, language, progress, deadline)
+
+    timings['total'] = time.perf_counter() - started
+    return {
+        'title': result['title'],
+        'transcript': transcript.to_display_text(),
+        'summary': summary,
+        'degradations': deadline.degradations,
+        'timings': {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+
+
+def rolling_summary(video_url: str, summary_length: str = 'standard', offset: Optional[int] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Refresh the rolling summary of a live stream or a video whose captions are still growing.
+
+    Captions are fetched fresh, and only the transcript words from `offset` on are
+    summarized into the stored rolling state; pass the `offset` returned by the previous
+    call. With no offset the stored state is continued; offset 0, or one that does not
+    match the stored state, starts over, which still reuses every unchanged chunk summary.
+    """
+    config = SUMMARY_CONFIGS.get(summary_length)
+    if config is None:
+        raise PipelineError(f"Unknown summary length '{summary_length}'", 400)
+    video_id = extract_video_id(video_url)
+    captions_url, title = get_english_captions(video_url)
+    if not captions_url:
+        raise PipelineError('No English captions found for this video', 404)
+    transcript = load_transcript(captions_url)
+    if video_id:
+        # The stream so far is searchable; each refresh replaces the indexed version
+        search_index.add(video_id, title, transcript)
+
+    # The offset counts words, not segments: normalization keeps appending words to the
+    # last caption until the next one starts, so only a word offset is stable across refreshes.
+    # Restoring sentence ends changes no word counts, so the offset holds for the summarized text too
+    words = summary_text(transcript).split()
+    state_key = cache_key(video_id or video_url, summary_length, INFERENCE_BACKEND, config, 'words')
+    stored = result_cache.get('rolling', state_key)
+    if offset is None and stored is not None:
+        offset = stored['offset']
+    reset = stored is None or offset != stored['offset'] or offset > len(words)
+    start = 0 if reset else offset
+
+    # Segments holding new words, counting the last one seen before if it grew
+    new_segments, seen = 0, len(words)
+    for i in range(len(transcript) - 1, -1, -1):
+        if seen <= start:
+            break
+        new_segments += 1
+        seen -= len(transcript.segment_text(i).split())
+
+    # Chunk and reduce-node summaries are shared by every video summarized with this model
+    memo = CacheMapping(result_cache, 'chunk_summary', cache_key(config['model'], INFERENCE_BACKEND) + ':')
+    new_text = ' '.join(words[start:])
+    with stage('rolling_summary', level=summary_length, segments=new_segments, words=len(words) - start):
+        state = summarize_incremental(new_text, summary_length, None if reset else stored['state'], memo,
+                                      progress=progress)
+    result_cache.set('rolling', state_key, {'offset': len(words), 'state': state})
+    return {
+        'title': title,
+        'summary': state['summary'],
+        'offset': len(words),
+        'new_segments': new_segments,
+        'reset': reset,
+    }
+
+
+_analytics: Optional[DashboardAnalytics] = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> DashboardAnalytics:
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = DashboardAnalytics()
+        return _analytics
+
+
+def analyze_video(video_url: str, images: Iterable[str] = (), image_format: str = 'png',
+                  width: int = 1000, height: int = 400) -> Dict[str, Any]:
+    """
+    Return the numeric dashboard series for a video, plus any requested chart images.
+
+    Series and images are cached per transcript content hash; images are only rendered
+    when asked for and are cached per chart, format and size.
+    """
+    result = get_transcript(video_url, extract_video_id(video_url))
+    transcript = result['transcript']
+    digest = transcript.digest()
+    analytics = get_analytics()
+
+    series = result_cache.get('analytics', digest)
+    if series is None:
+        with stage('analytics'):
+            series = analytics.series(transcript)
+        result_cache.set('analytics', digest, series)
+
+    rendered = {}
+    for chart in images:
+        key = cache_key(digest, chart, image_format, width, height)
+        image = result_cache.get('chart', key)
+        if image is None:
+            try:
+                with stage('chart', chart=chart, format=image_format):
+                    data = analytics.render_chart(transcript, chart, image_format, width, height)
+            except ValueError as e:
+                raise PipelineError(str(e), 400)
+            image = base64.b64encode(data).decode('ascii')
+            result_cache.set('chart', key, image)
+        rendered[chart] = image
+
+    response = {'title': result['title'], 'transcript_hash': digest, **series}
+    if rendered:
+        response['images'] = rendered
+        response['image_mimetype'] = CHART_FORMATS[image_format]
+    return response
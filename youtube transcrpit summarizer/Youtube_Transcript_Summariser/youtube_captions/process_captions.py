@@ -1,6 +1,39 @@
+import codecs
 import json
+import os
+import re
 import requests
-from datetime import datetime
+from collections import deque
+from caption_client import get_caption_client
+from metrics import log_event, registry, stage
+from transcript import Transcript
+
+# CAPTION_NORMALIZE=0 keeps caption segments, and the text summarized, exactly as YouTube sends them
+CAPTION_NORMALIZE = os.environ.get('CAPTION_NORMALIZE', '1') != '0'
+# Longest run of words compared when removing text repeated from earlier captions
+MAX_REPEAT_WORDS = 24
+# Silence after a caption's words that ends an unpunctuated sentence
+SENTENCE_PAUSE_MS = 600
+# Rough speaking time per word, to tell when a caption's words end within its display time
+MS_PER_WORD = 350
+# Unpunctuated runs get a period at a pause once this long, and regardless of pauses at the maximum
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 30
+
+# [Music], [Applause], (laughter), music notes and ">>" speaker changes
+NON_SPEECH = re.compile(
+    r'\[[^\[\]]{0,40}\]|\((?:music|applause|laughter|laughs|cheering|inaudible|silence)\)|[\u266a\u266b]+|>>',
+    re.IGNORECASE
+)
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+# Words a sentence does not end on, so no period is restored after them
+CONTINUATIONS = frozenset(
+    "a an and as at because but by for from i if in is of on or so than that the to was we were with you".split()
+)
+WORD_KEY = re.compile(r"[^\w']+")
+
+CAPTION_WORDS_REMOVED = registry.counter('caption_words_removed_total',
+                                         'Caption words dropped by normalization', ['reason'])
 
 def format_timestamp(milliseconds):
     """Convert milliseconds to readable timestamp format HH:MM:SS"""
@@ -10,6 +43,357 @@ def format_timestamp(milliseconds):
     seconds = seconds % 60
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
+def caption_segments(events):
+    """
+    Turn JSON3 caption events into (start_ms, duration_ms, text) segments.
+    
+    Args:
+        events (iterable): JSON3 event objects
+    
+    Yields:
+        tuple: (start time, duration in milliseconds, caption text) for each non-empty event
+    """
+    for event in events:
+        if 'segs' in event and event.get('segs'):
+            # Combine all segments into one line
+            text = ' '.join(
+                seg.get('utf8', '') for seg in event['segs']
+                if seg.get('utf8')
+            ).strip()
+            
+            if text:  # Only yield non-empty captions
+                yield event.get('tStartMs', 0), event.get('dDurationMs', 0), text
+
+class NormalizeStats:
+    """Counts from one normalization pass; words are whitespace-separated tokens."""
+
+    def __init__(self):
+        self.segments_in = 0
+        self.segments_out = 0
+        self.words_in = 0
+        self.words_out = 0
+        self.marker_words = 0
+        self.repeated_words = 0
+        self.merged_segments = 0
+        self.sentences_closed = 0
+
+    @property
+    def words_removed(self):
+        return self.words_in - self.words_out
+
+    def to_dict(self):
+        return dict(vars(self), words_removed=self.words_removed)
+
+def _repeated_prefix(recent, keys):
+    """Length of the longest start of `keys` that repeats the end of `recent`."""
+    recent = list(recent)
+    for k in range(min(len(recent), len(keys)), 0, -1):
+        # Single words are only dropped when they are the whole caption, so real repeats survive
+        if (k >= 2 or k == len(keys)) and recent[len(recent) - k:] == keys[:k]:
+            return k
+    return 0
+
+def normalize_segments(segments, stats=None):
+    """
+    Clean auto-caption segments in one linear, streaming pass.
+    
+    Non-speech markers are stripped, words repeated from the end of the previous
+    captions (rolling two-line windows) are dropped, captions starting together or
+    holding nothing new are merged and overlapping display times are trimmed. The
+    words themselves are left as spoken; punctuate_segments adds sentence ends for
+    the summarizer only.
+    
+    Args:
+        segments (iterable): (start_ms, duration_ms, text) tuples from caption_segments
+        stats (NormalizeStats): Filled in with what was removed, if given
+    
+    Yields:
+        tuple: (start time, duration in milliseconds, caption text) for each caption with speech
+    """
+    stats = stats if stats is not None else NormalizeStats()
+    recent = deque(maxlen=MAX_REPEAT_WORDS)
+    pending = None  # [start, end, words] of the caption waiting for the next one's start
+
+    def close(caption, next_start):
+        start, end, words = caption
+        if next_start is not None and start < next_start < end:
+            end = next_start
+        stats.segments_out += 1
+        stats.words_out += len(words)
+        return start, end - start, ' '.join(words)
+
+    for start, duration, text in segments:
+        stats.segments_in += 1
+        words = text.split()
+        stats.words_in += len(words)
+        speech = NON_SPEECH.sub(' ', text).split()
+        stats.marker_words += len(words) - len(speech)
+        keys = [WORD_KEY.sub('', word.lower()) for word in speech]
+        repeated = _repeated_prefix(recent, keys)
+        stats.repeated_words += repeated
+        speech = speech[repeated:]
+        end = start + duration
+        if pending is not None and (not speech or start <= pending[0]):
+            # Nothing new, or the same moment: extend the waiting caption
+            pending[1] = max(pending[1], end)
+            pending[2].extend(speech)
+            stats.merged_segments += 1
+        elif speech:
+            if pending is not None:
+                yield close(pending, start)
+            pending = [start, end, speech]
+        recent.extend(keys[repeated:])
+    if pending is not None:
+        yield close(pending, None)
+
+    for reason, count in (('marker', stats.marker_words), ('repeat', stats.repeated_words)):
+        if count:
+            CAPTION_WORDS_REMOVED.inc(count, reason=reason)
+    log_event('caption_normalize', **stats.to_dict())
+
+def punctuate_segments(segments, stats=None):
+    """
+    Restore sentence ends in unpunctuated speech, streaming.
+    
+    A caption gets a period when a pause follows its words, or once MAX_SENTENCE_WORDS
+    words have gone by without one, and the next word is capitalized, so sentence
+    splitting finds boundaries. The pauses are estimated from MS_PER_WORD, so this
+    is only applied to the text given to the summarizer, never to displayed or
+    indexed captions. Word counts are unchanged.
+    
+    Args:
+        segments (iterable): (start_ms, duration_ms, text) tuples from normalize_segments
+        stats (NormalizeStats): sentences_closed is counted in it, if given
+    
+    Yields:
+        tuple: (start time, duration in milliseconds, caption text)
+    """
+    pending = None
+    since_end = 0  # Words since the last sentence end
+    capitalize = False
+
+    def close(caption, next_start):
+        nonlocal since_end, capitalize
+        start, duration, text = caption
+        words = text.split()
+        if capitalize:
+            words[0] = words[0][:1].upper() + words[0][1:]
+        for i in range(len(words) - 1, -1, -1):
+            if SENTENCE_END.search(words[i]):
+                since_end = len(words) - 1 - i
+                break
+        else:
+            since_end += len(words)
+        capitalize = False
+        spoken_end = start + min(duration, len(words) * MS_PER_WORD)
+        pause = next_start - spoken_end if next_start is not None else SENTENCE_PAUSE_MS
+        ends = since_end >= MAX_SENTENCE_WORDS or (since_end >= MIN_SENTENCE_WORDS and pause >= SENTENCE_PAUSE_MS)
+        if ends and WORD_KEY.sub('', words[-1].lower()) not in CONTINUATIONS:
+            words[-1] = words[-1].rstrip(',;:-') + '.'
+            since_end = 0
+            capitalize = True
+            if stats is not None:
+                stats.sentences_closed += 1
+        return start, duration, ' '.join(words)
+
+    for segment in segments:
+        if not segment[2].strip():
+            continue
+        if pending is not None:
+            yield close(pending, segment[0])
+        pending = segment
+    if pending is not None:
+        yield close(pending, None)
+
+def summary_text(transcript):
+    """
+    A transcript's plain text as given to the summarizer.
+    
+    Args:
+        transcript (Transcript): Normalized caption segments
+    
+    Returns:
+        str: The plain text with sentence ends restored, unless CAPTION_NORMALIZE=0
+    """
+    if not CAPTION_NORMALIZE:
+        return transcript.plain_text()
+    texts = (text for _, _, text in punctuate_segments(transcript.segments()))
+    return ' '.join(' '.join(texts).split())
+
+def speech_segments(events):
+    """
+    Caption segments of JSON3 events, normalized unless CAPTION_NORMALIZE=0.
+    
+    Args:
+        events (iterable): JSON3 event objects
+    
+    Yields:
+        tuple: (start time, duration in milliseconds, caption text)
+    """
+    if CAPTION_NORMALIZE:
+        return normalize_segments(caption_segments(events))
+    return caption_segments(events)
+
+def caption_records(events):
+    """
+    Turn JSON3 caption events into (start_ms, text) records.
+    
+    Args:
+        events (iterable): JSON3 event objects
+    
+    Yields:
+        tuple: (start time in milliseconds, caption text) for each non-empty event
+    """
+    for start_ms, _, text in speech_segments(events):
+        yield start_ms, text
+
+def format_captions(caption_data):
+    """
+    Convert parsed JSON3 caption data to readable text format.
+    
+    Args:
+        caption_data (dict): Parsed JSON3 captions document
+    
+    Returns:
+        str: Formatted captions text
+    """
+    return '\n\n'.join(
+        f"[{format_timestamp(start_ms)}] {text}"
+        for start_ms, text in caption_records(caption_data.get('events', []))
+    )
+
+def iter_json_array(chunks, key='events'):
+    """
+    Incrementally parse the elements of a top-level JSON array from text chunks.
+    
+    Only the element being decoded is buffered, so documents far larger than
+    memory-friendly sizes can be walked one element at a time.
+    
+    Args:
+        chunks (iterable): Decoded text chunks of the JSON document
+        key (str): Name of the top-level array to walk
+    
+    Yields:
+        object: Each decoded array element
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    marker = f'"{key}"'
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, exhausted
+        for chunk in chunks:
+            if chunk:
+                buffer += chunk
+                return True
+        exhausted = True
+        return False
+
+    # Find the start of the array
+    while True:
+        found = buffer.find(marker)
+        if found != -1:
+            match = re.compile(r'\s*:\s*\[').match(buffer, found + len(marker))
+            if match:
+                buffer = buffer[match.end():]
+                break
+            if len(buffer) - found > len(marker) + 64:
+                raise json.JSONDecodeError(f'Expected array for "{key}"', buffer, found)
+        elif len(buffer) > len(marker):
+            # Keep only a tail that could still hold the start of the marker
+            buffer = buffer[-len(marker):]
+        if not read_more():
+            return
+
+    pos = 0
+    while True:
+        # Skip separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or not read_more():
+                break
+        if pos >= len(buffer):
+            raise json.JSONDecodeError('Unterminated array', buffer, pos)
+        if buffer[pos] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element is split across chunks; read more and retry
+            if exhausted or not read_more():
+                raise
+            continue
+        yield element
+        pos = end
+        # Drop the consumed prefix so the buffer stays small
+        if pos > 65536:
+            buffer = buffer[pos:]
+            pos = 0
+
+def iter_caption_events(json_url, chunk_size=65536, session=None):
+    """
+    Stream raw JSON3 event objects from a captions URL as they arrive.
+    
+    Args:
+        json_url (str): URL to the JSON3 captions data
+        chunk_size (int): Bytes read from the response at a time
+        session (CaptionClient): Client to fetch with, the shared pooled client by default
+    
+    Yields:
+        dict: One JSON3 event
+    """
+    with (session or get_caption_client()).get(json_url, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+        chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size=chunk_size))
+        yield from iter_json_array(chunks)
+
+def iter_caption_records(json_url, chunk_size=65536):
+    """
+    Stream (start_ms, text) records from a JSON3 captions URL as they arrive.
+    
+    Args:
+        json_url (str): URL to the JSON3 captions data
+        chunk_size (int): Bytes read from the response at a time
+    
+    Yields:
+        tuple: (start time in milliseconds, caption text)
+    """
+    yield from caption_records(iter_caption_events(json_url, chunk_size))
+
+def fetch_transcript(json_url, session=None):
+    """
+    Stream a JSON3 captions URL into a structured Transcript.
+    
+    Events are parsed and normalized as they arrive, so the document's events are
+    never held in memory at once.
+    
+    Args:
+        json_url (str): URL to the JSON3 captions data
+        session (CaptionClient): Client to fetch with, the shared pooled client by default
+    
+    Returns:
+        Transcript: Segments with millisecond start times and durations
+    """
+    with stage('caption_fetch'):
+        return Transcript.from_segments(speech_segments(iter_caption_events(json_url, session=session)))
+
+def iter_transcript_lines(json_url):
+    """
+    Stream formatted "[HH:MM:SS] text" transcript lines from a JSON3 captions URL.
+    
+    Args:
+        json_url (str): URL to the JSON3 captions data
+    
+    Yields:
+        str: One formatted caption line
+    """
+    for start_ms, text in iter_caption_records(json_url):
+        yield f"[{format_timestamp(start_ms)}] {text}"
+
 def process_captions(json_url):
     """
     Process the JSON3 format captions and convert to readable text format.
@@ -21,30 +405,8 @@ def process_captions(json_url):
         str: Formatted captions text
     """
     try:
-        # Fetch the JSON data from the URL
-        response = requests.get(json_url)
-        response.raise_for_status()
-        caption_data = response.json()
-        
-        # Process events (actual captions)
-        formatted_captions = []
-        
-        if 'events' in caption_data:
-            for event in caption_data['events']:
-                if 'segs' in event and event.get('segs'):
-                    # Get the start time
-                    start_time = format_timestamp(event.get('tStartMs', 0))
-                    
-                    # Combine all segments into one line
-                    text = ' '.join(
-                        seg.get('utf8', '') for seg in event['segs']
-                        if seg.get('utf8')
-                    ).strip()
-                    
-                    if text:  # Only add non-empty captions
-                        formatted_captions.append(f"[{start_time}] {text}")
-        
-        return '\n\n'.join(formatted_captions)
+        # Stream the captions instead of loading the whole document
+        return '\n\n'.join(iter_transcript_lines(json_url))
     
     except requests.exceptions.RequestException as e:
         print(f"Error fetching captions: {str(e)}")
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    'RESULT_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'results.sqlite3')
+)
+DEFAULT_MEMORY_BYTES = int(os.environ.get('RESULT_CACHE_MEMORY_MB', '64')) * 1024 * 1024
+DEFAULT_DISK_BYTES = int(os.environ.get('RESULT_CACHE_DISK_MB', '1024')) * 1024 * 1024
+
+DAY = 24 * 60 * 60
+
+# Time-to-live per kind of entry, in seconds
+NAMESPACE_TTLS: Dict[str, int] = {
+    'title': 7 * DAY,
+    'transcript': 7 * DAY,
+    'summary': 30 * DAY,
+    'translation': 30 * DAY,
+    'analytics': 30 * DAY,
+    'chart': 7 * DAY,
+    'chunk_summary': 7 * DAY,
+    'rolling': 7 * DAY,
+}
+
+# Written by one process and read by others while they change, so never served from memory
+SHARED_NAMESPACES = frozenset({'job', 'job_cancel'})
+
+
+def cache_key(*parts: Any) -> str:
+    """Build a content-addressed key from the parts that determine a result."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-level cache: an in-memory LRU in front of a SQLite store, both size bounded."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: 'OrderedDict[str, Tuple[Any, float, int]]' = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self._db.commit()
+        self._disk_used = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _connect(self) -> None:
+        # Several server processes may write at once; wait for the lock instead of failing
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+
+    def reopen(self) -> None:
+        """Open a fresh connection; a SQLite connection must not be used across fork()."""
+        self._lock = threading.Lock()
+        if self.path != ':memory:':
+            self._connect()
+
+    def _count(self, namespace: str, field: str) -> None:
+        counters = self._stats.setdefault(namespace, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})
+        counters[field] += 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value or None if missing or expired."""
+        full_key = f"{namespace}:{key}"
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(full_key) if namespace not in SHARED_NAMESPACES else None
+            if entry is not None:
+                value, expires, size = entry
+                if expires > now:
+                    self._memory.move_to_end(full_key)
+                    self._count(namespace, 'memory_hits')
+                    return value
+                self._drop_memory(full_key)
+
+            row = self._db.execute(
+                'SELECT value, size, expires FROM entries WHERE key = ?', (full_key,)
+            ).fetchone()
+            if row is None or row[2] <= now:
+                if row is not None:
+                    self._delete_disk(full_key, row[1])
+                    self._db.commit()
+                self._count(namespace, 'misses')
+                return None
+
+            self._db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, full_key))
+            self._db.commit()
+            value = json.loads(row[0])
+            if namespace not in SHARED_NAMESPACES:
+                self._put_memory(full_key, value, row[2], row[1])
+            self._count(namespace, 'disk_hits')
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a JSON-serialisable value in both levels."""
+        full_key = f"{namespace}:{key}"
+        now = time.time()
+        expires = now + (ttl if ttl is not None else NAMESPACE_TTLS.get(namespace, DAY))
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode('utf-8'))
+        with self._lock:
+            old = self._db.execute('SELECT size FROM entries WHERE key = ?', (full_key,)).fetchone()
+            if old is not None:
+                self._disk_used -= old[0]
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (key, namespace, value, size, expires, accessed)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (full_key, namespace, encoded, size, expires, now)
+            )
+            self._disk_used += size
+            self._evict_disk(now)
+            self._db.commit()
+            if namespace not in SHARED_NAMESPACES:
+                self._put_memory(full_key, value, expires, size)
+
+    def keys(self, namespace: str) -> List[str]:
+        """Keys of the unexpired entries in a namespace, e.g. to rebuild an index from them."""
+        prefix = f"{namespace}:"
+        with self._lock:
+            rows = self._db.execute('SELECT key FROM entries WHERE namespace = ? AND expires > ?',
+                                    (namespace, time.time())).fetchall()
+        return [key[len(prefix):] for key, in rows]
+
+    def _put_memory(self, full_key: str, value: Any, expires: float, size: int) -> None:
+        if size > self.memory_bytes:
+            return
+        self._drop_memory(full_key)
+        self._memory[full_key] = (value, expires, size)
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+
+    def _drop_memory(self, full_key: str) -> None:
+        entry = self._memory.pop(full_key, None)
+        if entry is not None:
+            self._memory_used -= entry[2]
+
+    def _delete_disk(self, full_key: str, size: int) -> None:
+        self._db.execute('DELETE FROM entries WHERE key = ?', (full_key,))
+        self._disk_used -= size
+
+    def _evict_disk(self, now: float) -> None:
+        """Purge expired rows, then least recently accessed rows until under budget."""
+        if self._disk_used <= self.disk_bytes:
+            return
+        self._db.execute('DELETE FROM entries WHERE expires <= ?', (now,))
+        self._disk_used = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        target = int(self.disk_bytes * 0.9)
+        rows = self._db.execute('SELECT key, size FROM entries ORDER BY accessed')
+        to_delete = []
+        for key, size in rows:
+            if self._disk_used <= target:
+                break
+            to_delete.append((key,))
+            self._disk_used -= size
+        self._db.executemany('DELETE FROM entries WHERE key = ?', to_delete)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and hit rate per namespace plus storage usage."""
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._stats.items():
+                hits = counters['memory_hits'] + counters['disk_hits']
+                total = hits + counters['misses']
+                namespaces[namespace] = dict(counters, hit_rate=hits / total if total else 0.0)
+            return {
+                'namespaces': namespaces,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_used,
+                'memory_budget_bytes': self.memory_bytes,
+                'disk_bytes': self._disk_used,
+                'disk_budget_bytes': self.disk_bytes,
+            }
+
+
+class CacheMapping:
+    """Dict-style view of one namespace under a key prefix, e.g. to memoize chunk summaries."""
+
+    def __init__(self, cache: ResultCache, namespace: str, prefix: str = ''):
+        self.cache = cache
+        self.namespace = namespace
+        self.prefix = prefix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.cache.get(self.namespace, self.prefix + key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.cache.set(self.namespace, self.prefix + key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+result_cache = ResultCache()
+
+# Preforking servers (gunicorn --preload) import this module before forking workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=result_cache.reopen)
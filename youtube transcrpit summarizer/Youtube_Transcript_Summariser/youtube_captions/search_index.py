@@ -0,0 +1,369 @@
+"""
+Full-text search over processed transcripts, with the time each hit was said.
+
+Transcripts are written to a SQLite FTS5 index as the pipeline produces them.
+Consecutive caption segments are grouped into passages of about PASSAGE_WORDS
+words, so phrases split across captions are still found; each passage keeps the
+character offset and start time of its segments, and a hit's timestamp is the
+start of the segment holding its first matched term. Very common terms match
+too many passages to score them all, so their hits are ranked among the newest
+SEARCH_RANK_CANDIDATES matches. Writes are queued and
+flushed in one transaction per batch of videos by a background thread, and a
+video is only re-indexed when its transcript changes.
+
+Usage:
+    python search_index.py backfill     # index every transcript in the result cache
+    python search_index.py search "query" [--limit 20] [--video VIDEO_ID]
+"""
+import argparse
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import log_event, registry
+from transcript import Transcript
+
+SEARCH_INDEX = os.environ.get('SEARCH_INDEX', '1') != '0'
+SEARCH_INDEX_PATH = os.environ.get(
+    'SEARCH_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'search.sqlite3')
+)
+# Videos written per transaction, and the longest a queued video waits for its batch
+SEARCH_BATCH_VIDEOS = int(os.environ.get('SEARCH_BATCH_VIDEOS', '32'))
+SEARCH_FLUSH_SECONDS = float(os.environ.get('SEARCH_FLUSH_SECONDS', '2'))
+# Segments are grouped into passages of about this many words
+PASSAGE_WORDS = 32
+# Passage rowids are (video rowid << PASSAGE_BITS) | passage number, so a video's passages are one rowid range
+PASSAGE_BITS = 20
+MAX_SEARCH_LIMIT = 100
+# BM25 is scored for every match; queries matching more passages are ranked among their newest this many
+SEARCH_RANK_CANDIDATES = int(os.environ.get('SEARCH_RANK_CANDIDATES', '5000'))
+
+# Words or "quoted phrases", each optionally ending in * for a prefix match
+QUERY_PART = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+QUERY_WORD = re.compile(r'\w+')
+HIT_START, HIT_END = '\x02', '\x03'
+
+SEARCH_SECONDS = registry.histogram('search_query_seconds', 'Full-text search query latency',
+                                    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+SEARCH_INDEXED = registry.counter('search_indexed_total', 'Transcripts written to the search index', ['result'])
+
+
+def match_expression(query: str) -> str:
+    """
+    Turn user input into an FTS5 query: every word or "quoted phrase" must appear in the passage.
+
+    Each part is quoted, so FTS5 operators and punctuation in the input are plain text.
+    """
+    parts = []
+    for phrase, phrase_prefix, term in QUERY_PART.findall(query):
+        words = QUERY_WORD.findall(phrase or term)
+        if words:
+            prefix = phrase_prefix or ('*' if term.endswith('*') else '')
+            parts.append('"' + ' '.join(words) + '"' + prefix)
+    return ' '.join(parts)
+
+
+def build_passages(transcript: Transcript) -> List[Tuple[str, str]]:
+    """(text, starts) per passage, where starts is a JSON list of [char offset, start_ms] per segment."""
+    passages = []
+    texts: List[str] = []
+    starts: List[List[int]] = []
+    length = words = 0
+    for start, _, text in transcript.segments():
+        text = ' '.join(text.split())
+        if not text:
+            continue
+        starts.append([length, start])
+        texts.append(text)
+        length += len(text) + 1
+        words += text.count(' ') + 1
+        if words >= PASSAGE_WORDS:
+            passages.append((' '.join(texts), json.dumps(starts, separators=(',', ':'))))
+            texts, starts = [], []
+            length = words = 0
+    if texts:
+        passages.append((' '.join(texts), json.dumps(starts, separators=(',', ':'))))
+    return passages[:1 << PASSAGE_BITS]
+
+
+def hit_start_ms(highlighted: str, starts: str) -> int:
+    """Start of the segment holding the first highlighted term of a passage."""
+    segments = json.loads(starts)
+    position = highlighted.find(HIT_START)
+    index = bisect_right([offset for offset, _ in segments], max(position, 0)) - 1
+    return segments[max(index, 0)][1]
+
+
+def watch_url(video_id: str, start_ms: int) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}&t={start_ms // 1000}s"
+
+
+class SearchIndex:
+    """SQLite FTS5 index of transcript passages, fed in batches from a background thread."""
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH, batch_videos: int = SEARCH_BATCH_VIDEOS,
+                 flush_seconds: float = SEARCH_FLUSH_SECONDS):
+        self.path = path
+        self.batch_videos = batch_videos
+        self.flush_seconds = flush_seconds
+        self._init_state()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect()
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS videos ('
+            ' id INTEGER PRIMARY KEY, video_id TEXT UNIQUE NOT NULL, title TEXT, digest TEXT NOT NULL,'
+            ' passages INTEGER NOT NULL, indexed REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5('
+            " text, starts UNINDEXED, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3 4')"
+        )
+        self._db.commit()
+
+    def _init_state(self) -> None:
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        # video_id -> (title, transcript, digest), newest version only
+        self._pending: Dict[str, Tuple[str, Transcript, str]] = {}
+        self._first_pending = 0.0
+        self._thread: Optional[threading.Thread] = None
+        # Digests known to be indexed, so repeat requests for a video skip the queue
+        self._indexed: Dict[str, str] = {}
+
+    def _connect(self) -> None:
+        # Every server process writes its own batches; wait for the lock instead of failing
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        # Queries read what is committed on their own connection, so a flush never holds them up
+        if self.path == ':memory:':
+            self._reader, self._read_lock = self._db, self._lock
+        else:
+            self._reader = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._read_lock = threading.Lock()
+
+    def reopen(self) -> None:
+        """Open a fresh connection and drop inherited queue state; for use after fork()."""
+        self._init_state()
+        if self.path != ':memory:':
+            self._connect()
+
+    def add(self, video_id: str, title: str, transcript: Transcript) -> bool:
+        """Queue a transcript for indexing; False if this version is already indexed or queued."""
+        digest = transcript.digest()
+        with self._cond:
+            if self._indexed.get(video_id) == digest:
+                return False
+            queued = self._pending.get(video_id)
+            if queued is not None and queued[2] == digest:
+                return False
+            if not self._pending:
+                self._first_pending = time.monotonic()
+            self._pending[video_id] = (title, transcript, digest)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='search-index', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while len(self._pending) < self.batch_videos:
+                    if not self._pending:
+                        # Exit when idle; the next add() starts a new thread
+                        if not self._cond.wait(self.flush_seconds * 10) and not self._pending:
+                            self._thread = None
+                            return
+                        continue
+                    remaining = self._first_pending + self.flush_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                log_event('search_index_error', error=str(e))
+
+    def flush(self) -> int:
+        """Write every queued transcript in one transaction; returns the number of videos (re)indexed."""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        start = time.perf_counter()
+        written, passages_written = {}, 0
+        with self._lock:
+            try:
+                existing = dict(self._db.execute(
+                    f"SELECT video_id, digest FROM videos WHERE video_id IN ({','.join('?' * len(pending))})",
+                    list(pending)
+                ).fetchall())
+                now = time.time()
+                for video_id, (title, transcript, digest) in pending.items():
+                    if existing.get(video_id) == digest:
+                        continue
+                    passages = build_passages(transcript)
+                    self._db.execute(
+                        'INSERT INTO videos (video_id, title, digest, passages, indexed) VALUES (?, ?, ?, ?, ?)'
+                        ' ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, digest = excluded.digest,'
+                        ' passages = excluded.passages, indexed = excluded.indexed',
+                        (video_id, title, digest, len(passages), now)
+                    )
+                    row_id = self._db.execute('SELECT id FROM videos WHERE video_id = ?', (video_id,)).fetchone()[0]
+                    base = row_id << PASSAGE_BITS
+                    self._db.execute('DELETE FROM passages WHERE rowid BETWEEN ? AND ?',
+                                     (base, base + (1 << PASSAGE_BITS) - 1))
+                    self._db.executemany('INSERT INTO passages (rowid, text, starts) VALUES (?, ?, ?)',
+                                         ((base + i, text, starts) for i, (text, starts) in enumerate(passages)))
+                    written[video_id] = digest
+                    passages_written += len(passages)
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+        with self._cond:
+            for video_id, (_, _, digest) in pending.items():
+                self._indexed[video_id] = digest
+        SEARCH_INDEXED.inc(len(written), result='indexed')
+        SEARCH_INDEXED.inc(len(pending) - len(written), result='unchanged')
+        log_event('search_index_flush', videos=len(pending), indexed=len(written), passages=passages_written,
+                  seconds=round(time.perf_counter() - start, 4))
+        return len(written)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Passages matching every word or phrase of `query`, best BM25 rank first.
+
+        Each hit carries the video, its title, the start of the matching caption in
+        milliseconds, a link that jumps there and a snippet with [matched] terms.
+        Queries matching more than SEARCH_RANK_CANDIDATES passages are ranked among
+        the most recently indexed ones. Only committed transcripts are searched;
+        queued ones follow with the next background flush. Raises ValueError for a
+        query with no searchable words.
+        """
+        expression = match_expression(query)
+        if not expression:
+            raise ValueError('Query has no searchable words')
+        limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+
+        where, params = 'passages MATCH ?', [expression]
+        start = time.perf_counter()
+        with self._read_lock:
+            if video_id is not None:
+                row = self._reader.execute('SELECT id FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+                base = row[0] << PASSAGE_BITS if row else -1
+                where += ' AND rowid BETWEEN ? AND ?'
+                params += [base, base + (1 << PASSAGE_BITS) - 1]
+            # Walking rowids is cheap next to scoring; find where the newest candidates begin
+            cutoff = self._reader.execute(f'SELECT rowid FROM passages WHERE {where} ORDER BY rowid DESC'
+                                      ' LIMIT 1 OFFSET ?', params + [SEARCH_RANK_CANDIDATES - 1]).fetchone()
+            if cutoff is not None:
+                where += ' AND rowid >= ?'
+                params.append(cutoff[0])
+            rows = self._reader.execute(
+                "SELECT rowid, starts, rank, highlight(passages, 0, ?, ?), snippet(passages, 0, '[', ']', '…', 16)"
+                f' FROM passages WHERE {where} ORDER BY rank LIMIT ? OFFSET ?',
+                [HIT_START, HIT_END] + params + [limit, max(0, int(offset))]
+            ).fetchall()
+            ids = {row_id >> PASSAGE_BITS for row_id, *_ in rows}
+            videos = {row[0]: row[1:] for row in self._reader.execute(
+                f"SELECT id, video_id, title FROM videos WHERE id IN ({','.join('?' * len(ids))})", list(ids)
+            )} if ids else {}
+        SEARCH_SECONDS.observe(time.perf_counter() - start)
+
+        hits = []
+        for row_id, starts, rank, highlighted, snippet in rows:
+            video = videos.get(row_id >> PASSAGE_BITS)
+            if video is None:
+                continue
+            start_ms = hit_start_ms(highlighted, starts)
+            hits.append({
+                'video_id': video[0],
+                'title': video[1],
+                'start_ms': start_ms,
+                'url': watch_url(video[0], start_ms),
+                'snippet': snippet,
+                # BM25 is negative in FTS5; report it so higher is better
+                'score': round(-rank, 4),
+            })
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._read_lock:
+            videos, passages = self._reader.execute(
+                'SELECT COUNT(*), COALESCE(SUM(passages), 0) FROM videos').fetchone()
+        with self._cond:
+            pending = len(self._pending)
+        return {'videos': videos, 'passages': passages, 'pending': pending}
+
+
+class _DisabledIndex:
+    """Stand-in used when SEARCH_INDEX=0: nothing is indexed and searches find nothing."""
+
+    def add(self, video_id: str, title: str, transcript: Transcript) -> bool:
+        return False
+
+    def flush(self) -> int:
+        return 0
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not match_expression(query):
+            raise ValueError('Query has no searchable words')
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {'videos': 0, 'passages': 0, 'pending': 0, 'disabled': True}
+
+
+search_index = SearchIndex() if SEARCH_INDEX else _DisabledIndex()
+
+if SEARCH_INDEX:
+    # Queued transcripts are written before the process exits
+    atexit.register(search_index.flush)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=search_index.reopen)
+
+
+def backfill() -> int:
+    """Queue every transcript held in the result cache and write them; returns the number queued."""
+    from result_cache import result_cache
+
+    queued = 0
+    for video_id in result_cache.keys('transcript'):
+        data = result_cache.get('transcript', video_id)
+        if isinstance(data, dict):
+            queued += search_index.add(video_id, result_cache.get('title', video_id) or '',
+                                       Transcript.from_dict(data))
+    search_index.flush()
+    return queued
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('backfill', help="Index every transcript in the result cache")
+    search = commands.add_parser('search', help="Search the index")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=20)
+    search.add_argument('--video', help="Only search this video id")
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        print(f"Queued {backfill()} new or changed transcripts; {search_index.stats()}")
+        return
+    for hit in search_index.search(args.query, args.limit, video_id=args.video):
+        print(f"{hit['url']}  {hit['title']}\n    {hit['snippet']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,92 @@
-from transformers import pipeline
+import hashlib
+import logging
+import os
 import re
 import sys
-from typing import List, Literal, Dict, TypedDict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import torch
-from tqdm import tqdm
+import threading
+import time
+from typing import Callable, List, Literal, Dict, MutableMapping, Optional, Set, Tuple, TypedDict, Union
+from batching import BATCH_SCHEDULER, BatchScheduler
+from deadline import Cancelled, Deadline
+from metrics import configure_logging, log_event, stage
+from model_registry import SUMMARIZATION_MODEL, get_summarizer
+from process_captions import summary_text
+from transcript import Transcript
 
 class SummaryParams(TypedDict):
     max_length: int
     min_length: int
-    chunk_size: int
-    overlap_size: int  # New parameter for chunk overlap
+    chunk_tokens: int  # Model tokens per chunk, capped at the model's input limit
+    model: str  # Summarization model used for this level
+    overlap_tokens: int  # Model tokens repeated from the end of the previous chunk
+    prefilter_tokens: int  # Extractive pre-filter budget in model tokens; 0 keeps every sentence
 
-SummaryLevel = Literal['brief', 'standard', 'detailed']
+# 'instant' is extractive only and needs no model
+SummaryLevel = Literal['instant', 'brief', 'standard', 'detailed']
+
+# Summaries already generated for one model, keyed by `memo_key`; see summarize_chunks
+SummaryMemo = MutableMapping[str, str]
+
+class RollingState(TypedDict):
+    tail: str  # Text of the last chunk, which grows as captions arrive
+    sealed: List[str]  # Summaries of the chunks before it, which new text can no longer change
+    summary: str
+
+# Number of chunks run through a single generate() call
+DEFAULT_BATCH_SIZE = int(os.environ.get('SUMMARY_BATCH_SIZE', '4'))
+
+# Scheduler order: lower goes first, so short brief summaries overtake detailed ones
+LEVEL_PRIORITY: Dict[str, int] = {'brief': 0, 'standard': 1, 'detailed': 2}
+
+# Called as progress(stage, current, total) while a summary is generated
+ProgressCallback = Callable[[str, int, int], None]
+
+# 'tree' reduces chunk summaries level by level; 'single' makes one truncating reduce call
+DEFAULT_REDUCE_MODE = os.environ.get('SUMMARY_REDUCE_MODE', 'tree')
+# Maximum number of summaries merged into one node of the reduce tree
+DEFAULT_FAN_IN = int(os.environ.get('SUMMARY_REDUCE_FAN_IN', '4'))
+
+# EXTRACTIVE_PREFILTER=1 keeps only the most central sentences (see extractive.py) before chunking
+EXTRACTIVE_PREFILTER = os.environ.get('EXTRACTIVE_PREFILTER', '0') != '0'
+# Length of 'instant' summaries
+INSTANT_SUMMARY_WORDS = int(os.environ.get('INSTANT_SUMMARY_WORDS', '150'))
+
+# Share of the time left that a summary is planned to use; the rest absorbs estimation error
+DEADLINE_SAFETY = 0.8
+# Level whose lengths and chunk sizes a summary falls back to when its deadline is short
+LOWER_LEVEL: Dict[str, str] = {'detailed': 'standard', 'standard': 'brief'}
+
+# SUMMARY_PROGRESS_BARS=1 draws tqdm bars on stderr; off by default so server logs stay machine-readable
+PROGRESS_BARS = os.environ.get('SUMMARY_PROGRESS_BARS', '0') == '1'
+
+# e.g. sshleifer/distilbart-cnn-12-6 for a faster distilled model on brief summaries
+BRIEF_SUMMARIZATION_MODEL = os.environ.get('BRIEF_SUMMARIZATION_MODEL', SUMMARIZATION_MODEL)
 
 # Updated configuration for different summary levels
 SUMMARY_CONFIGS: Dict[SummaryLevel, SummaryParams] = {
     'brief': {
         'max_length': 200,
         'min_length': 60,
-        'chunk_size': 1000,
-        'overlap_size': 100
+        'chunk_tokens': 1020,
+        'overlap_tokens': 128,
+        'prefilter_tokens': 3072,
+        'model': BRIEF_SUMMARIZATION_MODEL
     },
     'standard': {
         'max_length': 300,
         'min_length': 100,
-        'chunk_size': 800,
-        'overlap_size': 150
+        'chunk_tokens': 1020,
+        'overlap_tokens': 192,
+        'prefilter_tokens': 8192,
+        'model': SUMMARIZATION_MODEL
     },
     'detailed': {
         'max_length': 500,
         'min_length': 200,
-        'chunk_size': 600,
-        'overlap_size': 200
+        'chunk_tokens': 800,
+        'overlap_tokens': 256,
+        'prefilter_tokens': 0,
+        'model': SUMMARIZATION_MODEL
     }
 }
 
@@ -45,46 +99,99 @@ def clean_transcript(text: str) -> str:
     cleaned = re.sub(r'\s+', ' ', cleaned)
     return cleaned.strip()
 
-def chunk_text(text: str, chunk_size: int, overlap_size: int) -> List[str]:
-    """Split text into overlapping chunks while preserving sentence boundaries."""
-    # Split into sentences (improved sentence splitting)
-    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for i, sentence in enumerate(sentences):
-        # Count words in the sentence
-        sentence_length = len(sentence.split())
-        
-        if current_length + sentence_length > chunk_size and current_chunk:
-            # Join the current chunk and add to chunks
-            chunks.append('. '.join(current_chunk) + '.')
-            
-            # Start new chunk with overlap
-            overlap_words = []
-            overlap_length = 0
-            for prev_sentence in reversed(current_chunk):
-                prev_length = len(prev_sentence.split())
-                if overlap_length + prev_length <= overlap_size:
-                    overlap_words.insert(0, prev_sentence)
-                    overlap_length += prev_length
-                else:
-                    break
-            
-            current_chunk = overlap_words + [sentence]
-            current_length = overlap_length + sentence_length
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences at terminal punctuation."""
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+
+def _token_pieces(sentences: List[str], tokenizer, budget: int) -> List[tuple]:
+    """
+    Encode all sentences in one fast batch call and return (text, token_count) pieces.
+
+    Sentences longer than the budget are cut at word boundaries into pieces that fit,
+    so nothing has to be truncated later. Each sentence is encoded with a leading space,
+    matching how it tokenizes once sentences are joined into a chunk.
+    """
+    padded = [' ' + s for s in sentences]
+    encoded = tokenizer(padded, add_special_tokens=False, return_offsets_mapping=True)
+    pieces = []
+    for text, ids, offsets in zip(padded, encoded['input_ids'], encoded['offset_mapping']):
+        if len(ids) <= budget:
+            pieces.append((text[1:], len(ids)))
+            continue
+        start = 0
+        while start < len(ids):
+            end = min(start + budget, len(ids))
+            if end < len(ids):
+                # Back off to a token that starts a word so the cut falls on a space
+                cut = end
+                while cut > start + 1 and text[offsets[cut][0] - 1] != ' ':
+                    cut -= 1
+                if cut > start + 1:
+                    end = cut
+            char_end = offsets[end][0] if end < len(ids) else len(text)
+            piece = text[offsets[start][0]:char_end].strip()
+            if piece:
+                pieces.append((piece, end - start))
+            start = end
+    return pieces
+
+def _fit_span(pieces: List[tuple], start: int, end: int, tokenizer) -> List[str]:
+    """Join pieces[start:end], halving the span until every part fits the model input."""
+    chunk = ' '.join(piece for piece, _ in pieces[start:end])
+    if end - start == 1 or len(tokenizer(chunk, add_special_tokens=True)['input_ids']) <= tokenizer.model_max_length:
+        return [chunk]
+    middle = (start + end) // 2
+    return _fit_span(pieces, start, middle, tokenizer) + _fit_span(pieces, middle, end, tokenizer)
+
+def chunk_by_tokens(text: str, tokenizer, chunk_tokens: int, overlap_tokens: int) -> List[str]:
+    """
+    Pack sentences into chunks of at most `chunk_tokens` model tokens.
+
+    Token counts come from one batch encoding of the sentences, the budget is capped at the
+    model's input limit and consecutive chunks share up to `overlap_tokens` tokens of whole
+    sentences. Runs in linear time in the number of sentences.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    limit = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add(pair=False)
+    budget = max(1, min(chunk_tokens, limit))
+    overlap = min(overlap_tokens, budget // 2)
+    pieces = _token_pieces(sentences, tokenizer, budget)
+
+    spans = []
+    start, n = 0, len(pieces)
+    while start < n:
+        end, total = start, 0
+        while end < n and total + pieces[end][1] <= budget:
+            total += pieces[end][1]
+            end += 1
+        end = max(end, start + 1)
+        spans.append((start, end))
+        if end >= n:
+            break
+        # Step back over whole pieces that fit in the overlap, always moving forward
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried + pieces[next_start - 1][1] <= overlap:
+            carried += pieces[next_start - 1][1]
+            next_start -= 1
+        start = next_start
+
+    chunks = [' '.join(piece for piece, _ in pieces[s:e]) for s, e in spans]
+
+    # Joining can merge tokens differently at a chunk's first word; re-split any overflow until it fits
+    lengths = tokenizer(chunks, add_special_tokens=True)['input_ids']
+    fitted = []
+    for chunk, ids, (s, e) in zip(chunks, lengths, spans):
+        if len(ids) <= tokenizer.model_max_length or e - s == 1:
+            fitted.append(chunk)
         else:
-            current_chunk.append(sentence)
-            current_length += sentence_length
-    
-    # Add the last chunk if it exists
-    if current_chunk:
-        chunks.append('. '.join(current_chunk) + '.')
-    
-    return chunks
+            fitted.extend(_fit_span(pieces, s, e, tokenizer))
+    return fitted
 
-def summarize_chunk(summarizer, text: str, max_length: int, min_length: int) -> str:
+def summarize_chunk(summarizer, text: str, max_length: int, min_length: int,
+                    num_beams: Optional[int] = None) -> str:
     """Summarize a single chunk of text."""
     try:
         # Add safety check for empty or very short text
@@ -96,23 +203,297 @@ def summarize_chunk(summarizer, text: str, max_length: int, min_length: int) ->
             max_length=max_length,
             min_length=min_length,
             do_sample=False,
-            truncation=True
+            truncation=True,
+            **({'num_beams': num_beams} if num_beams else {})
         )
         return result[0]['summary_text']
     except Exception as e:
-        print(f"Warning: Error summarizing chunk: {str(e)}")
+        log_event('summarize_error', severity=logging.WARNING, scope='chunk', error=str(e))
         # Return a portion of the original text if summarization fails
         words = text.split()
         return ' '.join(words[:min_length])
 
-def combine_summaries(summaries: List[str], max_length: int) -> str:
+def generate_summaries(summarizer, texts: List[str], max_length: int, min_length: int,
+                       num_beams: Optional[int] = None) -> List[str]:
+    """Summarize `texts` in one padded generate() call; `num_beams` overrides the model's default."""
+    import torch
+
+    tokenizer, model = summarizer.tokenizer, summarizer.model
+    inputs = tokenizer(
+        texts,
+        padding=True,
+        truncation=True,
+        return_tensors="pt",
+        return_token_type_ids=False
+    ).to(model.device)
+    with torch.inference_mode():
+        output_ids = model.generate(
+            **inputs,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,
+            **({'num_beams': num_beams} if num_beams else {})
+        )
+    return tokenizer.batch_decode(output_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+
+def _run_summary_batch(summarizer, params: tuple, texts: List[str]) -> List[str]:
+    max_length, min_length, num_beams = params
+    return generate_summaries(summarizer, texts, max_length, min_length, num_beams)
+
+# Batches chunks of all in-flight summaries together; see batching.py
+summary_scheduler = BatchScheduler('summarize', _run_summary_batch, DEFAULT_BATCH_SIZE)
+
+def default_beams(summarizer) -> int:
+    """Beams the model searches with when none are requested."""
+    config = getattr(summarizer.model, 'generation_config', None) or getattr(summarizer.model, 'config', None)
+    return int(getattr(config, 'num_beams', None) or 1)
+
+# Seconds per chunk, output token and beam, by model; learned from finished map stages
+_chunk_costs: Dict[str, float] = {}
+_chunk_costs_lock = threading.Lock()
+
+def record_chunk_cost(model: str, seconds: float, chunks: int, max_length: int, num_beams: int) -> None:
+    """Fold a map stage's wall time into the model's cost estimate."""
+    if chunks <= 0 or seconds <= 0:
+        return
+    cost = seconds / (chunks * max_length * num_beams)
+    with _chunk_costs_lock:
+        previous = _chunk_costs.get(model)
+        _chunk_costs[model] = cost if previous is None else 0.7 * previous + 0.3 * cost
+
+def estimate_seconds(model: str, chunks: int, max_length: int, num_beams: int) -> Optional[float]:
+    """Expected time to summarize and reduce `chunks` chunks, or None before the model has run."""
+    cost = _chunk_costs.get(model)
+    if cost is None:
+        return None
+    # A tree reduce adds about one node per (fan-in - 1) leaves
+    return cost * chunks * max_length * num_beams * (1 + 1 / max(1, DEFAULT_FAN_IN - 1))
+
+def memo_key(text: str, max_length: int, min_length: int) -> str:
+    """Key of a text's summary in a SummaryMemo."""
+    return hashlib.sha256(f"{max_length}:{min_length}:{text}".encode('utf-8')).hexdigest()
+
+def summarize_chunks(summarizer, chunks: List[str], max_length: int, min_length: int,
+                     batch_size: int = DEFAULT_BATCH_SIZE,
+                     progress: Optional[ProgressCallback] = None, priority: int = 0,
+                     memo: Optional[SummaryMemo] = None, num_beams: Optional[int] = None,
+                     deadline: Optional[Deadline] = None) -> List[str]:
+    """
+    Summarize chunks in length-bucketed batches and return the summaries in chunk order.
+
+    With the batch scheduler enabled the chunks join the shared queue at `priority`
+    and batches are sized by the scheduler; otherwise they run here in batches of
+    `batch_size`. Chunks found in `memo` are not summarized again, and new summaries
+    are added to it. Chunks still unsummarized when the `deadline` passes are
+    replaced by their most central sentences, and a cancelled deadline withdraws the
+    queued chunks and raises Cancelled.
+    """
+    deadline = deadline or Deadline()
+    if memo is None:
+        return _summarize_chunks(summarizer, chunks, max_length, min_length, batch_size, progress, priority,
+                                 num_beams, deadline)[0]
+
+    keys = [memo_key(chunk, max_length, min_length) for chunk in chunks]
+    remembered = [memo.get(key) for key in keys]
+    missing = [i for i, summary in enumerate(remembered) if summary is None]
+    if missing:
+        outputs, unfinished = _summarize_chunks(summarizer, [chunks[i] for i in missing], max_length, min_length,
+                                                batch_size, progress, priority, num_beams, deadline)
+        for position, (i, summary) in enumerate(zip(missing, outputs)):
+            remembered[i] = summary
+            # Greedy and extracted summaries were made to meet a deadline; later requests get the real one
+            if num_beams is None and position not in unfinished:
+                memo[keys[i]] = summary
+    return remembered
+
+def _summarize_chunks(summarizer, chunks: List[str], max_length: int, min_length: int, batch_size: int,
+                      progress: Optional[ProgressCallback], priority: int, num_beams: Optional[int],
+                      deadline: Deadline) -> Tuple[List[str], Set[int]]:
+    """summarize_chunks without the memo; also returns the chunks that fell back to extraction."""
+    summaries: List[str] = list(chunks)
+    tokenizer = summarizer.tokenizer
+
+    # Empty or very short chunks are passed through unchanged, as in summarize_chunk
+    pending = [i for i, chunk in enumerate(chunks)
+               if chunk.strip() and len(chunk.split()) >= min_length]
+    if not pending:
+        return summaries, set()
+
+    # Sort by token length so each batch pads to a similar length
+    lengths = dict(zip(pending, (len(ids) for ids in tokenizer([chunks[i] for i in pending],
+                                                               truncation=True)['input_ids'])))
+    order = sorted(pending, key=lambda i: (lengths[i], i))
+
+    from tqdm import tqdm
+
+    unfinished: List[int] = []
+    if BATCH_SCHEDULER:
+        futures = summary_scheduler.submit(summarizer, (max_length, min_length, num_beams),
+                                           [chunks[i] for i in order], [lengths[i] for i in order], priority)
+        owners = dict(zip(futures, order))
+        waiting = set(futures)
+        with tqdm(total=len(order), desc="Processing chunks", disable=not PROGRESS_BARS) as pbar:
+            while waiting:
+                done = deadline.wait(waiting, 'summarize')
+                if not done:
+                    break
+                for future in done:
+                    waiting.discard(future)
+                    i = owners[future]
+                    try:
+                        summaries[i] = future.result().strip()
+                    except Exception as e:
+                        log_event('summarize_error', severity=logging.WARNING, scope='batch', fallback='single_chunks',
+                                  error=str(e))
+                        summaries[i] = summarize_chunk(summarizer, chunks[i], max_length, min_length,
+                                                       num_beams).strip()
+                    pbar.update(1)
+                    if progress:
+                        progress('summarize', pbar.n, len(order))
+        # Out of time: queued chunks leave the batch queue
+        for future in waiting:
+            future.cancel()
+            unfinished.append(owners[future])
+    else:
+        with tqdm(total=len(order), desc="Processing chunks", disable=not PROGRESS_BARS) as pbar:
+            for start in range(0, len(order), batch_size):
+                deadline.check('summarize')
+                if deadline.expired:
+                    unfinished = order[start:]
+                    break
+                batch = order[start:start + batch_size]
+                try:
+                    outputs = generate_summaries(summarizer, [chunks[i] for i in batch], max_length, min_length,
+                                                 num_beams)
+                except Exception as e:
+                    log_event('summarize_error', severity=logging.WARNING, scope='batch', fallback='single_chunks',
+                              error=str(e))
+                    outputs = [summarize_chunk(summarizer, chunks[i], max_length, min_length, num_beams)
+                               for i in batch]
+                for i, summary in zip(batch, outputs):
+                    summaries[i] = summary.strip()
+                pbar.update(len(batch))
+                if progress:
+                    progress('summarize', pbar.n, len(order))
+
+    if unfinished:
+        # About three words per four tokens
+        for i in unfinished:
+            summaries[i] = instant_summary(chunks[i], max_length * 3 // 4)
+        deadline.degrade('extractive_chunks', chunks=len(unfinished), of=len(order))
+    return summaries, set(unfinished)
+
+def group_by_tokens(texts: List[str], tokenizer, fan_in: int) -> List[List[str]]:
+    """Group consecutive texts so each group fits the model input and has at most `fan_in` members."""
+    budget = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add(pair=False)
+    lengths = [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text, length in zip(texts, lengths):
+        # A group always takes two members so every level shrinks the tree
+        if current and len(current) >= 2 and (current_tokens + length + 1 > budget or len(current) >= fan_in):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += length + 1
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
+
+def tree_reduce_many(summarizer, summary_lists: List[List[str]], max_length: int, fan_in: int = DEFAULT_FAN_IN,
+                     batch_size: int = DEFAULT_BATCH_SIZE, metrics: Optional[List[Dict]] = None,
+                     progress: Optional[ProgressCallback] = None, priority: int = 0,
+                     memo: Optional[SummaryMemo] = None, num_beams: Optional[int] = None,
+                     deadline: Optional[Deadline] = None) -> List[str]:
+    """
+    Recursively summarize groups of summaries until each result fits `max_length` words.
+
+    Each level packs consecutive summaries into token-budgeted groups of up to `fan_in`
+    and summarizes the groups of every unfinished list together in batches, so every
+    summary reaches the model, batches stay full across documents and the depth grows
+    as O(log N). Per-level timings are appended to `metrics`. Groups are packed from
+    the start, so appending summaries only changes the last group of each level; with
+    a `memo` the unchanged nodes are not summarized again. Lists still unreduced when
+    the `deadline` passes are cut to their most central sentences instead.
+    """
+    deadline = deadline or Deadline()
+    results: List[Optional[str]] = [None] * len(summary_lists)
+    active = {}
+    for i, texts in enumerate(summary_lists):
+        if len(' '.join(texts).split()) > max_length:
+            active[i] = texts
+        else:
+            results[i] = ' '.join(texts)
+
+    depth = 0
+    while active:
+        deadline.check('combine')
+        if deadline.expired:
+            for i, texts in active.items():
+                results[i] = instant_summary(' '.join(texts), max_length)
+            deadline.degrade('extractive_combine', depth=depth)
+            break
+        start = time.perf_counter()
+        owners, merged = [], []
+        for i, texts in active.items():
+            for group in group_by_tokens(texts, summarizer.tokenizer, max(2, fan_in)):
+                owners.append(i)
+                merged.append(' '.join(group))
+        if progress:
+            progress('combine', depth, depth + 1)
+        # Each node keeps the level's length so later levels still see every topic
+        outputs = summarize_chunks(summarizer, merged, max_length, max_length // 2, batch_size,
+                                   priority=priority, memo=memo, num_beams=num_beams, deadline=deadline)
+
+        next_active = {i: [] for i in active}
+        for i, text in zip(owners, outputs):
+            if text:
+                next_active[i].append(text)
+        if metrics is not None:
+            metrics.append({
+                'depth': depth,
+                'inputs': sum(len(texts) for texts in active.values()),
+                'outputs': sum(len(texts) for texts in next_active.values()),
+                'seconds': round(time.perf_counter() - start, 3),
+            })
+        for i, next_texts in list(next_active.items()):
+            if (len(next_texts) == 1 or len(next_texts) >= len(active[i])
+                    or len(' '.join(next_texts).split()) <= max_length):
+                results[i] = ' '.join(next_texts)
+                del next_active[i]
+        active = next_active
+        depth += 1
+    return results
+
+def tree_reduce(summarizer, summaries: List[str], max_length: int, fan_in: int = DEFAULT_FAN_IN,
+                batch_size: int = DEFAULT_BATCH_SIZE, metrics: Optional[List[Dict]] = None,
+                progress: Optional[ProgressCallback] = None, priority: int = 0,
+                memo: Optional[SummaryMemo] = None, num_beams: Optional[int] = None,
+                deadline: Optional[Deadline] = None) -> str:
+    """Reduce one document's summaries with `tree_reduce_many`."""
+    return tree_reduce_many(summarizer, [summaries], max_length, fan_in, batch_size, metrics, progress,
+                            priority, memo, num_beams, deadline)[0]
+
+def combine_summaries(summaries: List[str], max_length: int, mode: str = DEFAULT_REDUCE_MODE,
+                      fan_in: int = DEFAULT_FAN_IN, batch_size: int = DEFAULT_BATCH_SIZE,
+                      metrics: Optional[List[Dict]] = None,
+                      progress: Optional[ProgressCallback] = None, summarizer=None, priority: int = 0,
+                      memo: Optional[SummaryMemo] = None, num_beams: Optional[int] = None,
+                      deadline: Optional[Deadline] = None) -> str:
     """Combine multiple summaries into a coherent final summary."""
     combined = ' '.join(summaries)
     
     # If the combined summary is too long, summarize it again
     if len(combined.split()) > max_length:
         try:
-            summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+            summarizer = summarizer or get_summarizer()
+            if mode == 'tree':
+                return tree_reduce(summarizer, summaries, max_length, fan_in, batch_size, metrics, progress,
+                                   priority, memo, num_beams, deadline)
             result = summarizer(
                 combined,
                 max_length=max_length,
@@ -121,86 +502,273 @@ def combine_summaries(summaries: List[str], max_length: int) -> str:
                 truncation=True
             )
             return result[0]['summary_text']
+        except Cancelled:
+            raise
         except Exception as e:
-            print(f"Warning: Error combining summaries: {str(e)}")
+            log_event('summarize_error', severity=logging.WARNING, scope='combine', error=str(e))
             # Return a truncated version if summarization fails
             words = combined.split()
             return ' '.join(words[:max_length])
     
     return combined
 
-def summarize_text(text: str, level: SummaryLevel = 'standard') -> str:
-    """Generate a summary using the BART model with specified level."""
+def prefilter_text(text: str, tokenizer, budget: int) -> str:
+    """Keep the most central sentences of `text` within `budget` model tokens, in order."""
+    from extractive import extract, token_counter
+
+    return extract(text, budget, token_counter(tokenizer))
+
+def instant_summary(text: str, max_words: int = INSTANT_SUMMARY_WORDS) -> str:
+    """Summarize by sentence extraction alone, without loading a model."""
+    from extractive import extract
+
+    return extract(text, max_words)
+
+def fit_to_deadline(summarizer, level: SummaryLevel, text: str, chunks: List[str],
+                    deadline: Deadline) -> Optional[Tuple[SummaryParams, Optional[int], List[str]]]:
+    """
+    Lower a summary's settings until its estimated time fits the deadline.
+
+    Each step is only taken while the estimate is still too long: greedy decoding
+    instead of beam search, then the lengths and chunk sizes of the next lower level
+    on the same model, then an extractive pre-filter down to the chunks that fit.
+    Returns (settings, num_beams, chunks), or None when not even one chunk fits and
+    the summary should be extractive. Before the model has a cost estimate the
+    settings are kept and the deadline is only enforced while running.
+    """
+    settings = SUMMARY_CONFIGS[level]
+    model = settings['model']
+    beams = default_beams(summarizer)
+    num_beams: Optional[int] = None
+    current: str = level
+    while True:
+        budget = deadline.remaining() * DEADLINE_SAFETY
+        estimate = estimate_seconds(model, len(chunks), settings['max_length'], num_beams or beams)
+        if estimate is None or estimate <= budget:
+            return settings, num_beams, chunks
+        if deadline.expired:
+            deadline.degrade('instant', level=level)
+            return None
+        if (num_beams or beams) > 1:
+            num_beams = 1
+            deadline.degrade('greedy', beams=beams)
+        elif current in LOWER_LEVEL:
+            lower = LOWER_LEVEL[current]
+            deadline.degrade('lower_level', level=current, to=lower)
+            current = lower
+            settings = dict(SUMMARY_CONFIGS[lower], model=model)  # type: ignore
+            chunks = chunk_by_tokens(text, summarizer.tokenizer, settings['chunk_tokens'],
+                                     settings['overlap_tokens'])
+        else:
+            fitting = int(budget / (estimate / len(chunks)))
+            if fitting < 1:
+                deadline.degrade('instant', level=level)
+                return None
+            deadline.degrade('prefilter', chunks=len(chunks), to=fitting)
+            # Overlap makes consecutive chunks share tokens, so budget only the new ones
+            tokens = fitting * (settings['chunk_tokens'] - settings['overlap_tokens'])
+            text = prefilter_text(text, summarizer.tokenizer, tokens)
+            chunks = chunk_by_tokens(text, summarizer.tokenizer, settings['chunk_tokens'],
+                                     settings['overlap_tokens'])
+            return settings, num_beams, chunks
+
+def summarize_text(text: Union[str, Transcript], level: SummaryLevel = 'standard', batch_size: int = DEFAULT_BATCH_SIZE,
+                   progress: Optional[ProgressCallback] = None, deadline: Optional[Deadline] = None) -> str:
+    """
+    Generate a summary using the BART model with specified level.
+
+    With a `deadline`, the settings are lowered up front to fit the time left (see
+    fit_to_deadline) and stages that still run late fall back to extraction; the
+    steps taken are recorded in `deadline.degradations`.
+    """
+    deadline = deadline or Deadline()
     try:
+        # Clean the text; a structured transcript needs no timestamp stripping
+        if isinstance(text, Transcript):
+            cleaned_text = summary_text(text)
+        else:
+            cleaned_text = clean_transcript(text)
+        
+        if level == 'instant':
+            with stage('extract', level=level):
+                return instant_summary(cleaned_text)
+        
         # Get configuration for the specified level
         config = SUMMARY_CONFIGS[level]
         
-        # Initialize the summarization pipeline
-        print(f"Loading summarization model for {level} summary...")
-        device = 0 if torch.cuda.is_available() else -1
-        summarizer = pipeline(
-            "summarization",
-            model="facebook/bart-large-cnn",
-            device=device
-        )
+        # Reuse the process-wide summarizer for this level's model
+        summarizer = get_summarizer(config['model'])
         
-        # Clean the text
-        cleaned_text = clean_transcript(text)
+        # Drop filler sentences of long transcripts before they reach the model
+        if EXTRACTIVE_PREFILTER and config['prefilter_tokens']:
+            with stage('prefilter', level=level):
+                cleaned_text = prefilter_text(cleaned_text, summarizer.tokenizer, config['prefilter_tokens'])
         
-        # Split into chunks if text is too long
-        chunks = chunk_text(cleaned_text, config['chunk_size'], config['overlap_size'])
+        # Split into chunks that fit the model input without truncation
+        with stage('chunk', level=level):
+            chunks = chunk_by_tokens(
+                cleaned_text,
+                summarizer.tokenizer,
+                config['chunk_tokens'],
+                config['overlap_tokens']
+            )
         
         if not chunks:
             raise ValueError("No valid text chunks to summarize")
         
-        print(f"Generating {level} summary ({len(chunks)} chunks)...")
-        summaries = []
-        
-        # Process chunks in parallel using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as executor:
-            # Create a progress bar
-            with tqdm(total=len(chunks), desc="Processing chunks") as pbar:
-                # Submit all tasks
-                future_to_chunk = {
-                    executor.submit(
-                        summarize_chunk,
-                        summarizer,
-                        chunk,
-                        config['max_length'],
-                        config['min_length']
-                    ): i for i, chunk in enumerate(chunks)
-                }
-                
-                # Process completed tasks as they finish
-                for future in as_completed(future_to_chunk):
-                    chunk_index = future_to_chunk[future]
-                    try:
-                        summary = future.result()
-                        if summary:
-                            summaries.append(summary)
-                    except Exception as e:
-                        print(f"Error processing chunk {chunk_index}: {str(e)}")
-                    pbar.update(1)
+        # Lower the settings if the estimated time does not fit the deadline
+        num_beams = None
+        if deadline.bounded:
+            plan = fit_to_deadline(summarizer, level, cleaned_text, chunks, deadline)
+            if plan is None:
+                with stage('extract', level=level):
+                    return instant_summary(cleaned_text)
+            config, num_beams, chunks = plan
+        
+        # Run chunks through the model in batches; summaries keep chunk order
+        degradations = len(deadline.degradations)
+        started = time.perf_counter()
+        with stage('summarize_chunks', level=level, chunks=len(chunks)):
+            summaries = [
+                summary for summary in summarize_chunks(
+                    summarizer,
+                    chunks,
+                    config['max_length'],
+                    config['min_length'],
+                    batch_size,
+                    progress,
+                    LEVEL_PRIORITY[level],
+                    num_beams=num_beams,
+                    deadline=deadline
+                ) if summary
+            ]
+        # Only complete map stages teach the cost estimate
+        if len(deadline.degradations) == degradations:
+            record_chunk_cost(config['model'], time.perf_counter() - started, len(chunks), config['max_length'],
+                              num_beams or default_beams(summarizer))
         
         if not summaries:
             raise ValueError("No summaries generated")
         
         # Combine summaries
-        final_summary = combine_summaries(summaries, config['max_length'])
+        if progress:
+            progress('combine', 0, 1)
+        reduce_metrics: List[Dict] = []
+        with stage('combine', level=level, summaries=len(summaries)):
+            final_summary = combine_summaries(summaries, config['max_length'], batch_size=batch_size,
+                                              metrics=reduce_metrics, progress=progress, summarizer=summarizer,
+                                              priority=LEVEL_PRIORITY[level], num_beams=num_beams,
+                                              deadline=deadline)
+        for level_metrics in reduce_metrics:
+            log_event('reduce_level', level=level, **level_metrics)
         
         # Clean up the final summary
         final_summary = re.sub(r'\s+', ' ', final_summary).strip()
         return final_summary
         
+    except Cancelled:
+        raise
     except Exception as e:
-        print(f"Error during summarization: {str(e)}")
+        log_event('summarize_error', severity=logging.ERROR, scope='summary', level=level, error=str(e))
         raise
 
+def summarize_many(texts: List[Union[str, Transcript]], level: SummaryLevel = 'standard',
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   progress: Optional[ProgressCallback] = None) -> List[Optional[str]]:
+    """
+    Summarize several transcripts together so model batches mix chunks from all of them.
+
+    Chunks of every transcript go through one length-bucketed map stage, then all
+    reductions advance level by level. Returns one summary per input, or None for
+    transcripts with nothing to summarize.
+    """
+    if level == 'instant':
+        with stage('extract', level=level, transcripts=len(texts)):
+            return [instant_summary(summary_text(text) if isinstance(text, Transcript) else clean_transcript(text))
+                    or None for text in texts]
+
+    config = SUMMARY_CONFIGS[level]
+    summarizer = get_summarizer(config['model'])
+    prefilter = EXTRACTIVE_PREFILTER and config['prefilter_tokens']
+
+    owners: List[int] = []
+    chunks: List[str] = []
+    with stage('chunk', level=level, transcripts=len(texts)):
+        for i, text in enumerate(texts):
+            cleaned_text = summary_text(text) if isinstance(text, Transcript) else clean_transcript(text)
+            if prefilter:
+                cleaned_text = prefilter_text(cleaned_text, summarizer.tokenizer, config['prefilter_tokens'])
+            for chunk in chunk_by_tokens(cleaned_text, summarizer.tokenizer, config['chunk_tokens'],
+                                         config['overlap_tokens']):
+                owners.append(i)
+                chunks.append(chunk)
+
+    summary_lists: List[List[str]] = [[] for _ in texts]
+    with stage('summarize_chunks', level=level, chunks=len(chunks)):
+        for i, summary in zip(owners, summarize_chunks(summarizer, chunks, config['max_length'],
+                                                       config['min_length'], batch_size, progress,
+                                                       LEVEL_PRIORITY[level])):
+            if summary:
+                summary_lists[i].append(summary)
+
+    if progress:
+        progress('combine', 0, 1)
+    present = [i for i, summaries in enumerate(summary_lists) if summaries]
+    with stage('combine', level=level, transcripts=len(present)):
+        reduced = tree_reduce_many(summarizer, [summary_lists[i] for i in present], config['max_length'],
+                                   batch_size=batch_size, progress=progress, priority=LEVEL_PRIORITY[level])
+    results: List[Optional[str]] = [None] * len(texts)
+    for i, summary in zip(present, reduced):
+        results[i] = re.sub(r'\s+', ' ', summary).strip()
+    return results
+
+def summarize_incremental(new_text: str, level: SummaryLevel = 'standard', state: Optional[RollingState] = None,
+                          memo: Optional[SummaryMemo] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                          progress: Optional[ProgressCallback] = None) -> RollingState:
+    """
+    Extend a rolling summary with text appended to the transcript since `state`.
+
+    Chunks are packed from the start, so new text can only change the last chunk:
+    the earlier ones are sealed with their summaries and only the last chunk plus the
+    new text are chunked and summarized. With a `memo` shared across refreshes, the
+    reduce tree only re-runs its rightmost branch, so a refresh costs in proportion
+    to the new text rather than the whole transcript.
+    """
+    config = SUMMARY_CONFIGS[level]
+    summarizer = get_summarizer(config['model'])
+    state = state or {'tail': '', 'sealed': [], 'summary': ''}
+    new_text = clean_transcript(new_text)
+    if not new_text and state['summary']:
+        return state
+
+    text = f"{state['tail']} {new_text}".strip()
+    with stage('chunk', level=level, mode='incremental'):
+        chunks = chunk_by_tokens(text, summarizer.tokenizer, config['chunk_tokens'], config['overlap_tokens'])
+    if not chunks:
+        return state
+
+    priority = LEVEL_PRIORITY[level]
+    with stage('summarize_chunks', level=level, chunks=len(chunks), mode='incremental'):
+        summaries = summarize_chunks(summarizer, chunks, config['max_length'], config['min_length'], batch_size,
+                                     progress, priority, memo)
+    sealed = state['sealed'] + [summary for summary in summaries[:-1] if summary]
+    leaves = sealed + [summary for summary in summaries[-1:] if summary]
+
+    if progress:
+        progress('combine', 0, 1)
+    with stage('combine', level=level, summaries=len(leaves), mode='incremental'):
+        summary = combine_summaries(leaves, config['max_length'], mode='tree', batch_size=batch_size,
+                                    progress=progress, summarizer=summarizer, priority=priority, memo=memo)
+    return {'tail': chunks[-1], 'sealed': sealed, 'summary': re.sub(r'\s+', ' ', summary).strip()}
+
 def main():
+    global PROGRESS_BARS
+    PROGRESS_BARS = True
+    configure_logging()
     try:
         # Check if summary level is provided as argument
         level: SummaryLevel = 'standard'  # Default level
-        if len(sys.argv) > 1 and sys.argv[1] in SUMMARY_CONFIGS:
+        if len(sys.argv) > 1 and (sys.argv[1] in SUMMARY_CONFIGS or sys.argv[1] == 'instant'):
             level = sys.argv[1]  # type: ignore
         
         # Read the transcript
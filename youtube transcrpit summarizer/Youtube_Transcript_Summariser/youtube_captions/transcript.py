@@ -0,0 +1,116 @@
+import hashlib
+import io
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+TIMESTAMP_PATTERN = re.compile(r'\[(\d{2}):(\d{2}):(\d{2})\]')
+
+
+def format_timestamp_ms(milliseconds: int) -> str:
+    """Convert milliseconds to HH:MM:SS.mmm without dropping the milliseconds."""
+    seconds, ms = divmod(int(milliseconds), 1000)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+class Transcript:
+    """
+    Caption segments as parallel arrays over one shared text buffer.
+
+    Segment i spans text[offsets[i]:offsets[i + 1]] and starts at start_ms[i]
+    for duration_ms[i] milliseconds. Built once from the caption stream and
+    passed to summarization, analytics and rendering, so none of them have to
+    re-parse "[HH:MM:SS] text" strings.
+    """
+
+    __slots__ = ('start_ms', 'duration_ms', 'offsets', 'text')
+
+    def __init__(self, start_ms: array, duration_ms: array, offsets: array, text: str):
+        self.start_ms = start_ms
+        self.duration_ms = duration_ms
+        self.offsets = offsets
+        self.text = text
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[int, int, str]]) -> 'Transcript':
+        """Build from (start_ms, duration_ms, text) tuples."""
+        start_ms, duration_ms, offsets = array('q'), array('q'), array('q', [0])
+        buffer = io.StringIO()
+        position = 0
+        for start, duration, text in segments:
+            start_ms.append(int(start))
+            duration_ms.append(int(duration))
+            position += buffer.write(text)
+            offsets.append(position)
+        return cls(start_ms, duration_ms, offsets, buffer.getvalue())
+
+    @classmethod
+    def from_timestamped(cls, text: str) -> 'Transcript':
+        """Parse a legacy "[HH:MM:SS] text" transcript in a single pass."""
+        matches = list(TIMESTAMP_PATTERN.finditer(text))
+        starts = [(int(h) * 3600 + int(m) * 60 + int(s)) * 1000 for h, m, s in (mt.groups() for mt in matches)]
+        segments = []
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            segment_text = ' '.join(text[match.end():end].split())
+            if segment_text:
+                # Second-resolution input: a segment lasts until the next one starts
+                duration = starts[i + 1] - starts[i] if i + 1 < len(starts) else 0
+                segments.append((starts[i], duration, segment_text))
+        return cls.from_segments(segments)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Transcript':
+        return cls(array('q', data['start_ms']), array('q', data['duration_ms']),
+                   array('q', data['offsets']), data['text'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form, used for caching."""
+        return {
+            'start_ms': self.start_ms.tolist(),
+            'duration_ms': self.duration_ms.tolist(),
+            'offsets': self.offsets.tolist(),
+            'text': self.text,
+        }
+
+    def digest(self) -> str:
+        """Content hash of the text and timings, for caching results derived from them."""
+        h = hashlib.sha256(self.text.encode('utf-8'))
+        for values in (self.start_ms, self.duration_ms, self.offsets):
+            h.update(values.tobytes())
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.start_ms)
+
+    def segment_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def texts(self) -> Iterator[str]:
+        offsets, text = self.offsets, self.text
+        for i in range(len(self.start_ms)):
+            yield text[offsets[i]:offsets[i + 1]]
+
+    def segments(self) -> Iterator[Tuple[int, int, str]]:
+        """Iterate (start_ms, duration_ms, text) tuples."""
+        return zip(self.start_ms, self.duration_ms, self.texts())
+
+    def plain_text(self) -> str:
+        """Segment texts joined into one cleaned string, ready for summarization."""
+        return ' '.join(' '.join(self.texts()).split())
+
+    def to_timestamped(self) -> str:
+        """Render the legacy "[HH:MM:SS] text" format written to subs.txt."""
+        return '\n\n'.join(
+            f"[{format_timestamp_ms(start)[:8]}] {text}" for start, _, text in self.segments()
+        )
+
+    def to_display_text(self) -> str:
+        """Render the transcript shown in the frontend: one caption per line."""
+        return '\n\n'.join('\n ' + text for text in self.texts())
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [{'start_ms': start, 'duration_ms': duration, 'text': text}
+                for start, duration, text in self.segments()]
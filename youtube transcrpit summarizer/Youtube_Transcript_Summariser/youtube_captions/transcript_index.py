@@ -0,0 +1,172 @@
+import re
+from functools import cached_property
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from transcript import Transcript
+
+# Words (keeping internal hyphens and apostrophes), runs of sentence punctuation, other symbols
+TOKEN_PATTERN = re.compile(r"\w+(?:['’-]\w+)*|[.!?]+|[^\w\s]")
+SENTENCE_END = re.compile(r'[.!?]+')
+NEGATIONS = frozenset(('no', 'not', "n't", 'never'))
+
+
+class TranscriptIndex:
+    """
+    A transcript tokenized once into NumPy arrays shared by every analytics metric.
+
+    `token_ids[k]` indexes `vocab` and `token_segments[k]` is the caption segment the
+    token came from. Derived arrays (term counts, words per segment, sentiment) are
+    computed on first access and then reused.
+    """
+
+    def __init__(self, transcript: Transcript):
+        self.transcript = transcript
+        # Join with a separator so no token spans two segments; segment i then starts i chars later
+        joined = '\n'.join(transcript.texts())
+        starts = np.frombuffer(transcript.offsets, dtype=np.int64)[:-1] + np.arange(len(transcript))
+
+        vocab: Dict[str, int] = {}
+        positions: List[int] = []
+        ids: List[int] = []
+        for match in TOKEN_PATTERN.finditer(joined):
+            ids.append(vocab.setdefault(match.group(), len(vocab)))
+            positions.append(match.start())
+
+        self.vocab: List[str] = list(vocab)
+        self.token_ids = np.array(ids, dtype=np.int64)
+        self.token_segments = np.searchsorted(starts, np.array(positions, dtype=np.int64), side='right') - 1
+
+    @classmethod
+    def build(cls, text) -> 'TranscriptIndex':
+        """Index a TranscriptIndex, Transcript or legacy "[HH:MM:SS] text" string."""
+        if isinstance(text, cls):
+            return text
+        if not isinstance(text, Transcript):
+            text = Transcript.from_timestamped(text)
+        return cls(text)
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    @cached_property
+    def _lowercase(self) -> Tuple[np.ndarray, List[str]]:
+        lower: Dict[str, int] = {}
+        mapping = np.fromiter((lower.setdefault(word.lower(), len(lower)) for word in self.vocab),
+                              dtype=np.int64, count=len(self.vocab))
+        return mapping, list(lower)
+
+    @property
+    def lower_vocab(self) -> List[str]:
+        """Distinct lowercased terms."""
+        return self._lowercase[1]
+
+    @cached_property
+    def lower_ids(self) -> np.ndarray:
+        """Per-token ids into `lower_vocab`, merging case variants."""
+        return self._lowercase[0][self.token_ids]
+
+    @cached_property
+    def term_counts(self) -> np.ndarray:
+        """Occurrences of each `lower_vocab` term."""
+        return np.bincount(self.lower_ids, minlength=len(self.lower_vocab))
+
+    @cached_property
+    def words_per_segment(self) -> np.ndarray:
+        return np.bincount(self.token_segments, minlength=len(self.transcript))
+
+    @cached_property
+    def sentence_count(self) -> int:
+        if not len(self):
+            return 0
+        is_end = np.fromiter((bool(SENTENCE_END.fullmatch(word)) for word in self.vocab),
+                             dtype=bool, count=len(self.vocab))[self.token_ids]
+        # Trailing text without final punctuation still counts as a sentence
+        return int(is_end.sum()) + int(not is_end[-1])
+
+    def top_terms(self, n: int, exclude: frozenset = frozenset()) -> List[Tuple[str, int]]:
+        """The `n` most frequent alphanumeric terms not in `exclude`, most frequent first."""
+        counts = self.term_counts.copy()
+        keep = np.fromiter((word.isalnum() and word not in exclude for word in self.lower_vocab),
+                           dtype=bool, count=len(self.lower_vocab))
+        counts[~keep] = 0
+        n = min(n, int(np.count_nonzero(counts)))
+        if n == 0:
+            return []
+        top = np.argpartition(-counts, n - 1)[:n]
+        # Stable ordering: by count, then first occurrence, like Counter.most_common
+        top = top[np.lexsort((top, -counts[top]))]
+        return [(self.lower_vocab[i], int(counts[i])) for i in top]
+
+    def speaking_rate(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Segment start times and words per minute until the next segment, skipping zero gaps."""
+        starts = np.frombuffer(self.transcript.start_ms, dtype=np.int64)
+        minutes = np.diff(starts) / 60000
+        words = self.words_per_segment[:-1]
+        valid = minutes > 0
+        return starts[:-1][valid], words[valid] / minutes[valid]
+
+    def words_per_minute(self) -> np.ndarray:
+        """Words spoken per minute between consecutive segment starts, skipping zero gaps."""
+        return self.speaking_rate()[1]
+
+    @cached_property
+    def segment_polarity(self) -> np.ndarray:
+        """
+        Mean sentiment polarity per segment from the TextBlob lexicon.
+
+        Mirrors TextBlob's pattern analyzer on whole arrays: each lexicon word contributes its
+        polarity, an intensifying adverb scales the word after it, every "!" boosts the
+        segment's last scored word by 1.25 and a preceding negation flips and halves it.
+        Segments without lexicon words score 0.
+        """
+        from textblob.en import sentiment as lexicon
+
+        size = len(self.lower_vocab)
+        polarity = np.zeros(size)
+        intensity = np.ones(size)
+        in_lexicon = np.zeros(size, dtype=bool)
+        is_modifier = np.zeros(size, dtype=bool)
+        is_negation = np.zeros(size, dtype=bool)
+        exclamations = np.zeros(size)
+        for i, word in enumerate(self.lower_vocab):
+            senses = lexicon.get(word)
+            if senses:
+                polarity[i], _, intensity[i] = senses[None]
+                in_lexicon[i] = True
+                is_modifier[i] = 'RB' in senses
+            is_negation[i] = word in NEGATIONS or word.endswith(("n't", "n’t"))
+            if SENTENCE_END.fullmatch(word):
+                exclamations[i] = word.count('!')
+
+        ids, segments = self.lower_ids, self.token_segments
+        token_polarity = polarity[ids]
+        scored = in_lexicon[ids]
+        # Pairs of adjacent tokens within one segment
+        same_segment = segments[1:] == segments[:-1]
+        modified = is_modifier[ids[:-1]] & scored[1:] & same_segment
+        token_polarity[1:][modified] *= intensity[ids[:-1]][modified]
+        scored[:-1][modified] = False  # The modifier is folded into the word it modifies
+        np.clip(token_polarity, -1.0, 1.0, out=token_polarity)
+
+        # Each "!" multiplies the last scored word before it in the segment by 1.25, up to +-1
+        positions = np.arange(len(ids))
+        last_scored = np.maximum.accumulate(np.where(scored, positions, -1)) if len(ids) else positions
+        boosts = exclamations[ids]
+        boosted = (boosts > 0) & (last_scored >= 0)
+        boosted[boosted] &= segments[last_scored[boosted]] == segments[boosted]
+        exponent = np.zeros(len(ids))
+        np.add.at(exponent, last_scored[boosted], boosts[boosted])
+        token_polarity = np.clip(token_polarity * 1.25 ** exponent, -1.0, 1.0)
+
+        negated = is_negation[ids[:-1]] & same_segment
+        token_polarity[1:][negated] *= -0.5
+
+        totals = np.bincount(segments[scored], weights=token_polarity[scored], minlength=len(self.transcript))
+        counts = np.bincount(segments[scored], minlength=len(self.transcript))
+        return np.clip(np.divide(totals, counts, out=np.zeros(len(totals)), where=counts > 0), -1.0, 1.0)
+
+    def engagement_scores(self) -> np.ndarray:
+        """Per-segment score from sentiment and length: (polarity + 1) * words / 100."""
+        return (self.segment_polarity + 1) * self.words_per_segment / 100
@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from batching import BATCH_SCHEDULER, BatchScheduler
+from deadline import Cancelled, Deadline
+from metrics import log_event, stage
+from model_registry import MBART_MODEL, get_marian, get_mbart
+from summarize_transcript import split_sentences
+
+# Sentences run through a single generate() call
+TRANSLATION_BATCH_SIZE = int(os.environ.get('TRANSLATION_BATCH_SIZE', '16'))
+# Translated sentences remembered across summaries (boilerplate sentences recur)
+SENTENCE_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', '10000'))
+
+
+class TranslationRoute(NamedTuple):
+    """How to translate English into one target language."""
+    family: str  # 'marian' or 'mbart'
+    model_name: str
+    target_code: Optional[str] = None  # mBART-50 language code
+    joiner: str = ' '  # How translated sentences are joined back together
+
+
+LANGUAGE_ROUTES: Dict[str, TranslationRoute] = {
+    'hindi': TranslationRoute('marian', 'Helsinki-NLP/opus-mt-en-hi'),
+    'marathi': TranslationRoute('marian', 'Helsinki-NLP/opus-mt-en-mr'),
+    'chinese': TranslationRoute('marian', 'Helsinki-NLP/opus-mt-en-zh', joiner=''),
+    'arabic': TranslationRoute('marian', 'Helsinki-NLP/opus-mt-en-ar'),
+    'kannada': TranslationRoute('mbart', MBART_MODEL, 'kn_IN'),
+    'telugu': TranslationRoute('mbart', MBART_MODEL, 'te_IN'),
+    'tamil': TranslationRoute('mbart', MBART_MODEL, 'ta_IN'),
+}
+
+
+def register_language(language: str, route: TranslationRoute) -> None:
+    """Add or replace the route used for a target language."""
+    LANGUAGE_ROUTES[language.lower()] = route
+
+
+def supported_languages() -> List[str]:
+    return ['english'] + sorted(LANGUAGE_ROUTES)
+
+
+class SentenceCache:
+    """Thread-safe LRU of translated sentences keyed by (model, target, sentence)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: tuple, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+sentence_cache = SentenceCache(SENTENCE_CACHE_SIZE)
+
+
+def _load(route: TranslationRoute):
+    """Return (model, tokenizer, extra generate kwargs) for a route from the shared registry."""
+    if route.family == 'marian':
+        model, tokenizer = get_marian(route.model_name)
+        return model, tokenizer, {}
+    if route.family == 'mbart':
+        model, tokenizer = get_mbart(route.model_name)
+        return model, tokenizer, {'forced_bos_token_id': tokenizer.convert_tokens_to_ids(route.target_code)}
+    raise ValueError(f"Unknown translation model family '{route.family}'")
+
+
+def _input_limit(model, tokenizer) -> int:
+    """Largest source length, in tokens, the model accepts."""
+    limit = tokenizer.model_max_length
+    positions = getattr(getattr(model, 'config', None), 'max_position_embeddings', None)
+    if positions:
+        limit = min(limit, positions)
+    return limit
+
+
+def _fit_sentences(sentences: List[str], tokenizer, limit: int) -> List[str]:
+    """Split any sentence longer than the model limit at word boundaries instead of truncating it."""
+    if not sentences:
+        return []
+    lengths = tokenizer(sentences, add_special_tokens=True)['input_ids']
+    fitted = []
+    for sentence, ids in zip(sentences, lengths):
+        if len(ids) <= limit:
+            fitted.append(sentence)
+            continue
+        # Marian tokenizers have no offset mapping, so size word windows by the average token rate
+        words = sentence.split()
+        step = max(1, len(words) * (limit - 2) // (2 * len(ids)))
+        fitted.extend(' '.join(words[i:i + step]) for i in range(0, len(words), step))
+    return fitted
+
+
+def generate_translations(route: TranslationRoute, sentences: List[str]) -> List[str]:
+    """Translate `sentences` in one padded generate() call."""
+    import torch
+
+    model, tokenizer, generate_kwargs = _load(route)
+    limit = _input_limit(model, tokenizer)
+    inputs = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True,
+                       max_length=limit, return_token_type_ids=False).to(model.device)
+    longest = inputs['input_ids'].shape[1]
+    with torch.inference_mode():
+        output_ids = model.generate(**inputs, max_new_tokens=min(limit, 2 * longest + 16), **generate_kwargs)
+    return tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+
+def _run_translation_batch(route: TranslationRoute, params: tuple, sentences: List[str]) -> List[str]:
+    return generate_translations(route, sentences)
+
+
+# Batches sentences of all in-flight translations together; see batching.py
+translation_scheduler = BatchScheduler('translate', _run_translation_batch, TRANSLATION_BATCH_SIZE)
+
+
+def _iter_scheduled(route: TranslationRoute, sentences: List[str], tokenizer, cache_prefix: tuple, priority: int,
+                    progress: Optional[Callable[[str, int, int], None]], deadline: Deadline) -> Iterator[str]:
+    """
+    Queue every uncached sentence with the scheduler at once and yield translations in order.
+
+    Sentences not translated by the deadline are withdrawn from the queue and yielded untranslated.
+    """
+    results: List[Optional[str]] = [sentence_cache.get(cache_prefix + (s,)) for s in sentences]
+    missing = list(dict.fromkeys(s for s, r in zip(sentences, results) if r is None))
+    futures = {}
+    if missing:
+        lengths = [len(ids) for ids in tokenizer(missing)['input_ids']]
+        futures = dict(zip(missing, translation_scheduler.submit(route, (), missing, lengths, priority)))
+    untranslated = 0
+    for i, (sentence, result) in enumerate(zip(sentences, results)):
+        if result is None:
+            future = futures[sentence]
+            if not future.done():
+                try:
+                    deadline.wait([future], 'translate')
+                except Cancelled:
+                    # Withdraw every queued sentence, not just the one being waited on
+                    for pending in futures.values():
+                        pending.cancel()
+                    raise
+            if future.done() and not future.cancelled():
+                result = future.result()
+                sentence_cache.set(cache_prefix + (sentence,), result)
+            else:
+                for pending in futures.values():
+                    pending.cancel()
+                result = sentence
+                untranslated += 1
+        if progress:
+            progress('translate', i + 1, len(sentences))
+        yield result
+    if untranslated:
+        deadline.degrade('partial_translation', untranslated=untranslated, of=len(sentences))
+
+
+def iter_translations(text: str, language: str, batch_size: int = TRANSLATION_BATCH_SIZE,
+                      progress: Optional[Callable[[str, int, int], None]] = None,
+                      priority: int = 0, deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    Translate `text` sentence by sentence, yielding translations in order as each batch finishes.
+
+    Sentences are batched through the cached model, each kept within the model's input
+    limit, and previously translated sentences are served from the sentence cache.
+    With the batch scheduler enabled, sentences share batches with other in-flight
+    translations at `priority`; otherwise they run here in batches of `batch_size`.
+    Once the `deadline` passes the remaining sentences are yielded in English.
+    """
+    deadline = deadline or Deadline()
+    route = LANGUAGE_ROUTES.get(language)
+    if route is None:
+        raise ValueError(f"Translation to '{language}' not supported")
+
+    model, tokenizer, _ = _load(route)
+    limit = _input_limit(model, tokenizer)
+    sentences = _fit_sentences(split_sentences(text), tokenizer, limit)
+    cache_prefix = (route.model_name, route.target_code)
+
+    if BATCH_SCHEDULER:
+        yield from _iter_scheduled(route, sentences, tokenizer, cache_prefix, priority, progress, deadline)
+        return
+
+    for start in range(0, len(sentences), batch_size):
+        deadline.check('translate')
+        if deadline.expired:
+            deadline.degrade('partial_translation', untranslated=len(sentences) - start, of=len(sentences))
+            yield from sentences[start:]
+            return
+        batch = sentences[start:start + batch_size]
+        results: List[Optional[str]] = [sentence_cache.get(cache_prefix + (s,)) for s in batch]
+        # Translate each distinct uncached sentence once
+        missing = list(dict.fromkeys(s for s, r in zip(batch, results) if r is None))
+        if missing:
+            translated = dict(zip(missing, generate_translations(route, missing)))
+            for sentence, translation in translated.items():
+                sentence_cache.set(cache_prefix + (sentence,), translation)
+            results = [r if r is not None else translated[s] for s, r in zip(batch, results)]
+        if progress:
+            progress('translate', min(start + batch_size, len(sentences)), len(sentences))
+        yield from results
+
+
+def translate_text(text: str, language: str, progress: Optional[Callable[[str, int, int], None]] = None,
+                   deadline: Optional[Deadline] = None) -> str:
+    """Translate English text into `language`."""
+    route = LANGUAGE_ROUTES.get(language)
+    joiner = route.joiner if route else ' '
+    return joiner.join(iter_translations(text, language, progress=progress, deadline=deadline))
+
+
+def translate_summary(summary: str, language: str,
+                      progress: Optional[Callable[[str, int, int], None]] = None,
+                      deadline: Optional[Deadline] = None) -> str:
+    """Translate an English summary, prefixing an error note if translation fails."""
+    if language not in LANGUAGE_ROUTES:
+        return f"[Translation to '{language}' not supported] " + summary
+    try:
+        with stage('translate', language=language):
+            return translate_text(summary, language, progress, deadline)
+    except Cancelled:
+        raise
+    except Exception as e:
+        log_event('translate_error', severity=logging.ERROR, language=language, error=str(e))
+        return f"[Translation error: {str(e)}] " + summary
@@ -0,0 +1,274 @@
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from summarize_transcript import split_sentences
+
+# 'gtts' (Google TTS over the network), 'offline' (espeak-ng + lameenc) or 'stub' (silent MP3)
+TTS_ENGINE = os.environ.get('TTS_ENGINE', 'gtts')
+# Sentence chunks synthesized at the same time
+TTS_WORKERS = int(os.environ.get('TTS_WORKERS', '4'))
+# Characters per synthesized chunk; whole sentences are packed up to this size
+TTS_CHUNK_CHARS = int(os.environ.get('TTS_CHUNK_CHARS', '300'))
+TTS_CACHE_DIR = os.environ.get(
+    'TTS_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tts')
+)
+TTS_CACHE_BYTES = int(os.environ.get('TTS_CACHE_MB', '256')) * 1024 * 1024
+
+# Language names used by the app mapped to each engine's language codes
+GTTS_LANGUAGES = {
+    'english': 'en',
+    'hindi': 'hi',
+    'marathi': 'mr',
+    'chinese': 'zh-CN',
+    'arabic': 'ar',
+    'kannada': 'kn',
+    'telugu': 'te',
+    'tamil': 'ta'
+}
+ESPEAK_VOICES = {
+    'english': 'en',
+    'hindi': 'hi',
+    'marathi': 'mr',
+    'chinese': 'cmn',
+    'arabic': 'ar',
+    'kannada': 'kn',
+    'telugu': 'te',
+    'tamil': 'ta'
+}
+
+
+class TTSEngine:
+    """Turns one chunk of text into MP3 bytes. Chunks are concatenated frame-wise, so no container headers."""
+    name = 'base'
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS; audio is written to memory rather than a temp file."""
+    name = 'gtts'
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=GTTS_LANGUAGES.get(language, 'en')).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class OfflineEngine(TTSEngine):
+    """Local synthesis with espeak-ng, encoded to MP3 with lameenc; no network access needed."""
+    name = 'offline'
+
+    def __init__(self, binary: Optional[str] = None, bitrate: int = 64):
+        self.binary = binary or shutil.which('espeak-ng') or shutil.which('espeak')
+        if not self.binary:
+            raise RuntimeError("The offline TTS engine needs espeak-ng on PATH")
+        try:
+            import lameenc  # noqa: F401
+        except ImportError as e:
+            raise ImportError("The offline TTS engine needs lameenc: pip install lameenc") from e
+        self.bitrate = bitrate
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        import lameenc
+
+        # espeak writes a WAV to stdout, so nothing touches the filesystem
+        wav = subprocess.run([self.binary, '--stdout', '-v', ESPEAK_VOICES.get(language, 'en'), text],
+                             capture_output=True, check=True).stdout
+        with wave.open(io.BytesIO(wav)) as reader:
+            encoder = lameenc.Encoder()
+            encoder.set_bit_rate(self.bitrate)
+            encoder.set_in_sample_rate(reader.getframerate())
+            encoder.set_channels(reader.getnchannels())
+            encoder.set_quality(5)
+            frames = reader.readframes(reader.getnframes())
+        return bytes(encoder.encode(frames) + encoder.flush())
+
+
+class StubEngine(TTSEngine):
+    """Silent MP3 roughly as long as the text would take to read; for tests and air-gapped setups."""
+    name = 'stub'
+
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono: 417-byte frames of 1152 samples (~26 ms)
+    FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+    FRAMES_PER_WORD = 12
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        return self.FRAME * (self.FRAMES_PER_WORD * max(1, len(text.split())))
+
+
+ENGINES = {
+    'gtts': GTTSEngine,
+    'offline': OfflineEngine,
+    'stub': StubEngine,
+}
+
+
+def get_engine(name: str = TTS_ENGINE) -> TTSEngine:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}', expected one of {', '.join(ENGINES)}")
+    return ENGINES[name]()
+
+
+class AudioCache:
+    """Content-addressed MP3 chunks on disk, evicting least recently used files beyond a size budget."""
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith('.tmp'):
+                # Left over from a crash mid-write
+                os.remove(path)
+            elif name.endswith('.mp3'):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+
+    @staticmethod
+    def key(text: str, language: str, engine: str) -> str:
+        return hashlib.sha256(f"{engine}\0{language}\0{text}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.mp3')
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            with open(self._path(key), 'rb') as f:
+                audio = f.read()
+            os.utime(self._path(key))
+            return audio
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+    def set(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_bytes:
+            return
+        # Write to a temp file in the cache directory and rename, so readers never see partial audio
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._entries[key] = len(audio)
+            self._entries.move_to_end(key)
+            used = sum(self._entries.values())
+            while used > self.max_bytes and len(self._entries) > 1:
+                oldest, size = self._entries.popitem(last=False)
+                used -= size
+                try:
+                    os.remove(self._path(oldest))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(self._entries.values()),
+                'max_bytes': self.max_bytes,
+            }
+
+
+def split_for_speech(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """Pack whole sentences into chunks of up to `max_chars` characters."""
+    chunks, current = [], ''
+    for sentence in split_sentences(text):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SpeechService:
+    """Synthesizes text chunk by chunk on a thread pool, serving repeated chunks from the audio cache."""
+
+    def __init__(self, engine: TTSEngine, cache: AudioCache, workers: int = TTS_WORKERS):
+        self.engine = engine
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tts')
+
+    def _synthesize_chunk(self, chunk: str, language: str) -> bytes:
+        key = AudioCache.key(chunk, language, self.engine.name)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self.engine.synthesize(chunk, language)
+            self.cache.set(key, audio)
+        return audio
+
+    def stream(self, text: str, language: str) -> Iterator[bytes]:
+        """
+        Yield MP3 audio for `text` in order, one chunk at a time.
+
+        All chunks are submitted at once, so later chunks synthesize while earlier ones are
+        being sent. The first chunk's errors surface on the first `next()`; unsent chunks are
+        cancelled if the consumer stops early.
+        """
+        futures: List[Future] = [self._executor.submit(self._synthesize_chunk, chunk, language)
+                                 for chunk in split_for_speech(text)]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        return b''.join(self.stream(text, language))
+
+    def stats(self) -> Dict[str, object]:
+        return {'engine': self.engine.name, **self.cache.stats()}
+
+
+_service: Optional[SpeechService] = None
+_service_lock = threading.Lock()
+
+
+def get_speech_service() -> SpeechService:
+    """Return the process-wide speech service for the configured engine."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SpeechService(get_engine(TTS_ENGINE), AudioCache())
+        return _service